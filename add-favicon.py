@@ -1,53 +1,36 @@
 #!/usr/bin/env python3
-import os
-import re
-from pathlib import Path
+import sys
 
-favicon_link = '  <link rel="icon" type="image/png" href="/assets/images/favicon.png">\n'
+from sitetools import instrument
+from sitetools.files import iter_files
+from sitetools.rewrite import rewrite_files
+from sitetools.rules import FAVICON
 
-def add_favicon_to_file(filepath):
-    """Add favicon link to HTML file if it doesn't already have one."""
-    with open(filepath, 'r', encoding='utf-8') as f:
-        content = f.read()
+instrument.start(__file__)
 
-    # Check if favicon is already present
-    if 'favicon' in content.lower():
-        return False
-
-    # Find the </head> tag and insert favicon before it
-    # Look for </head> with possible whitespace before it
-    pattern = r'(\s*)</head>'
-    replacement = f'{favicon_link}\\1</head>'
-
-    new_content = re.sub(pattern, replacement, content, count=1)
-
-    if new_content != content:
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(new_content)
-        return True
-
-    return False
-
-# Find all HTML files
-html_files = []
-for root, dirs, files in os.walk('.'):
-    # Skip hidden directories and node_modules
-    dirs[:] = [d for d in dirs if not d.startswith('.') and d != 'node_modules']
-
-    for file in files:
-        if file.endswith('.html'):
-            html_files.append(os.path.join(root, file))
+# Find all HTML files, skipping hidden directories and node_modules
+with instrument.stage("walk"):
+    html_files = list(iter_files('.'))
 
 updated_count = 0
 skipped_count = 0
-
-for filepath in sorted(html_files):
-    if add_favicon_to_file(filepath):
-        print(f"✓ Added favicon to {filepath}")
+error_count = 0
+
+# The favicon rule only fires on files with no favicon yet, inserting the
+# link before </head>
+for result in rewrite_files(html_files, FAVICON):
+    if result.error:
+        print(f"✗ Error processing {result.path}: {result.error}")
+        error_count += 1
+    elif result.changed:
+        print(f"✓ Added favicon to {result.path}")
         updated_count += 1
     else:
-        print(f"- Skipped {filepath} (already has favicon)")
+        print(f"- Skipped {result.path} (already has favicon)")
         skipped_count += 1
 
 print(f"\n✓ Added favicon to {updated_count} files")
 print(f"- Skipped {skipped_count} files (already had favicon)")
+if error_count:
+    print(f"✗ Failed on {error_count} files")
+    sys.exit(1)
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Add loading, decoding and intrinsic-size attributes to every <img>.
+
+For each page:
+- images in the site <header> (the logo) stay eager and only get a size
+- the first image after the header is the hero: it stays eager and gets
+  fetchpriority="high"
+- every other image gets loading="lazy" and decoding="async"
+- width/height come from the referenced file's header, for local images
+  that have neither
+
+Attributes an image already has are left alone, so running this again
+changes nothing. <img> markup inside scripts, templates and comments is
+skipped.
+
+    python3 add-image-hints.py
+    python3 add-image-hints.py --root dist --dry-run
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+
+from sitetools import instrument
+from sitetools.files import iter_files
+from sitetools.html import is_external, resolve, site_path
+from sitetools.images import image_size
+from sitetools.rules import BASE_PATH
+
+IMG = re.compile(r"<img\b[^>]*>", re.I)
+ATTR = re.compile(r"""([\w:-]+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+)))?""")
+# Markup that may contain "<img" without being an image on the page.
+OPAQUE = re.compile(r"<script\b.*?</script\s*>|<template\b.*?</template\s*>|<!--.*?-->", re.I | re.S)
+HEADER_END = re.compile(r"</header\s*>", re.I)
+
+
+def parse_attrs(tag):
+    body = re.match(r"<\w+\s*(.*?)\s*/?>$", tag, re.S).group(1)
+    attrs = {}
+    for m in ATTR.finditer(body):
+        attrs[m.group(1).lower()] = next((g for g in m.groups()[1:] if g is not None), "")
+    return attrs
+
+
+class OnDisk:
+    """Membership test against the files under `root`, for resolve()."""
+
+    def __init__(self, root):
+        self.root = root
+
+    def __contains__(self, path):
+        return bool(path) and os.path.isfile(os.path.join(self.root, path))
+
+
+class ImageHints:
+    def __init__(self, root, base_path=BASE_PATH):
+        self.root = root
+        self.files = OnDisk(root)
+        self.base_path = base_path
+        self.sizes = {}
+
+    def size_of(self, src, page):
+        if not src or is_external(src):
+            return None
+        target = resolve(src, page, self.files, self.base_path)
+        if target is None:
+            return None
+        if target not in self.sizes:
+            self.sizes[target] = image_size(os.path.join(self.root, target))
+        return self.sizes[target]
+
+    def apply(self, text, page):
+        """Return (new_text, counts) for one page."""
+        counts = {"size": 0, "lazy": 0, "fetchpriority": 0}
+        opaque = [m.span() for m in OPAQUE.finditer(text)]
+        header = HEADER_END.search(text)
+        header_end = header.end() if header else 0
+        tags = [m for m in IMG.finditer(text)
+                if not any(start <= m.start() < end for start, end in opaque)]
+        # Only one image per page gets priority; respect one set by hand.
+        hero_pending = not any("fetchpriority" in parse_attrs(m.group(0)) for m in tags)
+
+        out = []
+        pos = 0
+        for m in tags:
+            tag = m.group(0)
+            attrs = parse_attrs(tag)
+            added = []
+            if "width" not in attrs and "height" not in attrs:
+                size = self.size_of(attrs.get("src"), page)
+                if size:
+                    added += [f'width="{size[0]}"', f'height="{size[1]}"']
+                    counts["size"] += 1
+            if m.start() >= header_end and "fetchpriority" not in attrs:
+                if hero_pending:
+                    hero_pending = False
+                    if "loading" not in attrs:
+                        added.append('fetchpriority="high"')
+                        counts["fetchpriority"] += 1
+                else:
+                    if "loading" not in attrs:
+                        added.append('loading="lazy"')
+                        counts["lazy"] += 1
+                    if "decoding" not in attrs:
+                        added.append('decoding="async"')
+            if added:
+                end = len(tag) - (2 if tag.endswith("/>") else 1)
+                head = tag[:end].rstrip()
+                tag = f'{head} {" ".join(added)}{tag[len(head):]}'
+            out.append(text[pos:m.start()])
+            out.append(tag)
+            pos = m.end()
+        out.append(text[pos:])
+        return "".join(out), counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Add lazy-loading and size hints to <img> tags.")
+    parser.add_argument("--root", default=".", help="site root (default: current directory)")
+    parser.add_argument("--dry-run", action="store_true", help="report without writing")
+    args = parser.parse_args()
+
+    instrument.start(__file__)
+    hints = ImageHints(args.root)
+    updated_count = 0
+    totals = {}
+    for html_file in iter_files(args.root):
+        started = time.perf_counter()
+        try:
+            original = html_file.read_bytes()
+            content, counts = hints.apply(original.decode("utf-8"), site_path(html_file, args.root))
+        except (OSError, UnicodeDecodeError) as e:
+            print(f"Error processing {html_file}: {e}")
+            continue
+        data = content.encode("utf-8")
+        written = data != original and not args.dry_run
+        if written:
+            html_file.write_bytes(data)
+        instrument.file(html_file, time.perf_counter() - started, len(original),
+                        len(data) if written else 0)
+        if data != original:
+            print(f"✓ Updated {html_file} ({counts['size']} sized, {counts['lazy']} lazy"
+                  f"{', hero' if counts['fetchpriority'] else ''})")
+            updated_count += 1
+            for key, n in counts.items():
+                totals[key] = totals.get(key, 0) + n
+
+    print(f"\nTotal files updated: {updated_count}")
+    if totals:
+        print(f"{totals['size']} images sized, {totals['lazy']} lazy-loaded, "
+              f"{totals['fetchpriority']} hero images prioritized")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
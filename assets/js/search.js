@@ -0,0 +1,156 @@
+/**
+ * Site Search
+ * Queries the static index written by build-search-index.py. Only
+ * meta.json is revalidated; the docs list and the one shard per distinct
+ * leading character of the query are fetched by content-hashed name and
+ * come from the HTTP cache after the first search.
+ *
+ * Usage:
+ *   siteSearch.search('barred owl').then(results => ...)
+ *     -> [{ url, title, description, score }, ...] best first
+ *
+ * A form with data-site-search (holding an <input type="search">) and an
+ * element with data-site-search-results are wired up automatically; the
+ * sitemap page has both.
+ */
+(function () {
+    // Must match build-search-index.py's tokens().
+    const STOPWORDS = new Set(`
+        a an and are as at be but by for from has have in is it its of on or that the this
+        to was were will with you your our we us not can all any if into more so than then
+        there these they their them what when where which who how also been do does
+    `.split(/\s+/).filter(Boolean));
+    const MAX_RESULTS = 20;
+
+    // The script lives in /assets/js/, so the site root is two levels up,
+    // whatever base path the site is deployed under.
+    const scriptUrl = document.currentScript ? document.currentScript.src : location.href;
+    const siteRoot = new URL('../../', scriptUrl);
+    const indexUrl = new URL('assets/search/', siteRoot);
+
+    let meta = null;
+    const loaded = {};   // file name -> Promise of parsed JSON
+
+    function load(name, options) {
+        if (!loaded[name]) {
+            loaded[name] = fetch(new URL(name, indexUrl), options)
+                .then(r => r.ok ? r.json() : Promise.reject(new Error(`${name}: ${r.status}`)))
+                .catch(err => { delete loaded[name]; throw err; });
+        }
+        return loaded[name];
+    }
+
+    function loadMeta() {
+        if (!meta) meta = load('meta.json', { cache: 'no-cache' }).catch(err => { meta = null; throw err; });
+        return meta;
+    }
+
+    function tokens(text) {
+        return text.toLowerCase().normalize('NFKD').replace(/\p{M}/gu, '')
+            .match(/[a-z0-9]+/g)?.filter(w => w.length > 1 && !STOPWORDS.has(w)) || [];
+    }
+
+    // {doc: weight} for every indexed term starting with `word`; exact
+    // matches count double.
+    function lookup(shard, word) {
+        const scores = new Map();
+        Object.keys(shard).forEach(term => {
+            if (!term.startsWith(word)) return;
+            const postings = shard[term];
+            const factor = term === word ? 2 : 1;
+            let doc = 0;
+            for (let i = 0; i < postings.length; i += 2) {
+                doc += postings[i];   // delta-encoded document numbers
+                scores.set(doc, (scores.get(doc) || 0) + postings[i + 1] * factor);
+            }
+        });
+        return scores;
+    }
+
+    async function search(query, limit = MAX_RESULTS) {
+        const words = [...new Set(tokens(query))];
+        if (words.length === 0) return [];
+        const m = await loadMeta();
+        const prefixes = words.map(w => w.slice(0, m.prefix));
+        const [docs, ...shards] = await Promise.all([
+            load(m.docs),
+            ...prefixes.map(p => m.shards[p] ? load(m.shards[p]) : Promise.resolve({}))
+        ]);
+
+        // Every word has to match; scores add up across words.
+        let totals = null;
+        words.forEach((word, i) => {
+            const scores = lookup(shards[i], word);
+            if (totals === null) {
+                totals = scores;
+                return;
+            }
+            const next = new Map();
+            totals.forEach((score, doc) => {
+                if (scores.has(doc)) next.set(doc, score + scores.get(doc));
+            });
+            totals = next;
+        });
+
+        return [...totals]
+            .sort((a, b) => b[1] - a[1])
+            .slice(0, limit)
+            .map(([doc, score]) => {
+                const [url, title, description] = docs[doc];
+                return { url: new URL(url, siteRoot).href, title, description, score };
+            });
+    }
+
+    function render(container, results, query) {
+        container.textContent = '';
+        if (!query.trim()) return;
+        if (results.length === 0) {
+            const p = document.createElement('p');
+            p.className = 'search-empty';
+            p.textContent = `No results for "${query}"`;
+            container.appendChild(p);
+            return;
+        }
+        const list = document.createElement('ol');
+        list.className = 'search-results';
+        results.forEach(r => {
+            const item = document.createElement('li');
+            const link = document.createElement('a');
+            link.href = r.url;
+            link.textContent = r.title;
+            const description = document.createElement('p');
+            description.textContent = r.description;
+            item.append(link, description);
+            list.appendChild(item);
+        });
+        container.appendChild(list);
+    }
+
+    function initializeSearchForms() {
+        const container = document.querySelector('[data-site-search-results]');
+        document.querySelectorAll('form[data-site-search]').forEach(form => {
+            const input = form.querySelector('input[type="search"], input[name="q"]');
+            if (!input || !container) return;
+            let pending = 0;
+            const run = () => {
+                const query = input.value;
+                const ticket = ++pending;
+                search(query).then(results => {
+                    if (ticket === pending) render(container, results, query);
+                }).catch(err => console.error('Search failed:', err));
+            };
+            form.addEventListener('submit', e => { e.preventDefault(); run(); });
+            input.addEventListener('input', run);
+            // Support links like /sitemap.html?q=owl
+            const q = new URLSearchParams(location.search).get('q');
+            if (q) { input.value = q; run(); }
+        });
+    }
+
+    window.siteSearch = { search };
+    if (document.readyState === 'loading') {
+        document.addEventListener('DOMContentLoaded', initializeSearchForms);
+    } else {
+        initializeSearchForms();
+    }
+})();
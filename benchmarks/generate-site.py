@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Generate a synthetic copy of the site at any scale, for benchmarking the
+maintenance scripts.
+
+Pages are shaped like the real ones: the full header and dropdown nav
+(in its pre-update-navigation.py form, so the navigation rules have work
+to do), root-relative stylesheet, script and image URLs, old #mission /
+#policies links, and a favicon link on only some pages. Images are small
+real PNGs written without Pillow. The five ecoexplorer pages
+update-image-paths.py rewrites embed the WordPress URLs from its table,
+and photocontest/2026 gets contest photos named the way
+photocontest/build-manifest.py parses them.
+
+Output is deterministic for a given --seed and scale.
+
+    python3 benchmarks/generate-site.py /tmp/site
+    python3 benchmarks/generate-site.py /tmp/site --pages 10000 --images 5000 --photos 2000
+"""
+
+import argparse
+import ast
+import os
+import random
+import struct
+import sys
+import zlib
+from pathlib import Path
+
+REPO = Path(__file__).resolve().parents[1]
+SECTIONS = ["about", "events", "programs", "visit", "support", "gallery", "newsletter",
+            "eco0", "eco1", "eco2", "scholarship", "fall-festival"]
+WORDS = """
+trail meadow brook heron owl hawk fern moss oak maple warbler kinglet phoebe turtle
+frog salamander fox deer chipmunk woodpecker lichen mushroom creek bridge boardwalk
+volunteer garden pollinator butterfly monarch milkweed wetland canopy acorn seasons
+""".split()
+NAMES = ["joel", "rachel", "charlotte", "nicholas", "tyler_kim", "anonymous", "loretta",
+         "ben_seb_kim", "alex", "taide"]
+IMAGE_PAGES = ["ecoexplorer/index.html", "ecoexplorer/tenakill-brook.html",
+               "ecoexplorer/cottonwood-stump.html", "ecoexplorer/ash-tree.html",
+               "ecoexplorer/meadow.html"]
+
+# The nav as it was before update-navigation.py: every NAVIGATION rule matches.
+NAV = """\
+    <header id="header">
+        <div class="container">
+            <div class="logo">
+                <a href="/">
+                    <img src="/assets/images/logo.png" alt="Demarest Nature Center" id="site-logo">
+                    <span class="logo-text">Demarest Nature Center</span>
+                </a>
+            </div>
+            <nav id="mainNav">
+        <ul>
+          <li><a href="/">Home</a></li>
+          <li class="has-dropdown">
+            <a href="/about/">About</a>
+            <ul class="dropdown">
+              <li><a href="/about/#mission">Our Mission</a></li>
+              <li><a href="/about/#policies">Policies</a></li>
+              <li><a href="/about/#meetings">Monthly Board Meetings</a></li>
+              <li><a href="/support/membership.html">Membership</a></li>
+            </ul>
+          </li>
+          <li class="has-dropdown">
+            <a href="/visit/">Maps and Trails</a>
+            <ul class="dropdown">
+              <li><a href="/visit/#getting-here">Getting Here</a></li>
+              <li><a href="/eco0/">EcoExplorer Guides</a></li>
+            </ul>
+          </li>
+          <li class="has-dropdown">
+            <a href="/events/">News and Events</a>
+            <ul class="dropdown">
+              <li><a href="/events/">Upcoming Events</a></li>
+              <li><a href="/events/#newsletters">Newsletters</a></li>
+              <li><a href="/events/#nature-news">Nature News</a></li>
+              <li><a href="/events/#oktoberfest">Oktoberfest/Fall Festival</a></li>
+              <li><a href="/support/#scholarship">Scholarship</a></li>
+              <li><a href="/gallery/#photo-contest">Photo Contest</a></li>
+              <li><a href="/programs/#camp-soar">Camp SOAR</a></li>
+            </ul>
+          </li>
+          <li><a href="/shop/">Shop</a></li>
+        </ul>
+      </nav>
+        </div>
+    </header>
+"""
+
+FOOTER = """\
+    <footer>
+        <div class="container">
+            <p>&copy; Demarest Nature Center &middot; <a href="/privacy.html">Privacy</a>
+            &middot; <a href="/terms.html">Terms</a></p>
+        </div>
+    </footer>
+    <script src="/assets/js/main.js"></script>
+    <script src="/assets/js/dropdown.js"></script>
+"""
+
+
+def png(width, height, rng):
+    """A valid RGB PNG of noise, so it neither compresses away nor needs Pillow."""
+    raw = b"".join(b"\0" + rng.randbytes(width * 3) for _ in range(height))
+
+    def chunk(kind, data):
+        return (struct.pack(">I", len(data)) + kind + data
+                + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF))
+
+    return (b"\x89PNG\r\n\x1a\n"
+            + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(raw, 1))
+            + chunk(b"IEND", b""))
+
+
+def image_table():
+    """The (old URL, new path) pairs from update-image-paths.py."""
+    tree = ast.parse((REPO / "update-image-paths.py").read_text())
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(getattr(t, "id", "") == "replacements"
+                                                for t in node.targets):
+            return ast.literal_eval(node.value)
+    return []
+
+
+def sentence(rng, n):
+    return " ".join(rng.choice(WORDS) for _ in range(n)).capitalize() + "."
+
+
+def page(rng, title, images, favicon, extra=""):
+    head = ['<!DOCTYPE html>', '<html lang="en">', '<head>',
+            '    <meta charset="UTF-8">',
+            '    <meta name="viewport" content="width=device-width, initial-scale=1.0">',
+            f'    <title>{title} - Demarest Nature Center</title>',
+            f'    <meta name="description" content="{sentence(rng, 12)}">',
+            '    <link rel="stylesheet" href="/assets/css/main.css">',
+            '    <link rel="stylesheet" href="/assets/css/dropdown.css">']
+    if favicon:
+        head.append('    <link rel="icon" type="image/png" href="/assets/images/favicon.png">')
+    head.append('</head>')
+    body = ['<body>', NAV, '    <main>', '        <section class="page-hero">',
+            f'            <h1>{title}</h1>', '        </section>',
+            '        <section class="content"><div class="container">']
+    for _ in range(rng.randint(4, 12)):
+        body.append(f'            <p>{sentence(rng, rng.randint(20, 60))} '
+                    f'See <a href="/{rng.choice(SECTIONS)}/">more</a>.</p>')
+        if images and rng.random() < 0.5:
+            src = rng.choice(images)
+            body.append(f'            <img src="/{src}" alt="{sentence(rng, 4)}">')
+    body.append(extra)
+    body += ['        </div></section>', '    </main>', FOOTER, '</body>', '</html>', '']
+    return "\n".join(head + body)
+
+
+def generate(out, pages=10000, images=5000, photos=2000, seed=1):
+    """Write the synthetic site into `out`; returns {kind: file count}."""
+    rng = random.Random(seed)
+    out = Path(out)
+    out.mkdir(parents=True, exist_ok=True)
+
+    image_paths = []
+    for i in range(images):
+        rel = f"assets/images/gen/{i // 500:02d}/img-{i:05d}.png"
+        path = out / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(png(rng.randint(24, 48), rng.randint(24, 48), rng))
+        image_paths.append(rel)
+    for rel in ("assets/images/logo.png", "assets/images/favicon.png"):
+        (out / rel).parent.mkdir(parents=True, exist_ok=True)
+        (out / rel).write_bytes(png(32, 32, rng))
+
+    for i in range(pages):
+        section = SECTIONS[i % len(SECTIONS)]
+        rel = f"{section}/index.html" if i < len(SECTIONS) else f"{section}/page-{i:05d}.html"
+        path = out / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        title = " ".join(rng.choice(WORDS) for _ in range(3)).title()
+        path.write_text(page(rng, title, image_paths, favicon=rng.random() < 0.5))
+    (out / "index.html").write_text(page(rng, "Home", image_paths, favicon=True))
+
+    table = image_table()
+    for i, rel in enumerate(IMAGE_PAGES):
+        urls = table[i::len(IMAGE_PAGES)] or table
+        extra = "\n".join(f'            <img src="{old}" alt="guide">' for old, _new in urls)
+        path = out / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(page(rng, "EcoExplorer", image_paths, favicon=True, extra=extra))
+
+    contest = out / "photocontest" / "2026"
+    contest.mkdir(parents=True, exist_ok=True)
+    for i in range(photos):
+        title = "_".join(rng.choice(WORDS) for _ in range(rng.randint(1, 3)))
+        name = f"{title}_{i:05d}-{rng.choice(NAMES)}.png"
+        (contest / name).write_bytes(png(rng.randint(48, 96), rng.randint(32, 64), rng))
+
+    return {"pages": pages + 1 + len(IMAGE_PAGES), "images": images + 2, "photos": photos}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic site for benchmarks.")
+    parser.add_argument("out", help="directory to create (must not exist)")
+    parser.add_argument("--pages", type=int, default=10000, help="HTML pages (default: 10000)")
+    parser.add_argument("--images", type=int, default=5000, help="site images (default: 5000)")
+    parser.add_argument("--photos", type=int, default=2000, help="contest photos (default: 2000)")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    if os.path.exists(args.out):
+        print(f"✗ {args.out} already exists")
+        return 1
+    counts = generate(args.out, args.pages, args.images, args.photos, args.seed)
+    print(f"✓ Generated {args.out}: " + ", ".join(f"{n:,} {kind}" for kind, n in counts.items()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
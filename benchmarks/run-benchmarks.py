@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Benchmark the maintenance scripts against a synthetic site.
+
+Generates a site with generate-site.py (or reuses --site), then runs each
+benchmark on a fresh copy of it. Each script runs as its own process, so
+wall time, CPU time and peak RSS (from wait4's rusage) cover the whole run
+including interpreter start-up and any worker pool. Throughput is the
+benchmark's input files and bytes divided by wall time.
+
+Results are written as JSON. With --compare, each benchmark is also
+checked against an earlier results file; the run exits 1 if any got slower
+than --threshold.
+
+    python3 benchmarks/run-benchmarks.py --out results.json
+    python3 benchmarks/run-benchmarks.py --pages 2000 --images 1000 --photos 400 --only navigation
+    python3 benchmarks/run-benchmarks.py --compare results.json --out new.json
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+REPO = HERE.parent
+PYTHON = sys.executable
+RESULTS_VERSION = 1
+
+
+def load_generator():
+    spec = importlib.util.spec_from_file_location("generate_site", HERE / "generate-site.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def script(name, *args):
+    return [PYTHON, str(REPO / name), *args]
+
+
+# name -> (setup commands, timed command, which files it reads). Commands
+# run with the site copy as the working directory; "{site}" is replaced by
+# its path.
+BENCHMARKS = {
+    "navigation": ([], script("update-navigation.py", "--root", "{site}"), "html"),
+    "mission-links": ([], script("update-mission-policies-links.py"), "html"),
+    "favicon": ([], script("add-favicon.py"), "html"),
+    "rewrite-site": ([], script("rewrite-site.py", "--root", "{site}",
+                                "navigation", "mission-links", "favicon"), "html"),
+    "github-pages": ([], script("fix-github-pages-paths.py", "--root", "{site}"), "html"),
+    "root-paths": ([script("fix-github-pages-paths.py", "--root", "{site}")],
+                   script("revert-to-root-paths.py", "--root", "{site}"), "html"),
+    "image-paths": ([], script("update-image-paths.py"), "ecoexplorer"),
+    "build-manifest": ([], script("photocontest/build-manifest.py", "--root", "{site}",
+                                  "--no-derivatives"), "photos"),
+}
+
+
+def input_files(site, kind):
+    """(files, bytes) a benchmark reads."""
+    if kind == "photos":
+        paths = [p for p in (site / "photocontest" / "2026").iterdir() if p.is_file()]
+    elif kind == "ecoexplorer":
+        paths = list((site / "ecoexplorer").glob("*.html"))
+    else:
+        paths = list(site.rglob("*.html"))
+    return len(paths), sum(p.stat().st_size for p in paths)
+
+
+def measure(command, cwd):
+    """Run `command`; return (exit code, wall s, cpu s, peak RSS in KiB)."""
+    started = time.perf_counter()
+    proc = subprocess.Popen(command, cwd=cwd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    _pid, status, usage = os.wait4(proc.pid, 0)
+    wall = time.perf_counter() - started
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    stderr = proc.stderr.read().decode(errors="replace")
+    proc.stderr.close()
+    if proc.returncode:
+        print(stderr, file=sys.stderr)
+    # ru_maxrss is KiB on Linux, bytes on macOS; covers the largest child
+    # (worker pools included) as well as the process itself.
+    rss = usage.ru_maxrss // 1024 if sys.platform == "darwin" else usage.ru_maxrss
+    return proc.returncode, wall, usage.ru_utime + usage.ru_stime, rss
+
+
+def run_benchmark(name, pristine, scratch, repeat):
+    setup, command, kind = BENCHMARKS[name]
+    runs = []
+    for _ in range(repeat):
+        site = scratch / name
+        if site.exists():
+            shutil.rmtree(site)
+        shutil.copytree(pristine, site, symlinks=True)
+        for step in setup:
+            subprocess.run([arg.replace("{site}", str(site)) for arg in step],
+                           cwd=site, check=True, stdout=subprocess.DEVNULL)
+        files, size = input_files(site, kind)
+        code, wall, cpu, rss = measure([arg.replace("{site}", str(site)) for arg in command], site)
+        runs.append((wall, cpu, rss, code))
+        shutil.rmtree(site)
+    # Best of N: the least disturbed run.
+    wall, cpu, rss, code = min(runs)
+    return {
+        "name": name,
+        "exit": code,
+        "files": files,
+        "bytes": size,
+        "wall_s": round(wall, 4),
+        "cpu_s": round(cpu, 4),
+        "files_per_s": round(files / wall, 1),
+        "bytes_per_s": round(size / wall),
+        "peak_rss_kb": max(r[2] for r in runs),
+        "runs": [round(r[0], 4) for r in runs],
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def compare(results, baseline, threshold):
+    """Print changes against `baseline`; return the names that regressed."""
+    before = {r["name"]: r for r in baseline.get("results", [])}
+    regressed = []
+    print(f"\nCompared with {baseline.get('commit') or 'baseline'}:")
+    for r in results:
+        old = before.get(r["name"])
+        if not old:
+            print(f"  {r['name']:16s} (new)")
+            continue
+        change = r["wall_s"] / old["wall_s"] - 1 if old["wall_s"] else 0.0
+        rss_change = r["peak_rss_kb"] / old["peak_rss_kb"] - 1 if old["peak_rss_kb"] else 0.0
+        mark = "✗" if change > threshold else "✓"
+        print(f"  {mark} {r['name']:16s} wall {change:+7.1%}   peak RSS {rss_change:+7.1%}")
+        if change > threshold:
+            regressed.append(r["name"])
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the site maintenance scripts.")
+    parser.add_argument("--site", help="reuse this generated site instead of generating one")
+    parser.add_argument("--pages", type=int, default=10000)
+    parser.add_argument("--images", type=int, default=5000)
+    parser.add_argument("--photos", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--only", action="append", choices=sorted(BENCHMARKS),
+                        help="run just this benchmark (repeatable)")
+    parser.add_argument("--repeat", type=int, default=1, help="runs per benchmark; the best is kept")
+    parser.add_argument("--out", help="write results JSON here")
+    parser.add_argument("--compare", metavar="JSON", help="earlier results to compare with")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="wall-time increase that counts as a regression (default: 0.10)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="dnc-bench-") as tmp:
+        scratch = Path(tmp)
+        if args.site:
+            pristine = Path(args.site).resolve()
+            scale = None
+        else:
+            pristine = scratch / "pristine"
+            started = time.perf_counter()
+            scale = load_generator().generate(pristine, args.pages, args.images,
+                                              args.photos, args.seed)
+            print(f"Generated {', '.join(f'{n:,} {k}' for k, n in scale.items())} "
+                  f"in {time.perf_counter() - started:.1f}s")
+
+        results = []
+        print(f"{'benchmark':16s} {'files':>7s} {'wall s':>8s} {'cpu s':>8s} "
+              f"{'files/s':>9s} {'MB/s':>7s} {'RSS MB':>7s}")
+        for name in args.only or BENCHMARKS:
+            r = run_benchmark(name, pristine, scratch, args.repeat)
+            results.append(r)
+            flag = "" if r["exit"] == 0 else f"  ✗ exit {r['exit']}"
+            print(f"{name:16s} {r['files']:7,d} {r['wall_s']:8.2f} {r['cpu_s']:8.2f} "
+                  f"{r['files_per_s']:9,.0f} {r['bytes_per_s'] / 1e6:7.1f} "
+                  f"{r['peak_rss_kb'] / 1024:7.1f}{flag}")
+
+    report = {
+        "version": RESULTS_VERSION,
+        "commit": git_commit(),
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "scale": scale or {"site": str(args.site)},
+        "seed": args.seed,
+        "results": results,
+    }
+    if args.out:
+        Path(args.out).write_text(json.dumps(report, indent=2) + "\n")
+        print(f"\nWrote {args.out}")
+
+    failed = [r["name"] for r in results if r["exit"] != 0]
+    regressed = []
+    if args.compare:
+        regressed = compare(results, json.loads(Path(args.compare).read_text()), args.threshold)
+    return 1 if failed or regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
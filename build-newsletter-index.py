@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Build the paginated JSON index of the newsletter archive in assets/newsletters.
+
+Each PDF's file name is parsed into season, year, volume/number and kind
+(see parse()), and its page count, size and whether it is linearized are
+read from its header, trailer and cross-reference table - tens of
+kilobytes per file, however large (see sitetools/pdf.py). Newest first,
+the entries are split into pages of --page-size:
+
+    assets/newsletters/index/index.json          page list (revalidated)
+    assets/newsletters/index/page-<n>.<hash>.json
+        [{"file", "title", "season", "year", "volume", "number", "kind",
+          "pages", "bytes", "linearized"}, ...]
+
+Page names carry a content hash, so browsers cache them forever and the
+newsletter page fetches only the pages it shows. `file` is relative to the
+index's `base`.
+
+PDFs that are not linearized ("fast web view") are listed: a browser has
+to download all of one before showing page one, where a linearized file
+shows it after the first Range request. --linearize rewrites them with
+`qpdf --linearize` when qpdf is installed.
+
+    python3 build-newsletter-index.py
+    python3 build-newsletter-index.py --linearize
+"""
+
+import argparse
+import hashlib
+import os
+import posixpath
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from sitetools import instrument, pdf
+from sitetools.files import write_if_changed
+from sitetools.gallery import dumps
+
+NEWSLETTER_DIR = "assets/newsletters"
+OUT_DIR = "assets/newsletters/index"
+INDEX_NAME = "index.json"
+PAGE_NAME = re.compile(r"^page-\d+\.[0-9a-f]{12}\.json$")
+PAGE_SIZE = 12
+# Issues within a year, oldest first: the winter issue comes out in January.
+SEASONS = ["winter", "spring", "summer", "fall"]
+SEASON = re.compile(r"(winter|spring|summer|fall|autumn)", re.I)
+YEAR = re.compile(r"(?<!\d)((?:19|20)\d\d)(?!\d)")
+VOLUME = re.compile(r"vol\.?\s*(\d+)(?:\W*no\.?\s*(\d+))?", re.I)
+INSERTS = re.compile(r"(?<![a-z])inserts(?![a-z])", re.I)
+WITH_INSERT = re.compile(r"(?<![a-z])insert(?![a-z])", re.I)
+
+
+def parse(stem):
+    """Season, year, volume, number and kind from a newsletter file stem.
+
+        DNCA-Winter-Newsletter-2021       -> Winter 2021
+        DNCNewsletterWinter2014           -> Winter 2014
+        DNCnews.vol30no2.2005             -> Vol. 30 No. 2, 2005
+        DNCnews.vol32no1.2008.inserts     -> Vol. 32 No. 1, 2008 Inserts
+        dnca-spring2006-calendar          -> Spring 2006 Calendar
+
+    Anything not found is None; the title falls back to the stem.
+    """
+    season = SEASON.search(stem)
+    season = season.group(1).lower().replace("autumn", "fall") if season else None
+    year = YEAR.search(stem)
+    year = int(year.group(1)) if year else None
+    volume = VOLUME.search(stem)
+    number = int(volume.group(2)) if volume and volume.group(2) else None
+    volume = int(volume.group(1)) if volume else None
+    kind = "calendar" if "calendar" in stem.lower() else "newsletter"
+
+    if season and year:
+        title = f"{season.title()} {year}"
+    elif volume:
+        title = f"Vol. {volume}" + (f" No. {number}" if number else "") + (f", {year}" if year else "")
+    elif year:
+        title = str(year)
+    else:
+        title = re.sub(r"[_\-.]+", " ", stem).strip()
+    if kind == "calendar":
+        title += " Calendar"
+    if INSERTS.search(stem):
+        title += " Inserts"
+    elif WITH_INSERT.search(stem):
+        title += " (with Insert)"
+    if "proof" in stem.lower():
+        title += " (Proof)"
+    return {"title": title, "season": season, "year": year, "volume": volume,
+            "number": number, "kind": kind}
+
+
+def sort_key(entry):
+    return (entry["year"] or 0,
+            SEASONS.index(entry["season"]) if entry["season"] else -1,
+            entry["volume"] or 0, entry["number"] or 0,
+            entry["kind"] == "newsletter", entry["file"].lower())
+
+
+def linearize(path):
+    """Rewrite `path` in place with `qpdf --linearize`. Returns an error or ''."""
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-", suffix=".pdf")
+    os.close(fd)
+    try:
+        result = subprocess.run(["qpdf", "--linearize", str(path), tmp],
+                                capture_output=True, text=True)
+        # Exit status 3: succeeded with warnings.
+        if result.returncode not in (0, 3):
+            return result.stderr.strip() or f"qpdf exited with {result.returncode}"
+        os.replace(tmp, path)
+        return ""
+    finally:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+
+
+def write_index(out_dir, base, entries, page_size):
+    """Write the entry pages and index.json into `out_dir`; delete stale pages.
+
+    Returns (index, files written).
+    """
+    out_dir.mkdir(parents=True, exist_ok=True)
+    index = {"base": base, "count": len(entries), "page_size": page_size, "pages": []}
+    written = 0
+    for start in range(0, len(entries), page_size):
+        chunk = entries[start:start + page_size]
+        text = dumps(chunk)
+        name = f"page-{start // page_size + 1}.{hashlib.sha256(text.encode()).hexdigest()[:12]}.json"
+        written += write_if_changed(out_dir / name, text)
+        years = [e["year"] for e in chunk if e["year"]]
+        index["pages"].append({"file": name, "count": len(chunk),
+                               "newest": max(years, default=None),
+                               "oldest": min(years, default=None)})
+    written += write_if_changed(out_dir / INDEX_NAME, dumps(index))
+
+    current = {page["file"] for page in index["pages"]}
+    for old in out_dir.iterdir():
+        if PAGE_NAME.match(old.name) and old.name not in current:
+            old.unlink()
+    return index, written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the newsletter archive index.")
+    parser.add_argument("--root", default=".", help="site root (default: current directory)")
+    parser.add_argument("--out", default=None, help=f"output directory (default: ROOT/{OUT_DIR})")
+    parser.add_argument("--page-size", type=int, default=PAGE_SIZE,
+                        help=f"newsletters per index page (default: {PAGE_SIZE})")
+    parser.add_argument("--linearize", action="store_true",
+                        help="rewrite PDFs that are not linearized with qpdf --linearize")
+    args = parser.parse_args()
+
+    instrument.start(__file__)
+    root = Path(args.root)
+    folder = root / NEWSLETTER_DIR
+    out_dir = Path(args.out) if args.out else root / OUT_DIR
+    if not folder.is_dir():
+        print(f"✗ {folder} not found")
+        return 1
+    if args.linearize and not shutil.which("qpdf"):
+        print("qpdf is not installed; not linearizing (apt install qpdf)")
+        args.linearize = False
+
+    entries = []
+    errors = 0
+    with instrument.stage("read"):
+        for path in sorted(folder.glob("*.pdf"), key=lambda p: p.name.lower()):
+            try:
+                info = pdf.info(path)
+                if args.linearize and not info.linearized:
+                    error = linearize(path)
+                    if error:
+                        print(f"  ✗ {path.name}: qpdf: {error}")
+                    else:
+                        print(f"  ✓ linearized {path.name} ({info.bytes:,} -> "
+                              f"{path.stat().st_size:,} bytes)")
+                        info = pdf.info(path)
+            except (OSError, pdf.PdfError) as e:
+                print(f"  ✗ {path.name}: {e}")
+                errors += 1
+                continue
+            instrument.count("files.scanned")
+            instrument.count("bytes.read", info.bytes_read)
+            entries.append({"file": path.name, **parse(path.stem), "pages": info.pages,
+                            "bytes": info.bytes, "linearized": info.linearized})
+    entries.sort(key=sort_key, reverse=True)
+
+    base = posixpath.relpath(folder.resolve().as_posix(), out_dir.resolve().as_posix()) + "/"
+    with instrument.stage("write"):
+        index, written = write_index(out_dir, base, entries, args.page_size)
+    instrument.count("files.written", written)
+
+    for e in entries:
+        flag = "" if e["linearized"] else "  (not linearized)"
+        pages = f"{e['pages']} page" + ("s" if e["pages"] != 1 else "")
+        print(f"  {e['file']:45s} -> {e['title']!r}, {pages}, {e['bytes']:,} bytes{flag}")
+    slow = [e for e in entries if not e["linearized"]]
+    if slow:
+        print(f"\n{len(slow)} of {len(entries)} PDFs are not linearized; page one waits for the "
+              f"whole file ({sum(e['bytes'] for e in slow):,} bytes). Fix with --linearize.")
+    print(f"\nIndexed {len(entries)} newsletters ({errors} unreadable) in "
+          f"{len(index['pages'])} pages; updated {written} files in {out_dir}")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
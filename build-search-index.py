@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+"""
+Build the static full-text search index for the site.
+
+Every page is streamed through an HTML parser that keeps its visible text
+(and image alt text) and drops the boilerplate every page repeats
+(header, nav, footer) along with scripts, styles and SVG. Pages marked
+<meta name="robots" content="noindex"> (the redirect stubs) are skipped. With --pdfs, the
+newsletters in assets/newsletters are indexed too, using `pdftotext`
+(poppler-utils) when it is installed.
+
+The index is an inverted index split into shards by the first
+PREFIX_LENGTH characters of each term:
+
+    assets/search/meta.json           shard list and settings (revalidated)
+    assets/search/docs.<hash>.json    [[url, title, description], ...]
+    assets/search/<prefix>.<hash>.json
+        {"term": [gap, weight, gap, weight, ...], ...}
+
+Postings are sorted by document number and delta-encoded: each gap is
+the distance from the previous document, and the weight is how often the
+term occurs, with the title and description counting extra. Shard names
+carry a content hash, so browsers cache them forever and a query only
+fetches the shards for its terms' prefixes. assets/js/search.js does the
+lookup.
+
+Extracted text is cached in .cache/search-index.json by content hash, so
+a re-run only re-parses changed pages and PDFs, and only shards whose
+content changed are rewritten.
+
+    python3 build-search-index.py
+    python3 build-search-index.py --pdfs
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import time
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from html.parser import HTMLParser
+from pathlib import Path
+
+from sitetools import instrument
+from sitetools.files import SKIP_DIRS, sha256_file, write_if_changed
+from sitetools.html import site_path
+
+CACHE_VERSION = 1
+INDEX_VERSION = 1
+PREFIX_LENGTH = 1
+OUT_DIR = "assets/search"
+NEWSLETTER_DIR = "assets/newsletters"
+# Not site pages: tooling, the vendored research app, build output.
+EXCLUDE_DIRS = {"__pycache__", "tests", "scripts", "context", "benchmarks", "research", "dist"}
+EXCLUDE_PAGES = {"404.html"}
+# Elements whose text is never indexed.
+SKIP_TAGS = {"header", "nav", "footer", "script", "style", "noscript", "template", "svg"}
+BLOCK_TAGS = {"p", "div", "section", "article", "li", "td", "th", "br", "h1", "h2", "h3",
+              "h4", "h5", "h6", "blockquote", "figcaption", "dt", "dd", "option"}
+TITLE_SUFFIX = re.compile(r"\s*[-|–]\s*Demarest Nature Center\s*$", re.I)
+WORD = re.compile(r"[a-z0-9]+")
+STOPWORDS = set("""
+a an and are as at be but by for from has have in is it its of on or that the this
+to was were will with you your our we us not can all any if into more so than then
+there these they their them what when where which who how also been do does
+""".split())
+# Extra weight for a term in the title / description.
+TITLE_WEIGHT = 5
+DESCRIPTION_WEIGHT = 2
+DESCRIPTION_CHARS = 160
+READ_CHUNK = 64 * 1024
+
+
+class TextExtractor(HTMLParser):
+    """Collects <title>, the meta description and visible body text."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title = []
+        self.description = ""
+        self.text = []
+        self.noindex = False
+        self._skip = []        # stack of open SKIP_TAGS
+        self._in_title = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "meta":
+            attrs = dict(attrs)
+            name = (attrs.get("name") or "").lower()
+            if name == "description":
+                self.description = attrs.get("content") or ""
+            elif name == "robots" and "noindex" in (attrs.get("content") or "").lower():
+                self.noindex = True
+        elif tag == "title":
+            self._in_title = True
+        elif tag in SKIP_TAGS:
+            self._skip.append(tag)
+        elif tag == "img" and not self._skip:
+            alt = dict(attrs).get("alt")
+            if alt:
+                self.text.append(f" {alt} ")
+        if tag in BLOCK_TAGS:
+            self.text.append("\n")
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag in SKIP_TAGS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if tag == "title":
+            self._in_title = False
+        elif tag in SKIP_TAGS and tag in self._skip:
+            # Close up to the matching tag, tolerating unclosed children.
+            while self._skip and self._skip.pop() != tag:
+                pass
+        if tag in BLOCK_TAGS:
+            self.text.append("\n")
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title.append(data)
+        elif not self._skip:
+            self.text.append(data)
+
+
+def tokens(text):
+    """Lower-cased, accent-folded index terms in `text`."""
+    text = unicodedata.normalize("NFKD", text.lower())
+    # Every mark (\p{M}), as search.js strips them from queries.
+    text = "".join(c for c in text if not unicodedata.category(c).startswith("M"))
+    return [w for w in WORD.findall(text) if len(w) > 1 and w not in STOPWORDS]
+
+
+def weigh(title, description, body):
+    """{term: weight} for one document."""
+    weights = {}
+    for text, weight in ((title, TITLE_WEIGHT), (description, DESCRIPTION_WEIGHT), (body, 1)):
+        for term in tokens(text):
+            weights[term] = weights.get(term, 0) + weight
+    return weights
+
+
+def summary(text):
+    text = " ".join(text.split())
+    if len(text) <= DESCRIPTION_CHARS:
+        return text
+    return text[:DESCRIPTION_CHARS].rsplit(" ", 1)[0] + "…"
+
+
+def parse_page(path):
+    """(title, description, terms), or None for a noindex page."""
+    parser = TextExtractor()
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for chunk in iter(lambda: f.read(READ_CHUNK), ""):
+            parser.feed(chunk)
+    parser.close()
+    if parser.noindex:
+        return None
+    title = TITLE_SUFFIX.sub("", " ".join("".join(parser.title).split()))
+    body = "".join(parser.text)
+    description = " ".join(parser.description.split()) or summary(body)
+    return title, description, weigh(title, description, body)
+
+
+def pdf_title(path):
+    """"DNC-Newsletter-Spring-2019.pdf" -> "DNC Newsletter Spring 2019"."""
+    return " ".join(re.sub(r"[-_.]+", " ", Path(path).stem).split())
+
+
+def parse_pdf(path):
+    """(title, description, terms) from `pdftotext` output."""
+    result = subprocess.run(["pdftotext", "-q", "-enc", "UTF-8", str(path), "-"],
+                            capture_output=True, timeout=120)
+    body = result.stdout.decode("utf-8", errors="replace")
+    title = pdf_title(path)
+    description = summary(body)
+    return title, description, weigh(title, "", body)
+
+
+def url_for(path):
+    """Site-root-relative URL of a document: "about/", "assets/x.pdf"."""
+    if path == "index.html":
+        return ""
+    if path.endswith("/index.html"):
+        return path[:-len("index.html")]
+    return path
+
+
+# -- Sources --------------------------------------------------------------
+
+def iter_pages(root):
+    for dirpath, dirs, names in os.walk(root):
+        top = dirpath == root
+        dirs[:] = sorted(d for d in dirs if not d.startswith(".") and d not in SKIP_DIRS
+                         and not (top and d in EXCLUDE_DIRS))
+        for name in sorted(names):
+            if name.endswith(".html") and not (top and name in EXCLUDE_PAGES):
+                yield site_path(os.path.join(dirpath, name), root)
+
+
+def iter_pdfs(root):
+    folder = Path(root, NEWSLETTER_DIR)
+    if folder.is_dir():
+        for path in sorted(folder.iterdir()):
+            if path.suffix.lower() == ".pdf":
+                yield site_path(str(path), root)
+
+
+# -- Incremental extraction -------------------------------------------------
+
+def load_cache(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            cache = json.load(f)
+        if cache.get("version") == CACHE_VERSION:
+            return cache["files"]
+    except (OSError, ValueError, KeyError):
+        pass
+    return {}
+
+
+def save_cache(path, entries):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"version": CACHE_VERSION, "files": entries}, f, separators=(",", ":"))
+    os.replace(tmp, path)
+
+
+def extract(root, sources, cache_path, workers):
+    """{site path: cache entry} for `sources` ({site path: parser}).
+
+    Unchanged files (same size and mtime, or same content hash) reuse their
+    cached text; the rest are parsed on a thread pool, since pdftotext runs
+    as a subprocess and pages are small.
+    """
+    cache = load_cache(cache_path)
+    entries = {}
+    to_parse = []
+    for path in sources:
+        full = os.path.join(root, path)
+        st = os.stat(full)
+        cached = cache.get(path)
+        if cached and cached["size"] == st.st_size and cached["mtime_ns"] == st.st_mtime_ns:
+            entries[path] = cached
+            continue
+        digest = sha256_file(full)
+        if cached and cached["sha256"] == digest:
+            cached["mtime_ns"] = st.st_mtime_ns
+            entries[path] = cached
+            continue
+        to_parse.append((path, st, digest))
+
+    def parse(job):
+        path, _st, _digest = job
+        return sources[path](os.path.join(root, path))
+
+    with ThreadPoolExecutor(workers) as pool:
+        for (path, st, digest), parsed in zip(to_parse, pool.map(parse, to_parse)):
+            entry = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": digest,
+                     "noindex": parsed is None}
+            if parsed:
+                entry["title"], entry["description"], entry["terms"] = parsed
+            entries[path] = entry
+    if to_parse or set(cache) - set(entries):
+        save_cache(cache_path, entries)
+    return entries, len(to_parse)
+
+
+# -- Index ----------------------------------------------------------------
+
+def build_index(entries, prefix_length=PREFIX_LENGTH):
+    """(docs, {prefix: {term: postings}}) from the extracted documents."""
+    docs = []
+    postings = {}
+    for path in sorted(entries):
+        entry = entries[path]
+        if entry["noindex"] or not entry["terms"]:
+            continue
+        doc = len(docs)
+        docs.append([url_for(path), entry["title"] or path, entry["description"]])
+        for term, weight in entry["terms"].items():
+            postings.setdefault(term, []).append((doc, weight))
+
+    shards = {}
+    for term in sorted(postings):
+        flat = []
+        previous = 0
+        for doc, weight in postings[term]:
+            flat += [doc - previous, weight]
+            previous = doc
+        shards.setdefault(term[:prefix_length], {})[term] = flat
+    return docs, shards
+
+
+def dumps(data):
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+
+
+def hashed_name(stem, text):
+    return f"{stem}.{hashlib.sha256(text.encode()).hexdigest()[:12]}.json"
+
+
+def write_index(out_dir, docs, shards, prefix_length):
+    """Write the docs list, shards and meta.json; delete stale shards.
+
+    Returns (files written, total bytes).
+    """
+    out_dir.mkdir(parents=True, exist_ok=True)
+    written = 0
+    total = 0
+    files = {}
+
+    def put(stem, data):
+        nonlocal written, total
+        text = dumps(data)
+        name = hashed_name(stem, text)
+        written += write_if_changed(out_dir / name, text)
+        total += len(text.encode())
+        files[name] = True
+        return name
+
+    meta = {
+        "version": INDEX_VERSION,
+        "prefix": prefix_length,
+        "docs": put("docs", docs),
+        "shards": {prefix: put(prefix, terms) for prefix, terms in sorted(shards.items())},
+    }
+    text = json.dumps(meta, indent=1, ensure_ascii=False) + "\n"
+    written += write_if_changed(out_dir / "meta.json", text)
+    total += len(text.encode())
+    for old in out_dir.glob("*.json"):
+        if old.name != "meta.json" and old.name not in files:
+            old.unlink()
+    return written, total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the static site search index.")
+    parser.add_argument("--root", default=".", help="site root (default: current directory)")
+    parser.add_argument("--out", default=None, help=f"output directory (default: ROOT/{OUT_DIR})")
+    parser.add_argument("--pdfs", action="store_true",
+                        help=f"also index the PDFs in {NEWSLETTER_DIR} (needs pdftotext)")
+    parser.add_argument("--prefix-length", type=int, default=PREFIX_LENGTH,
+                        help=f"shard terms by this many leading characters (default: {PREFIX_LENGTH})")
+    parser.add_argument("--cache", default=".cache/search-index.json")
+    parser.add_argument("--workers", type=int, default=8, help="parser threads (default: 8)")
+    args = parser.parse_args()
+
+    instrument.start(__file__)
+    started = time.perf_counter()
+    root = os.path.abspath(args.root)
+    out_dir = Path(args.out) if args.out else Path(root, OUT_DIR)
+    with instrument.stage("walk"):
+        sources = {path: parse_page for path in iter_pages(root)}
+        if args.pdfs:
+            if shutil.which("pdftotext"):
+                sources.update((path, parse_pdf) for path in iter_pdfs(root))
+            else:
+                print("pdftotext is not installed; skipping PDFs (apt install poppler-utils)")
+
+    with instrument.stage("extract"):
+        entries, parsed = extract(root, sources, args.cache, args.workers)
+    instrument.count("files.scanned", len(entries))
+    instrument.count("files.parsed", parsed)
+    with instrument.stage("index"):
+        docs, shards = build_index(entries, args.prefix_length)
+    with instrument.stage("write"):
+        written, total = write_index(out_dir, docs, shards, args.prefix_length)
+    instrument.count("files.written", written)
+    terms = sum(len(terms) for terms in shards.values())
+    print(f"Indexed {len(docs)} documents ({parsed} re-parsed), {terms:,} terms "
+          f"in {len(shards)} shards, {total:,} bytes")
+    print(f"Updated {written} files in {out_dir} in {time.perf_counter() - started:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Render the site into an output directory for a given deploy base path.
+
+Replaces flipping the sources back and forth with fix-github-pages-paths.py
+and revert-to-root-paths.py: the sources keep their root-relative URLs and
+are never modified. HTML, CSS and JS are rendered into --out with their
+URLs re-rooted on --base-path (see sitetools/basepath.py); every other file
+is hardlinked into --out (or reflinked/copied when the output is on another
+filesystem), so building the whole tree mostly costs directory entries.
+
+Pages also get resource hints (preconnects and a hero image preload), and
+the build gets a service worker, sw.js, that precaches the core shell by
+content hash; see sitetools/offline.py. --no-service-worker leaves it out
+and removes it from --out. Rendered pages are then minified (see
+minify_html() in sitetools/minify.py) unless --no-minify-html is given.
+
+Builds are incremental: --out/.build-state.json records the size and mtime
+each output was built from, so a re-run renders and links only what changed
+and removes outputs whose source was deleted or is now in an --exclude-list.
+Changing --base-path or either --no-* option rebuilds every rendered file.
+
+Because binaries are hardlinks, anything post-processing --out must replace
+files (write a temp file and rename) rather than write into them;
+optimize-images.py and precompress.py already do.
+
+    python3 build-site.py                                  # custom domain, into dist/
+    python3 build-site.py --base-path /dncweb --out pages  # GitHub Pages project site
+"""
+
+import argparse
+import errno
+import fcntl
+import json
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from sitetools import instrument, offline
+from sitetools.basepath import KINDS, BasePath
+from sitetools.files import SKIP_DIRS
+from sitetools.minify import minify_html
+from sitetools.rules import BASE_PATH
+
+STATE_FILE = ".build-state.json"
+STATE_VERSION = 3
+# Repo tooling that is not part of the published site.
+EXCLUDE_DIRS = {"__pycache__", "tests", "scripts", "context", "benchmarks", "sitetools"}
+EXCLUDE_SUFFIXES = (".py", ".pyc", ".sh", ".md", ".jsonl")
+EXCLUDE_FILES = {"package.json", "package-lock.json", "playwright.config.js", "budgets.json",
+                 "google-apps-script-newsletter.js", "validate-images.js"}
+MIN_FILES_FOR_POOL = 64
+
+FICLONE = 0x40049409   # linux/fs.h: _IOW(0x94, 9, int)
+
+
+def iter_sources(root, out):
+    """Yield site-relative paths of every file that belongs in the build."""
+    out = out.resolve()
+    for dirpath, dirs, names in os.walk(root):
+        dirs[:] = sorted(
+            d for d in dirs
+            if not d.startswith(".") and d not in SKIP_DIRS
+            and not (dirpath == str(root) and d in EXCLUDE_DIRS)
+            and Path(dirpath, d).resolve() != out
+            and not (Path(dirpath, d) / STATE_FILE).exists()   # another build's output
+        )
+        for name in sorted(names):
+            if name.startswith(".") or name.endswith(EXCLUDE_SUFFIXES):
+                continue
+            if dirpath == str(root) and name in EXCLUDE_FILES:
+                continue
+            yield Path(dirpath, name).relative_to(root).as_posix()
+
+
+def render(job):
+    """Worker: render one text file.
+
+    Returns (rel, hints added, bytes before and after minifying, error).
+    """
+    src, dest, rel, options = job
+    try:
+        with open(src, "rb") as f:
+            original = f.read()
+        text = original.decode("utf-8")
+        suffix = os.path.splitext(rel)[1]
+        hints = 0
+        page = suffix.lower() in (".html", ".htm")
+        if page:
+            text, hints = offline.add_hints(text, options["base_path"],
+                                           register=options["service_worker"])
+        text, _changed = BasePath(options["base_path"]).apply(text, suffix)
+        data = text.encode("utf-8")
+        sizes = (0, 0)
+        if page and options["minify_html"]:
+            minified = minify_html(text).encode("utf-8")
+            sizes = (len(data), len(minified))
+            data = minified
+        try:
+            with open(dest, "rb") as f:
+                if f.read() == data:
+                    return rel, hints, sizes, ""
+        except FileNotFoundError:
+            pass
+        tmp = dest + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, dest)
+        return rel, hints, sizes, ""
+    except (OSError, UnicodeDecodeError) as e:
+        return rel, 0, (0, 0), str(e)
+
+
+def link(src, dest):
+    """Hardlink src to dest, falling back to a reflink, then a copy.
+
+    Returns "link", "reflink" or "copy".
+    """
+    tmp = dest + ".tmp"
+    if os.path.lexists(tmp):
+        os.unlink(tmp)
+    try:
+        os.link(src, tmp)
+        os.replace(tmp, dest)
+        return "link"
+    except OSError as e:
+        if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK, errno.ENOTSUP):
+            raise
+    try:
+        with open(src, "rb") as fsrc, open(tmp, "wb") as fdst:
+            fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+        shutil.copystat(src, tmp)
+        os.replace(tmp, dest)
+        return "reflink"
+    except OSError:
+        shutil.copy2(src, tmp)
+        os.replace(tmp, dest)
+        return "copy"
+
+
+def load_state(out, options):
+    try:
+        state = json.loads((out / STATE_FILE).read_text())
+    except (OSError, ValueError):
+        return {}
+    if state.get("version") != STATE_VERSION:
+        return {}
+    files = state.get("files", {})
+    if state.get("options") != options:
+        # Links don't depend on the options; rendered files all do.
+        files = {rel: entry for rel, entry in files.items() if entry[2] != "render"}
+    return files
+
+
+def remove_empty_dirs(out, rel):
+    parent = (out / rel).parent
+    while parent != out:
+        try:
+            parent.rmdir()
+        except OSError:
+            break
+        parent = parent.parent
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render the site into an output directory.")
+    parser.add_argument("--root", default=str(Path(__file__).resolve().parent),
+                        help="source tree (default: the directory this script is in)")
+    parser.add_argument("--out", default=None, help="output directory (default: ROOT/dist)")
+    parser.add_argument("--base-path", default="",
+                        help=f'deploy base path, e.g. {BASE_PATH} (default: "", the domain root)')
+    parser.add_argument("--exclude-list", action="append", default=[], metavar="FILE",
+                        help="leave out the site paths listed in FILE, one per line "
+                             "(e.g. from prune-research-bundle.py --write-excludes)")
+    parser.add_argument("--no-service-worker", action="store_true",
+                        help="leave out sw.js and its registration")
+    parser.add_argument("--no-minify-html", action="store_true", help="leave pages unminified")
+    parser.add_argument("--clean", action="store_true", help="ignore the previous build state")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    instrument.start(__file__)
+    started = time.perf_counter()
+    root = Path(args.root).resolve()
+    out = Path(args.out).resolve() if args.out else root / "dist"
+    out.mkdir(parents=True, exist_ok=True)
+    base_path = args.base_path.rstrip("/")
+    service_worker = not args.no_service_worker
+    options = {"base_path": base_path, "service_worker": service_worker,
+               "minify_html": not args.no_minify_html}
+
+    excluded = set()
+    for name in args.exclude_list:
+        excluded.update(line.strip() for line in Path(name).read_text().splitlines() if line.strip())
+
+    previous = {} if args.clean else load_state(out, options)
+    state = {}
+    to_render = []
+    counts = {"render": 0, "link": 0, "reflink": 0, "copy": 0, "unchanged": 0, "removed": 0,
+              "hinted": 0, "minified": 0}
+    html_before = html_after = 0
+    errors = 0
+
+    with instrument.stage("walk+link"):   # binaries are linked as the walk finds them
+        for rel in iter_sources(root, out):
+            if rel in excluded:
+                continue   # and removed from --out below if an earlier build had it
+            src = root / rel
+            dest = out / rel
+            st = src.stat()
+            mode = "render" if Path(rel).suffix.lower() in KINDS else "link"
+            entry = [st.st_size, st.st_mtime_ns, mode]
+            state[rel] = entry
+            if previous.get(rel) == entry and dest.exists():
+                counts["unchanged"] += 1
+                continue
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            if mode == "render":
+                to_render.append((str(src), str(dest), rel, options))
+            else:
+                try:
+                    counts[link(str(src), str(dest))] += 1
+                except OSError as e:
+                    print(f"✗ {rel}: {e}")
+                    del state[rel]
+                    errors += 1
+
+    with instrument.stage("render"):
+        workers = args.workers or os.cpu_count() or 1
+        if workers == 1 or len(to_render) < MIN_FILES_FOR_POOL:
+            results = [render(job) for job in to_render]
+        else:
+            with ProcessPoolExecutor(workers) as pool:
+                results = list(pool.map(render, to_render, chunksize=8))
+    for rel, hints, (before, after), error in results:
+        if error:
+            print(f"✗ {rel}: {error}")
+            del state[rel]
+            errors += 1
+        else:
+            counts["render"] += 1
+            counts["hinted"] += hints > 0
+            counts["minified"] += before > 0
+            html_before += before
+            html_after += after
+
+    with instrument.stage("prune"):
+        for rel in sorted(set(previous) - set(state)):
+            try:
+                (out / rel).unlink()
+                counts["removed"] += 1
+            except FileNotFoundError:
+                pass
+            remove_empty_dirs(out, rel)
+
+    with instrument.stage("service-worker"):
+        sw = out / offline.SW_NAME
+        if service_worker:
+            precached, missing, changed = offline.write_service_worker(out, base_path)
+            if missing:
+                print(f"✗ Service worker shell files not in the build: {', '.join(missing)}")
+        elif sw.exists():
+            # A 404 for sw.js makes browsers unregister the installed worker.
+            sw.unlink()
+
+    instrument.count("files.scanned", len(state) + errors)
+    instrument.count("files.written", sum(counts[k] for k in ("render", "link", "reflink", "copy")))
+    instrument.count("files.skipped", counts["unchanged"])
+    instrument.count("files.removed", counts["removed"])
+    tmp = out / (STATE_FILE + ".tmp")
+    tmp.write_text(json.dumps({"version": STATE_VERSION, "options": options, "files": state},
+                              separators=(",", ":")))
+    os.replace(tmp, out / STATE_FILE)
+
+    print(f"Built {out} for base path {base_path or '/'} in {time.perf_counter() - started:.2f}s")
+    print(f"  rendered {counts['render']}, linked {counts['link']}, reflinked {counts['reflink']}, "
+          f"copied {counts['copy']}, unchanged {counts['unchanged']}, removed {counts['removed']}")
+    if counts["hinted"]:
+        print(f"  added resource hints to {counts['hinted']} pages")
+    if counts["minified"]:
+        print(f"  minified {counts['minified']} pages: {html_before:,} -> {html_after:,} bytes "
+              f"(saved {html_before - html_after:,}, {1 - html_after / html_before:.1%})")
+    if service_worker:
+        print(f"  {'wrote' if changed else 'kept'} {offline.SW_NAME} precaching {precached} files")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
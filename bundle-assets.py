@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Bundle each page's stylesheets and scripts into content-hashed files.
+
+For every HTML page, each run of adjacent local stylesheet links (or
+adjacent plain `<script src>` tags) is concatenated, minified and written to
+assets/bundles/<content hash>.css|.js, and the run is replaced by a single
+tag pointing at the bundle. Pages that load the same files share a bundle,
+and because the name changes whenever the content does, bundles can be
+served with a long-lived immutable Cache-Control.
+
+assets/bundles/bundles.json records which sources went into each bundle,
+so re-running after editing assets/css or assets/js rebuilds from the
+sources rather than from the previous bundle. Bundles no page uses any
+more are deleted.
+
+    python3 bundle-assets.py --root dist
+"""
+
+import argparse
+import hashlib
+import json
+import re
+import sys
+from pathlib import Path
+
+from sitetools import instrument
+from sitetools.files import iter_files
+from sitetools.minify import minify_css, minify_js
+
+BUNDLE_DIR = "assets/bundles"
+BUNDLE_INDEX = "bundles.json"
+
+TAG = re.compile(r"<link\b[^>]*>|<script\b[^>]*>\s*</script>", re.I)
+ATTR = re.compile(r"""([\w-]+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+)))?""")
+CSS_URL = re.compile(r"""url\(\s*(['"]?)([^'")]+)\1\s*\)""")
+
+
+def parse_attrs(tag):
+    body = re.match(r"<\w+\s*(.*?)\s*/?>", tag, re.S).group(1)
+    attrs = {}
+    for m in ATTR.finditer(body):
+        attrs[m.group(1).lower()] = next((g for g in m.groups()[1:] if g is not None), "")
+    return attrs
+
+
+class Bundler:
+    def __init__(self, root):
+        self.root = Path(root)
+        self.bundle_dir = self.root / BUNDLE_DIR
+        try:
+            self.index = json.loads((self.bundle_dir / BUNDLE_INDEX).read_text())
+        except (OSError, ValueError):
+            self.index = {}
+        self.used = {}
+        self.sources = {}
+
+    def local_file(self, href):
+        """The file a root-relative href points to, or None."""
+        if not href.startswith("/") or href.startswith("//"):
+            return None
+        path = self.root / href.split("?")[0].split("#")[0].lstrip("/")
+        return path if path.is_file() else None
+
+    def expand(self, href):
+        """Source hrefs behind `href`: itself, or a previous bundle's inputs."""
+        name = href.rsplit("/", 1)[-1]
+        if href.startswith(f"/{BUNDLE_DIR}/") and name in self.index:
+            return self.index[name]
+        return [href]
+
+    def classify(self, tag):
+        """Return ("css"|"js", href) for a bundleable tag, else None."""
+        attrs = parse_attrs(tag)
+        if tag[:5].lower() == "<link":
+            if (attrs.get("rel", "").lower() != "stylesheet"
+                    or attrs.get("media", "all") != "all"
+                    or set(attrs) - {"rel", "href", "type", "media"}):
+                return None
+            kind, href = "css", attrs.get("href", "")
+        else:
+            if set(attrs) != {"src"}:
+                return None   # async/defer/module/crossorigin scripts keep their own tags
+            kind, href = "js", attrs["src"]
+        if not all(self.local_file(h) for h in self.expand(href)):
+            return None
+        return kind, href
+
+    def read_source(self, href, kind):
+        text = self.local_file(href).read_text(encoding="utf-8")
+        if kind == "css":
+            # Bundles live in another directory; make relative url()s root-relative.
+            base = href.rsplit("/", 1)[0] + "/"
+
+            def rebase(m):
+                url = m.group(2)
+                if re.match(r"(?:[a-z]+:|/|#)", url, re.I):
+                    return m.group(0)
+                resolved = (Path(base) / url).as_posix()
+                while "/../" in resolved:
+                    resolved = re.sub(r"/[^/]+/\.\./", "/", resolved, count=1)
+                return f"url({m.group(1)}{resolved}{m.group(1)})"
+
+            return minify_css(CSS_URL.sub(rebase, text))
+        return minify_js(text)
+
+    def bundle(self, kind, hrefs):
+        """Write (or reuse) the bundle for `hrefs`; return its href."""
+        sources = [s for href in hrefs for s in self.expand(href)]
+        key = (kind, tuple(sources))
+        if key not in self.sources:
+            parts = [self.read_source(s, kind) for s in sources]
+            # A newline plus `;` keeps a script without a trailing semicolon
+            # from running into the next one.
+            text = ("\n" if kind == "css" else "\n;\n").join(parts) + "\n"
+            data = text.encode("utf-8")
+            name = f"{hashlib.sha256(data).hexdigest()[:12]}.{kind}"
+            path = self.bundle_dir / name
+            if not path.exists():
+                self.bundle_dir.mkdir(parents=True, exist_ok=True)
+                path.write_bytes(data)
+            self.used[name] = sources
+            self.sources[key] = f"/{BUNDLE_DIR}/{name}"
+        return self.sources[key]
+
+    def rewrite_page(self, text):
+        """Return the page with every run of bundleable tags collapsed."""
+        runs = []         # [(kind, [(match, href), ...])]
+        for m in TAG.finditer(text):
+            found = self.classify(m.group(0))
+            if not found:
+                runs.append((None, []))
+                continue
+            kind, href = found
+            if runs and runs[-1][0] == kind and not text[runs[-1][1][-1][0].end():m.start()].strip():
+                runs[-1][1].append((m, href))
+            else:
+                runs.append((kind, [(m, href)]))
+
+        out = []
+        pos = 0
+        for kind, tags in runs:
+            if not kind:
+                continue
+            href = self.bundle(kind, [h for _, h in tags])
+            if kind == "css":
+                tag = f'<link rel="stylesheet" href="{href}">'
+            else:
+                tag = f'<script src="{href}"></script>'
+            out.append(text[pos:tags[0][0].start()])
+            out.append(tag)
+            pos = tags[-1][0].end()
+        out.append(text[pos:])
+        return "".join(out)
+
+    def finish(self):
+        """Write the bundle index and delete bundles nothing uses."""
+        if self.bundle_dir.exists():
+            for path in self.bundle_dir.iterdir():
+                if path.name != BUNDLE_INDEX and path.name not in self.used:
+                    path.unlink()
+        if self.used:
+            (self.bundle_dir / BUNDLE_INDEX).write_text(
+                json.dumps(self.used, indent=2, sort_keys=True) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bundle and minify page CSS/JS.")
+    parser.add_argument("--root", default=".", help="site root to rewrite (default: current directory)")
+    args = parser.parse_args()
+
+    instrument.start(__file__)
+    bundler = Bundler(args.root)
+    updated_count = 0
+    with instrument.stage("pages"):
+        for html_file in iter_files(args.root):
+            original = html_file.read_bytes()
+            content = bundler.rewrite_page(original.decode("utf-8"))
+            instrument.count("files.scanned")
+            instrument.count("bytes.read", len(original))
+            if content.encode("utf-8") != original:
+                html_file.write_bytes(content.encode("utf-8"))
+                print(f"Updated: {html_file}")
+                updated_count += 1
+    instrument.count("files.written", updated_count)
+    with instrument.stage("bundle"):
+        bundler.finish()
+
+    source_bytes = sum(bundler.local_file(s).stat().st_size
+                       for sources in bundler.used.values() for s in sources)
+    bundle_bytes = sum((bundler.bundle_dir / name).stat().st_size for name in bundler.used)
+    print(f"\nTotal files updated: {updated_count}")
+    print(f"{len(bundler.used)} bundles, {bundle_bytes:,} bytes "
+          f"(sources {source_bytes:,} bytes counted once per bundle)")
+    for name, sources in sorted(bundler.used.items()):
+        print(f"  {name}: {', '.join(sources)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,464 @@
+#!/usr/bin/env python3
+"""
+Check what every page downloads on first view against performance budgets.
+
+For each HTML page this collects the files a first visit fetches:
+
+- stylesheets, scripts, icons and preloads from <link>/<script>
+- images (for srcset and <picture>, the largest candidate: what a
+  high-DPI screen fetches), video posters, embeds and iframes; those with
+  loading="lazy" are deferred instead (see below)
+- audio and video sources, unless the element has preload="none"
+- url() and @import in inline styles and stylesheets, followed through
+  @import; in an @font-face `src` only the first font counts
+- the photos of manifest-driven slideshows: JSON files the page's inline
+  scripts name (photocontest/2026/manifest.json, or the gallery index's
+  shard for the page's own folder) and every photo they list
+
+Lazy images and iframes only load as they near the viewport, so they are
+left out of the first-view totals and reported as deferred_requests and
+deferred_bytes, which have budgets of their own.
+
+Scripts are counted but not followed; a bundler's eager chunks are listed
+as modulepreload links already. Each file is counted once per page, with
+its raw size and its transfer size (gzip -9 for the types precompress.py
+compresses, the raw size otherwise). Gzip sizes are cached in
+.cache/check-budgets.json by size and mtime.
+
+Budgets live in budgets.json: "default" applies to every page, and each
+glob under "pages" that matches a page overrides individual limits, later
+globs winning (null removes a limit). A page over any limit is reported
+with the budget, the actual value and its largest files; the run then
+exits 1.
+
+    python3 check-budgets.py
+    python3 check-budgets.py photocontest/2026/index.html --verbose
+    python3 check-budgets.py --root dist --json .cache/budgets-report.json
+"""
+
+import argparse
+import fnmatch
+import gzip
+import json
+import os
+import posixpath
+import sys
+from html.parser import HTMLParser
+
+from sitetools import instrument
+from sitetools.files import SKIP_DIRS
+from sitetools.html import (css_references, font_fallbacks, is_external, resolve,
+                            script_references, site_path)
+
+BUDGETS_FILE = "budgets.json"
+CACHE_PATH = ".cache/check-budgets.json"
+CACHE_VERSION = 1
+# Keep in step with precompress.py.
+COMPRESSIBLE = (".html", ".css", ".js", ".mjs", ".json", ".svg", ".xml", ".txt", ".webmanifest")
+KINDS = {
+    "document": (".html", ".htm"),
+    "style": (".css",),
+    "script": (".js", ".mjs"),
+    "image": (".png", ".jpg", ".jpeg", ".gif", ".webp", ".avif", ".svg", ".ico"),
+    "font": (".woff", ".woff2", ".ttf", ".otf"),
+    "media": (".mp3", ".mp4", ".m4a", ".ogg", ".wav", ".webm", ".mov"),
+    "data": (".json", ".webmanifest", ".xml", ".txt"),
+}
+METRICS = (["requests", "external_requests", "raw_bytes", "transfer_bytes", "largest_file_bytes"]
+           + [f"{kind}_bytes" for kind in [*KINDS, "other"]]
+           + ["deferred_requests", "deferred_bytes"])
+# <link rel> values the browser fetches on load.
+FETCHED_RELS = {"stylesheet", "icon", "apple-touch-icon", "preload", "modulepreload", "manifest"}
+# Repo tooling that lives in the tree but is not part of the site.
+TOOLING_DIRS = ("scripts/", "tests/", "benchmarks/", "node_modules/", "dist/")
+
+
+def kind_of(path):
+    suffix = os.path.splitext(path)[1].lower()
+    for kind, suffixes in KINDS.items():
+        if suffix in suffixes:
+            return kind
+    return "other"
+
+
+class PageLoads(HTMLParser):
+    """Collects the URLs a page fetches on first view.
+
+    `urls` holds the URLs from tags and attributes, `deferred` those of
+    loading="lazy" images and iframes, `styles` the text of inline styles
+    and `scripts` the text of inline scripts.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.urls = []
+        self.deferred = []
+        self.styles = []
+        self.scripts = []
+        self._raw = None          # "style" or "script" while inside one
+        self._raw_text = []
+        self._picture = None      # candidate URLs of the open <picture>
+        self._picture_lazy = False
+        self._media = None        # [first source, preload] of the open <audio>/<video>
+
+    def largest(self, candidates):
+        """The candidate with the highest width/density descriptor."""
+        def weight(candidate):
+            parts = candidate.split()
+            try:
+                return float(parts[1][:-1]) if len(parts) > 1 else 1.0
+            except ValueError:
+                return 1.0
+        return max(candidates, key=weight).split()[0] if candidates else None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if attrs.get("style"):
+            self.styles.append(attrs["style"])
+        lazy = (attrs.get("loading") or "").lower() == "lazy"
+        if tag == "link":
+            rels = set((attrs.get("rel") or "").lower().split())
+            if rels & FETCHED_RELS and attrs.get("href"):
+                self.urls.append(attrs["href"])
+        elif tag == "script":
+            if attrs.get("src"):
+                self.urls.append(attrs["src"])
+            else:
+                self._raw, self._raw_text = "script", []
+        elif tag == "style":
+            self._raw, self._raw_text = "style", []
+        elif tag == "picture":
+            self._picture, self._picture_lazy = [], False
+        elif tag in ("img", "source") and self._media is None:
+            candidates = [c.strip() for c in (attrs.get("srcset") or "").split(",") if c.strip()]
+            if attrs.get("src"):
+                candidates.append(attrs["src"])
+            if self._picture is not None:
+                self._picture.extend(candidates)
+                # <source> has no loading attribute; the <img> decides.
+                self._picture_lazy |= tag == "img" and lazy
+            elif candidates:
+                (self.deferred if lazy else self.urls).append(self.largest(candidates))
+        elif tag in ("audio", "video"):
+            if attrs.get("poster"):
+                self.urls.append(attrs["poster"])
+            preload = (attrs.get("preload") or "auto").lower()
+            self._media = [attrs.get("src"), preload]
+        elif tag == "source" and self._media is not None:
+            # The browser plays the first source it supports.
+            if self._media[0] is None:
+                self._media[0] = attrs.get("src")
+        elif tag in ("iframe", "embed") and attrs.get("src"):
+            (self.deferred if lazy and tag == "iframe" else self.urls).append(attrs["src"])
+        elif tag == "object" and attrs.get("data"):
+            self.urls.append(attrs["data"])
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag in ("style", "script"):
+            self._raw = None
+
+    def handle_data(self, data):
+        if self._raw:
+            self._raw_text.append(data)
+
+    def handle_endtag(self, tag):
+        if self._raw and tag == self._raw:
+            (self.styles if tag == "style" else self.scripts).append("".join(self._raw_text))
+            self._raw = None
+        elif tag == "picture" and self._picture is not None:
+            if self._picture:
+                (self.deferred if self._picture_lazy else self.urls).append(self.largest(self._picture))
+            self._picture = None
+        elif tag in ("audio", "video") and self._media is not None:
+            src, preload = self._media
+            if src and preload != "none":
+                self.urls.append(src)
+            self._media = None
+
+
+class Site:
+    """The files under `root`, with sizes, gzip sizes and parsed stylesheets."""
+
+    def __init__(self, root):
+        self.root = root
+        self.files = {}           # site path -> (size, mtime_ns)
+        for dirpath, dirs, names in os.walk(root):
+            dirs[:] = [d for d in dirs if not d.startswith(".") and d not in SKIP_DIRS]
+            for name in names:
+                full = os.path.join(dirpath, name)
+                st = os.stat(full)
+                self.files[site_path(full, root)] = (st.st_size, st.st_mtime_ns)
+        self.cache = self.load_cache()
+        self.stylesheets = {}
+
+    def load_cache(self):
+        try:
+            with open(CACHE_PATH, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return data.get("entries", {}) if data.get("version") == CACHE_VERSION else {}
+
+    def save_cache(self):
+        entries = {p: e for p, e in self.cache.items() if p in self.files}
+        os.makedirs(os.path.dirname(CACHE_PATH), exist_ok=True)
+        with open(CACHE_PATH, "w", encoding="utf-8") as f:
+            json.dump({"version": CACHE_VERSION, "entries": entries}, f)
+
+    def read(self, path):
+        with open(os.path.join(self.root, path), encoding="utf-8", errors="replace") as f:
+            return f.read()
+
+    def sizes(self, path):
+        """(raw bytes, transfer bytes) of the site file `path`."""
+        size, mtime = self.files[path]
+        if not path.lower().endswith(COMPRESSIBLE):
+            return size, size
+        entry = self.cache.get(path)
+        if not entry or entry[:2] != [size, mtime]:
+            with open(os.path.join(self.root, path), "rb") as f:
+                compressed = len(gzip.compress(f.read(), compresslevel=9, mtime=0))
+            entry = self.cache[path] = [size, mtime, compressed]
+            instrument.count("files.compressed")
+        return size, min(size, entry[2])
+
+    def stylesheet(self, path):
+        """Site paths a stylesheet fetches, following @import."""
+        if path not in self.stylesheets:
+            self.stylesheets[path] = set()   # guards against @import cycles
+            self.stylesheets[path] = self.style_targets(self.read(path), path)
+        return self.stylesheets[path]
+
+    def style_targets(self, text, base):
+        targets = set()
+        fallbacks = font_fallbacks(text)
+        for url, _line in css_references(text):
+            if url in fallbacks or is_external(url):
+                continue
+            target = resolve(url, base, self.files)
+            if target:
+                targets.add(target)
+                if target.endswith(".css"):
+                    targets |= self.stylesheet(target)
+        return targets
+
+    def slideshow_targets(self, page, manifest):
+        """The JSON files and photos a page loads through `manifest`.
+
+        A gallery index only counts for the years whose folder is the
+        page's own; a plain manifest lists files relative to itself.
+        """
+        try:
+            data = json.loads(self.read(manifest))
+        except ValueError:
+            return set(), False
+        folder = posixpath.dirname(manifest)
+        if isinstance(data, dict) and "years" in data:
+            targets = set()
+            for year in data["years"]:
+                base = posixpath.normpath(posixpath.join(folder, year.get("base", "")))
+                shard = posixpath.normpath(posixpath.join(folder, year.get("shard", "")))
+                if base != posixpath.dirname(page) or shard not in self.files:
+                    continue
+                targets |= {manifest, shard} | self.photos(json.loads(self.read(shard)), base)
+            return targets, bool(targets)
+        if isinstance(data, list):
+            return {manifest} | self.photos(data, folder), False
+        return {manifest}, False
+
+    def photos(self, entries, folder):
+        found = set()
+        for entry in entries:
+            if isinstance(entry, dict) and entry.get("file"):
+                target = posixpath.normpath(posixpath.join(folder, entry["file"]))
+                if target in self.files:
+                    found.add(target)
+        return found
+
+
+def page_loads(site, page):
+    """Files page `page` fetches: (local site paths, external URLs) on first
+    view, and (local site paths, external URLs) deferred by loading="lazy".
+    """
+    parser = PageLoads()
+    parser.feed(site.read(page))
+    parser.close()
+
+    def collect(urls, local, external):
+        for url in urls:
+            if is_external(url):
+                if url.startswith(("http:", "https:", "//")):
+                    external.add(url)
+                continue
+            target = resolve(url, page, site.files)
+            if target:
+                local.add(target)
+                if target.endswith(".css"):
+                    local |= site.stylesheet(target)
+
+    local, external = {page}, set()
+    collect(parser.urls, local, external)
+    deferred_local, deferred_external = set(), set()
+    collect(parser.deferred, deferred_local, deferred_external)
+    for text in parser.styles:
+        local |= site.style_targets(text, page)
+
+    # Slideshows: a gallery index covering this page makes the plain
+    # manifest.json only a fallback.
+    manifests = []
+    for text in parser.scripts:
+        for url, _line in script_references(text):
+            target = resolve(url, page, site.files)
+            if target and target.endswith(".json"):
+                manifests.append(target)
+    slideshow, from_gallery = set(), False
+    for manifest in manifests:
+        targets, is_gallery = site.slideshow_targets(page, manifest)
+        if is_gallery and not from_gallery:
+            slideshow, from_gallery = set(), True
+        if is_gallery or not from_gallery:
+            slideshow |= targets
+    local |= slideshow
+    return local, external, deferred_local - local, deferred_external - external
+
+
+def measure(site, page):
+    """The page's metrics, and its first-view and deferred files as
+    [(transfer, raw, path)] largest first.
+    """
+    local, external, deferred_local, deferred_external = page_loads(site, page)
+    metrics = dict.fromkeys(METRICS, 0)
+    files = []
+    for path in local:
+        raw, transfer = site.sizes(path)
+        files.append((transfer, raw, path))
+        metrics["raw_bytes"] += raw
+        metrics["transfer_bytes"] += transfer
+        metrics[f"{kind_of(path)}_bytes"] += transfer
+    files.sort(reverse=True)
+    metrics["requests"] = len(local) + len(external)
+    metrics["external_requests"] = len(external)
+    metrics["largest_file_bytes"] = files[0][0] if files else 0
+
+    deferred = []
+    for path in deferred_local:
+        raw, transfer = site.sizes(path)
+        deferred.append((transfer, raw, path))
+        metrics["deferred_bytes"] += transfer
+    deferred.sort(reverse=True)
+    metrics["deferred_requests"] = len(deferred_local) + len(deferred_external)
+    return metrics, files, deferred
+
+
+def load_budgets(path):
+    with open(path, encoding="utf-8") as f:
+        config = json.load(f)
+    unknown = ({k for k in config.get("default", {}) if k not in METRICS}
+               | {k for b in config.get("pages", {}).values() for k in b if k not in METRICS})
+    if unknown:
+        raise ValueError(f"unknown budget metrics: {', '.join(sorted(unknown))} "
+                         f"(known: {', '.join(METRICS)})")
+    return config
+
+
+def budgets_for(config, page):
+    budgets = dict(config.get("default", {}))
+    for pattern, overrides in config.get("pages", {}).items():
+        if fnmatch.fnmatch(page, pattern):
+            budgets.update(overrides)
+    return {metric: limit for metric, limit in budgets.items() if limit is not None}
+
+
+def iter_pages(site, config):
+    excluded = config.get("exclude", [])
+    for path in sorted(site.files):
+        if not path.lower().endswith((".html", ".htm")) or path.startswith(TOOLING_DIRS):
+            continue
+        if any(fnmatch.fnmatch(path, pattern) for pattern in excluded):
+            continue
+        yield path
+
+
+def fmt(metric, value):
+    return f"{value:,}" if metric.endswith("requests") else f"{value / 1000:,.1f} kB"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check page weight against performance budgets.")
+    parser.add_argument("pages", nargs="*", help="pages to check, relative to --root (default: all)")
+    parser.add_argument("--root", default=".", help="site root (default: current directory)")
+    parser.add_argument("--budgets", default=None,
+                        help=f"budgets file (default: {BUDGETS_FILE} in the current directory)")
+    parser.add_argument("--json", metavar="FILE", help="write every page's metrics and files here")
+    parser.add_argument("--top", type=int, default=5,
+                        help="largest files listed for a page over budget (default: 5)")
+    parser.add_argument("--verbose", action="store_true", help="show every page, not just failures")
+    args = parser.parse_args()
+
+    instrument.start(__file__)
+    try:
+        config = load_budgets(args.budgets or BUDGETS_FILE)
+    except (OSError, ValueError) as e:
+        print(f"✗ Could not read budgets: {e}")
+        return 1
+
+    with instrument.stage("walk"):
+        site = Site(args.root)
+    pages = args.pages or list(iter_pages(site, config))
+    missing = [p for p in pages if p not in site.files]
+    if missing:
+        print(f"✗ Pages not found: {', '.join(missing)}")
+        return 1
+
+    report = {}
+    failures = 0
+    with instrument.stage("measure"):
+        for page in pages:
+            metrics, files, deferred = measure(site, page)
+            budgets = budgets_for(config, page)
+            over = {m: limit for m, limit in budgets.items() if metrics[m] > limit}
+            report[page] = {"metrics": metrics, "budgets": budgets, "over": sorted(over),
+                            "files": [{"path": p, "raw": raw, "transfer": t} for t, raw, p in files],
+                            "deferred": [{"path": p, "raw": raw, "transfer": t}
+                                         for t, raw, p in deferred]}
+            instrument.count("files.scanned")
+            if not over and not args.verbose:
+                continue
+            mark = "✗" if over else "✓"
+            print(f"{mark} {page}: {metrics['requests']} requests, "
+                  f"{fmt('transfer_bytes', metrics['transfer_bytes'])} transferred "
+                  f"({fmt('raw_bytes', metrics['raw_bytes'])} raw)"
+                  + (f"; {metrics['deferred_requests']} deferred, "
+                     f"{fmt('deferred_bytes', metrics['deferred_bytes'])}"
+                     if metrics["deferred_requests"] else ""))
+            for metric, limit in over.items():
+                actual = metrics[metric]
+                change = f", {actual / limit - 1:+.0%}" if limit else ""
+                print(f"    - {metric:20s} {fmt(metric, limit):>14s} budget")
+                print(f"    + {metric:20s} {fmt(metric, actual):>14s} actual "
+                      f"(+{fmt(metric, actual - limit)}{change})")
+            if over:
+                failures += 1
+                listed = deferred if set(over) <= {"deferred_requests", "deferred_bytes"} else files
+                for transfer, raw, path in listed[:args.top]:
+                    print(f"      {transfer:>12,}  {path}"
+                          f"{f'  ({raw:,} raw)' if raw != transfer else ''}")
+    site.save_cache()
+
+    if args.json:
+        os.makedirs(os.path.dirname(args.json) or ".", exist_ok=True)
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        print(f"\nWrote {args.json}")
+
+    heaviest = sorted(report.items(), key=lambda item: -item[1]["metrics"]["transfer_bytes"])[:5]
+    print(f"\n{len(report)} pages checked, {failures} over budget")
+    print("Heaviest: " + ", ".join(f"{page} ({fmt('transfer_bytes', r['metrics']['transfer_bytes'])})"
+                                   for page, r in heaviest))
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Check every link and asset reference in the site.
+
+Parses each HTML page (href, src, srcset, poster, inline and attribute CSS
+url()) and each stylesheet (url(), @import) once, resolves every reference
+against the files on disk - with and without the /dncweb base path - and
+reports:
+
+- missing targets, with the page and line that refers to them
+- oversized assets embedded in pages (images, scripts, audio, ...)
+- orphaned assets that nothing refers to
+
+Quoted file paths in scripts and JSON (e.g. the slideshow manifests) count
+as references for the orphan report but are never reported as missing.
+
+Extracted references are cached in .cache/check-links.json by file hash, so
+a re-run only re-parses files that changed. Parsing runs on a process pool.
+
+    python3 check-links.py
+    python3 check-links.py --root dist --max-bytes 500000
+"""
+
+import argparse
+import fnmatch
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from sitetools import instrument
+from sitetools.files import SKIP_DIRS, sha256_file
+from sitetools.html import (css_references, html_references, is_external, resolve,
+                            script_references, site_path)
+
+CACHE_VERSION = 1
+PARSED = {".html": "html", ".htm": "html", ".css": "css", ".js": "script",
+          ".mjs": "script", ".json": "script"}
+ASSET_EXTS = {".png", ".jpg", ".jpeg", ".gif", ".webp", ".avif", ".svg", ".ico",
+              ".mp3", ".mp4", ".mov", ".webm", ".pdf", ".css", ".js", ".mjs",
+              ".woff", ".woff2", ".ttf", ".otf", ".json"}
+# Tags whose target is a separate navigation or download, not page weight.
+LINK_TAGS = {"a", "iframe"}
+# Files the site serves without anything linking to them.
+ALWAYS_USED = ["404.html", "CNAME", "*/manifest.json", "*/titles.json", "*.webmanifest", "favicon.ico",
+               "photocontest/gallery/*.json", "assets/search/*.json",
+               "*/derived/*.json"]   # build-manifest.py's caches
+# Repo tooling and build output that live in the tree but are not part of
+# the site as committed (sitetools/ holds the service worker template
+# build-site.py fills in as sw.js).
+TOOLING_DIRS = ("scripts/", "tests/", "benchmarks/", "sitetools/", "dist/")
+TOOLING_EXTS = {".js", ".mjs", ".json"}   # at the top level: package.json, configs
+
+
+def scan_tree(root):
+    """{site path: (size, mtime_ns)} for every file under root."""
+    files = {}
+    for dirpath, dirs, names in os.walk(root):
+        dirs[:] = [d for d in dirs if not d.startswith(".") and d not in SKIP_DIRS]
+        for name in names:
+            if name.startswith("."):
+                continue
+            full = os.path.join(dirpath, name)
+            st = os.stat(full)
+            files[site_path(full, root)] = (st.st_size, st.st_mtime_ns)
+    return files
+
+
+def is_tooling(path):
+    if path.startswith(TOOLING_DIRS):
+        return True
+    return "/" not in path and os.path.splitext(path)[1].lower() in TOOLING_EXTS
+
+
+def parse_file(args):
+    """Worker: return (site path, sha256, refs) for one file."""
+    root, path = args
+    full = os.path.join(root, path)
+    digest = sha256_file(full)
+    with open(full, encoding="utf-8", errors="replace") as f:
+        text = f.read()
+    kind = PARSED[os.path.splitext(path)[1].lower()]
+    if kind == "html":
+        refs = html_references(text)
+    elif kind == "css":
+        refs = [(url, line, "css") for url, line in css_references(text)]
+    else:
+        refs = [(url, line, "script-text") for url, line in script_references(text)]
+    return path, digest, refs
+
+
+def load_cache(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            cache = json.load(f)
+        if cache.get("version") == CACHE_VERSION:
+            return cache["files"]
+    except (OSError, ValueError, KeyError):
+        pass
+    return {}
+
+
+def save_cache(path, entries):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"version": CACHE_VERSION, "files": entries}, f, separators=(",", ":"))
+    os.replace(tmp, path)
+
+
+def collect_references(root, files, cache_path, workers=None):
+    """{site path: refs} for every parseable file, re-parsing only changed ones."""
+    cache = load_cache(cache_path)
+    entries = {}
+    stale = []
+    for path, (size, mtime_ns) in files.items():
+        if os.path.splitext(path)[1].lower() not in PARSED:
+            continue
+        cached = cache.get(path)
+        if cached and cached["size"] == size and cached["mtime_ns"] == mtime_ns:
+            entries[path] = cached
+        else:
+            stale.append(path)
+
+    if stale:
+        # A touched-but-unchanged file only costs a hash, not a parse.
+        def reuse(path):
+            cached = cache.get(path)
+            if cached and cached["size"] == files[path][0]:
+                if sha256_file(os.path.join(root, path)) == cached["sha256"]:
+                    return cached
+            return None
+
+        to_parse = []
+        for path in stale:
+            cached = reuse(path)
+            if cached:
+                cached["mtime_ns"] = files[path][1]
+                entries[path] = cached
+            else:
+                to_parse.append(path)
+        if to_parse:
+            jobs = [(root, p) for p in to_parse]
+            if len(jobs) < 32 or workers == 1:
+                results = list(map(parse_file, jobs))
+            else:
+                with ProcessPoolExecutor(workers) as pool:
+                    results = list(pool.map(parse_file, jobs, chunksize=8))
+            for path, digest, refs in results:
+                size, mtime_ns = files[path]
+                entries[path] = {"size": size, "mtime_ns": mtime_ns,
+                                 "sha256": digest, "refs": refs}
+        save_cache(cache_path, entries)
+    return {path: entry["refs"] for path, entry in entries.items()}, len(stale)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check site links and assets.")
+    parser.add_argument("--root", default=".", help="site root (default: current directory)")
+    parser.add_argument("--base-path", default="/dncweb",
+                        help="deploy base path also accepted on root-relative URLs")
+    parser.add_argument("--max-bytes", type=int, default=1_000_000,
+                        help="flag embedded assets larger than this (default: 1000000)")
+    parser.add_argument("--ignore", action="append", default=[],
+                        help="glob of site paths to leave out of the orphan report (repeatable)")
+    parser.add_argument("--cache", default=".cache/check-links.json")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--no-orphans", action="store_true", help="skip the orphan report")
+    args = parser.parse_args()
+
+    instrument.start(__file__)
+    started = time.perf_counter()
+    root = os.path.abspath(args.root)
+    with instrument.stage("walk"):
+        files = scan_tree(root)
+    with instrument.stage("parse"):
+        refs_by_file, reparsed = collect_references(root, files, args.cache, args.workers)
+    instrument.count("files.scanned", len(refs_by_file))
+    instrument.count("files.parsed", reparsed)
+    instrument.count("files.cached", len(refs_by_file) - reparsed)
+
+    with instrument.stage("resolve"):
+        missing = []          # (page, line, url)
+        oversized = {}        # target -> [pages]
+        used = set()
+        for page, refs in sorted(refs_by_file.items()):
+            for url, line, tag in refs:
+                if is_external(url):
+                    continue
+                target = resolve(url, page, files, args.base_path)
+                if target is None:
+                    if tag != "script-text":
+                        missing.append((page, line, url))
+                    continue
+                used.add(target)
+                if (tag not in LINK_TAGS and tag != "script-text"
+                        and files[target][0] > args.max_bytes):
+                    oversized.setdefault(target, set()).add(page)
+
+    print(f"Checked {len(refs_by_file)} files ({reparsed} re-parsed) "
+          f"in {time.perf_counter() - started:.2f}s")
+
+    if missing:
+        print(f"\n✗ {len(missing)} missing targets:")
+        for page, line, url in missing:
+            print(f"   {page}:{line}  {url}")
+    else:
+        print("\n✓ No missing targets")
+
+    if oversized:
+        print(f"\n⚠️  {len(oversized)} embedded assets over {args.max_bytes:,} bytes:")
+        for target in sorted(oversized, key=lambda t: -files[t][0]):
+            pages = sorted(oversized[target])
+            more = f" (+{len(pages) - 1} more)" if len(pages) > 1 else ""
+            print(f"   {files[target][0]:>12,}  {target}  <- {pages[0]}{more}")
+
+    if not args.no_orphans:
+        ignore = ALWAYS_USED + args.ignore
+        orphans = sorted(
+            path for path in files
+            if os.path.splitext(path)[1].lower() in ASSET_EXTS
+            and path not in used
+            and not is_tooling(path)
+            and not any(fnmatch.fnmatch(path, pattern) for pattern in ignore)
+        )
+        if orphans:
+            total = sum(files[p][0] for p in orphans)
+            print(f"\n📁 {len(orphans)} orphaned assets ({total:,} bytes) nothing refers to:")
+            for path in orphans:
+                print(f"   {files[path][0]:>12,}  {path}")
+
+    return 1 if missing else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
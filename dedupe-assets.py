@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Find byte-identical copies of site assets and optionally consolidate them.
+
+Files are bucketed by size first, so only files that share a size with
+another are read; those are hashed with streamed reads on a thread pool.
+Each group of identical files is reported with how often pages refer to
+each copy.
+
+With --apply, every reference to a duplicate (root-relative, with or
+without the /dncweb base path, %-encoded or not) in HTML, CSS, JS and JSON
+is rewritten to the group's canonical copy - the most referenced one, then
+the one without a "-1"-style suffix, then the shortest path - and the
+duplicate is deleted. A duplicate whose file name is still mentioned
+somewhere afterwards (a relative link, a slideshow manifest entry) is kept
+and reported instead.
+
+    python3 dedupe-assets.py
+    python3 dedupe-assets.py --apply
+"""
+
+import argparse
+import os
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+
+from sitetools import instrument
+from sitetools.files import SKIP_DIRS, iter_files, sha256_file
+from sitetools.html import site_path
+from sitetools.rewrite import Rule, RuleSet, rewrite_files
+from sitetools.rules import BASE_PATH
+
+ASSET_EXTS = {".png", ".jpg", ".jpeg", ".gif", ".webp", ".avif", ".svg", ".ico",
+              ".mp3", ".mp4", ".mov", ".webm", ".pdf", ".woff", ".woff2", ".ttf", ".otf",
+              ".css", ".js", ".mjs"}
+REFERENCING = (".html", ".css", ".js", ".mjs", ".json")
+# Generated trees: their copies are rebuilt, not edited.
+SKIP_TREES = {"derived", "dist", "bundles"}
+COPY_SUFFIX = re.compile(r"[-_ ](?:\d+|copy)$", re.I)
+# A reference starts after a quote, "(", "=", "," or whitespace, or after the
+# base path, and ends before anything that could continue the file name.
+REFERENCE_START = r"(?:(?<=[\s\"'(=,])|(?<=%s))" % re.escape(BASE_PATH)
+REFERENCE_END = r"(?![\w.-])"
+
+
+def find_candidates(root):
+    """{size: [site path, ...]} for sizes shared by more than one asset."""
+    by_size = {}
+    for dirpath, dirs, names in os.walk(root):
+        dirs[:] = [d for d in dirs
+                   if not d.startswith(".") and d not in SKIP_DIRS and d not in SKIP_TREES]
+        for name in names:
+            if os.path.splitext(name)[1].lower() not in ASSET_EXTS:
+                continue
+            path = os.path.join(dirpath, name)
+            size = os.path.getsize(path)
+            if size:
+                by_size.setdefault(size, []).append(site_path(path, root))
+    return {size: paths for size, paths in by_size.items() if len(paths) > 1}
+
+
+def find_duplicates(root, candidates, workers):
+    """[(size, [site path, ...])] for each group of identical files."""
+    paths = [p for group in candidates.values() for p in group]
+    with ThreadPoolExecutor(workers) as pool:
+        digests = pool.map(lambda p: sha256_file(os.path.join(root, p)), paths)
+        by_hash = {}
+        for path, digest in zip(paths, digests):
+            by_hash.setdefault(digest, []).append(path)
+    sizes = {p: size for size, group in candidates.items() for p in group}
+    return sorted(((sizes[group[0]], sorted(group)) for group in by_hash.values() if len(group) > 1),
+                  key=lambda g: -g[0] * (len(g[1]) - 1))
+
+
+def count_references(texts, paths):
+    """{site path: number of root-relative references} across `texts`."""
+    spellings = {}
+    for path in paths:
+        spellings["/" + path] = path
+        spellings["/" + quote(path)] = path
+    pattern = re.compile(REFERENCE_START + "(?:%s)" % "|".join(
+        re.escape(s) for s in sorted(spellings, key=len, reverse=True)) + REFERENCE_END)
+    counts = dict.fromkeys(paths, 0)
+    for text in texts.values():
+        for m in pattern.finditer(text):
+            counts[spellings[m.group(0)]] += 1
+    return counts
+
+
+def canonical(group, refs):
+    def rank(path):
+        stem = os.path.splitext(os.path.basename(path))[0]
+        return (-refs[path], bool(COPY_SUFFIX.search(stem)), len(path), path)
+    return min(group, key=rank)
+
+
+def read_texts(root):
+    texts = {}
+    for path in iter_files(root, REFERENCING):
+        try:
+            texts[str(path)] = path.read_text(encoding="utf-8")
+        except (OSError, UnicodeDecodeError):
+            continue
+    return texts
+
+
+def reference_rule(path, keep):
+    """Rule rewriting whole references to /path (not /x/path or /path.map) to /keep."""
+    pattern = REFERENCE_START + re.escape("/" + path) + REFERENCE_END
+    return Rule(pattern, ("/" + keep).replace("\\", "\\\\"), name="/" + path)
+
+
+def still_mentioned(texts, path):
+    """Files that still mention `path`'s file name, e.g. by a relative URL."""
+    name = os.path.basename(path)
+    pattern = re.compile(r"(?<![\w.-])(?:%s|%s)(?![\w.-])" % (re.escape(name), re.escape(quote(name))))
+    return [file for file, text in texts.items() if pattern.search(text)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find and consolidate duplicate assets.")
+    parser.add_argument("--root", default=".", help="site root (default: current directory)")
+    parser.add_argument("--apply", action="store_true",
+                        help="rewrite references to the canonical copy and delete the others")
+    parser.add_argument("--workers", type=int, default=8, help="hashing threads (default: 8)")
+    args = parser.parse_args()
+
+    instrument.start(__file__)
+    with instrument.stage("walk"):
+        candidates = find_candidates(args.root)
+    with instrument.stage("hash"):
+        groups = find_duplicates(args.root, candidates, args.workers)
+    if not groups:
+        print("✓ No duplicate assets")
+        return 0
+
+    with instrument.stage("references"):
+        texts = read_texts(args.root)
+        refs = count_references(texts, [p for _, group in groups for p in group])
+    wasted = sum(size * (len(group) - 1) for size, group in groups)
+    print(f"Found {len(groups)} groups of identical files; "
+          f"{sum(len(g) - 1 for _, g in groups)} extra copies waste {wasted:,} bytes\n")
+
+    rules = []
+    removals = []
+    for size, group in groups:
+        keep = canonical(group, refs)
+        print(f"{size:>12,} bytes x {len(group)}")
+        for path in group:
+            marker = "*" if path == keep else " "
+            print(f"   {marker} {path}  ({refs[path]} references)")
+            if path != keep:
+                rules.append(reference_rule(path, keep))
+                if quote(path) != path:
+                    rules.append(reference_rule(quote(path), quote(keep)))
+                removals.append(path)
+    print("\n* = canonical copy")
+    if not args.apply:
+        print("Re-run with --apply to point references at the canonical copies and delete the rest")
+        return 0
+
+    # Longest first, so a path never shadows a longer one sharing its prefix.
+    rules.sort(key=lambda rule: -len(rule.pattern))
+    updated_count = 0
+    for result in rewrite_files(list(texts), RuleSet(rules)):
+        if result.error:
+            print(f"Error processing {result.path}: {result.error}")
+        elif result.changed:
+            print(f"✓ Updated {result.path}")
+            updated_count += 1
+
+    removed = kept = 0
+    freed = 0
+    with instrument.stage("delete"):
+        texts = read_texts(args.root)
+        for path in removals:
+            mentions = still_mentioned(texts, path)
+            if mentions:
+                print(f"- Kept {path}: still mentioned in {', '.join(mentions[:3])}"
+                      f"{' ...' if len(mentions) > 3 else ''}")
+                kept += 1
+                continue
+            full = os.path.join(args.root, path)
+            freed += os.path.getsize(full)
+            os.unlink(full)
+            removed += 1
+    instrument.count("files.deleted", removed)
+
+    print(f"\nUpdated {updated_count} files, removed {removed} copies ({freed:,} bytes), kept {kept}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
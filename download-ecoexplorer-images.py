@@ -2,10 +2,18 @@
 """
 Download all EcoExplorer images from the WordPress site.
 This script downloads the actual images (not HTML) from the main website.
+
+URLs shared by several destinations are fetched once, downloads run
+concurrently over keep-alive connections, and re-runs only re-download
+images that changed upstream (see sitetools/fetch.py).
 """
 
-import subprocess
+import argparse
 import sys
+from urllib.parse import urlsplit
+
+from sitetools import instrument
+from sitetools.fetch import Downloader
 
 # All image downloads: (URL, destination_path)
 downloads = [
@@ -65,42 +73,42 @@ downloads = [
      "assets/images/ecoexplorer/meadow/birds.png"),
 ]
 
-def download_image(url, dest):
-    """Download an image using curl."""
-    print(f"Downloading {dest}...")
-    result = subprocess.run(
-        ["curl", "-L", "-f", "-s", "-o", dest, url],
-        capture_output=True
-    )
-    if result.returncode == 0:
-        # Verify it's actually an image
-        check_result = subprocess.run(
-            ["file", dest],
-            capture_output=True,
-            text=True
-        )
-        if "PNG image data" in check_result.stdout:
-            print(f"  ✓ Downloaded successfully")
-            return True
-        else:
-            print(f"  ✗ Downloaded but not a valid PNG: {check_result.stdout.strip()}")
-            return False
-    else:
-        print(f"  ✗ Failed to download")
-        return False
-
 def main():
+    parser = argparse.ArgumentParser(description="Download all EcoExplorer images.")
+    parser.add_argument("--origin", default=None,
+                        help="fetch from this scheme://host instead, e.g. a local test server")
+    parser.add_argument("--workers", type=int, default=6, help="concurrent downloads (default: 6)")
+    parser.add_argument("--cache-dir", default=".cache/downloads",
+                        help="ETag/Last-Modified cache (default: .cache/downloads)")
+    args = parser.parse_args()
+
+    instrument.start(__file__)
+    pairs = downloads
+    if args.origin:
+        pairs = [(args.origin.rstrip("/") + urlsplit(url).path, dest) for url, dest in downloads]
+
+    downloader = Downloader(cache_dir=args.cache_dir, workers=args.workers, expect={"png"})
+    # Destinations are written as each download finishes, inside this stage.
+    with instrument.stage("fetch"):
+        results = downloader.download_all(pairs)
+
     success_count = 0
     fail_count = 0
-
-    for url, dest in downloads:
-        if download_image(url, dest):
-            success_count += 1
+    for result in results:
+        instrument.count(f"download.{result.status}")
+        instrument.count("download.bytes", result.bytes)
+        dests = ", ".join(result.dests)
+        if result.ok:
+            note = "not modified" if result.status == "not-modified" else f"{result.status}, {result.bytes:,} bytes"
+            print(f"  ✓ {dests} ({note})")
+            success_count += len(result.dests)
         else:
-            fail_count += 1
+            print(f"  ✗ {dests}: {result.error}")
+            fail_count += len(result.dests)
 
     print(f"\n{'='*60}")
-    print(f"Download complete: {success_count} successful, {fail_count} failed")
+    print(f"Download complete: {success_count} successful, {fail_count} failed "
+          f"({len(results)} unique URLs)")
     print(f"{'='*60}")
 
     return 0 if fail_count == 0 else 1
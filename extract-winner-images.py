@@ -1,9 +1,48 @@
 #!/usr/bin/env python3
-"""Extract winner images from WordPress page"""
+"""Download the photo contest winners from the WordPress pages into a gallery folder.
 
-import re
-import requests
+Every contest page given is fetched concurrently over keep-alive
+connections with the ETag/Last-Modified cache in .cache/downloads (see
+sitetools/fetch.py), and parsed while it downloads: each chunk goes
+straight to ImageExtractor.feed. The winning photos are then downloaded in
+parallel to --out under their WordPress file names, their award and
+photographer are added to the folder's titles.json (entries already there
+are kept, so hand-corrected captions survive), and manifest.json is
+rewritten by photocontest/build-manifest.py's Manifest, so it is exactly
+what build-manifest.py would produce.
+
+    python3 extract-winner-images.py --dry-run
+    python3 extract-winner-images.py URL [URL ...] --out photocontest/2026 --year 2026
+    python3 extract-winner-images.py --origin http://127.0.0.1:8000   # local stand-in
+
+Run photocontest/build-manifest.py afterwards to refresh the gallery index.
+"""
+
+import argparse
+import codecs
+import importlib.util
+import json
+import posixpath
+import sys
 from html.parser import HTMLParser
+from pathlib import Path
+from urllib.parse import unquote, urljoin, urlsplit
+
+from sitetools import instrument
+from sitetools.fetch import Downloader
+
+ROOT = Path(__file__).resolve().parent
+PAGES = ['https://www.demarestnaturecenter.org/2025-john-c-goodwin-photo-contest-winners/']
+IMAGE_TYPES = {"jpeg", "png", "webp", "gif", "avif"}
+
+
+def load_build_manifest():
+    spec = importlib.util.spec_from_file_location(
+        "build_manifest", ROOT / "photocontest" / "build-manifest.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
 
 class ImageExtractor(HTMLParser):
     def __init__(self):
@@ -30,20 +69,138 @@ class ImageExtractor(HTMLParser):
         data = data.strip()
         if 'Prize Winner' in data or 'Place in' in data or 'Honorable Mention' in data:
             self.current_award = data
+            self.current_photographer = None
         # Check if it might be a photographer name (short text, not award text)
         elif data and len(data) < 50 and not any(word in data for word in ['Prize', 'Place', 'Category', 'Honorable']):
             if self.current_award and not self.current_photographer:
                 self.current_photographer = data
 
-url = 'https://www.demarestnaturecenter.org/2025-john-c-goodwin-photo-contest-winners/'
-response = requests.get(url)
-html = response.text
 
-parser = ImageExtractor()
-parser.feed(html)
+class Page:
+    """One contest page, decoded and parsed chunk by chunk as it arrives."""
+
+    def __init__(self, url):
+        self.url = url
+        self.parser = ImageExtractor()
+        self.decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+    def feed(self, chunk):
+        self.parser.feed(self.decoder.decode(chunk))
+
+    def close(self):
+        self.parser.feed(self.decoder.decode(b"", final=True))
+        self.parser.close()
+
+    @property
+    def images(self):
+        return self.parser.images
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Download photo contest winners and write their manifest.")
+    parser.add_argument("pages", nargs="*", default=PAGES,
+                        help="contest winner pages (default: the 2025 winners)")
+    parser.add_argument("--root", default=str(ROOT),
+                        help="site root (default: the directory of this script)")
+    parser.add_argument("--out", default="assets/images/winners-2025",
+                        help="photo folder, relative to the root (default: assets/images/winners-2025)")
+    parser.add_argument("--year", default="2025", help="contest year of the manifest (default: 2025)")
+    parser.add_argument("--origin", default=None,
+                        help="fetch from this scheme://host instead, e.g. a local test server")
+    parser.add_argument("--workers", type=int, default=8, help="concurrent downloads (default: 8)")
+    parser.add_argument("--cache-dir", default=".cache/downloads",
+                        help="ETag/Last-Modified cache (default: .cache/downloads)")
+    parser.add_argument("--no-derivatives", action="store_true",
+                        help="skip writing resized copies into derived/")
+    parser.add_argument("--dry-run", action="store_true", help="list the winners without downloading them")
+    args = parser.parse_args()
+    root = Path(args.root)
+    folder = root / args.out
+
+    def fetch_url(url):
+        if url.startswith("//"):
+            url = "https:" + url
+        if args.origin:
+            parts = urlsplit(url)
+            url = args.origin.rstrip("/") + parts.path + (f"?{parts.query}" if parts.query else "")
+        return url
+
+    instrument.start(__file__)
+    downloader = Downloader(cache_dir=args.cache_dir, workers=args.workers, expect=IMAGE_TYPES)
+    pages = [Page(fetch_url(url)) for url in args.pages]
+    with instrument.stage("pages"):
+        results = downloader.stream_all((page.url, page.feed) for page in pages)
+    failed = 0
+    for page, result in zip(pages, results):
+        if not result.ok:
+            print(f"  ✗ {page.url}: {result.error}")
+            failed += 1
+            page.parser.images = []
+            continue
+        page.close()
+        instrument.count("pages.bytes", result.bytes)
+        print(f"  ✓ {page.url}: {len(page.images)} images ({result.status})")
+
+    # One file per image URL, named as on WordPress; a second URL with the
+    # same name (another upload month) gets a numbered name.
+    winners = {}
+    names = set()
+    for page in pages:
+        for img in page.images:
+            url = fetch_url(urljoin(page.url, img['src']))
+            if url in winners:
+                continue
+            name = posixpath.basename(unquote(urlsplit(url).path))
+            stem, ext = posixpath.splitext(name)
+            n = 1
+            while name in names:
+                n += 1
+                name = f"{stem}-{n}{ext}"
+            names.add(name)
+            winners[url] = dict(img, file=name)
+    instrument.count("images.found", len(winners))
+
+    print("Found images:")
+    for i, (url, img) in enumerate(winners.items(), 1):
+        print(f"\n{i}. {url}")
+        print(f"   Award: {img['award']}")
+        print(f"   Photographer: {img['photographer']}")
+    if args.dry_run or not winners:
+        return 1 if failed else 0
+
+    with instrument.stage("images"):
+        results = downloader.download_all((url, folder / img['file']) for url, img in winners.items())
+    downloaded = []
+    for result in results:
+        img = winners[result.url]
+        if result.ok:
+            note = "not modified" if result.status == "not-modified" else f"{result.status}, {result.bytes:,} bytes"
+            print(f"  ✓ {img['file']} ({note})")
+            instrument.count("images.bytes", result.bytes)
+            downloaded.append(img)
+        else:
+            print(f"  ✗ {img['file']}: {result.error}")
+            failed += 1
+
+    with instrument.stage("manifest"):
+        folder.mkdir(parents=True, exist_ok=True)
+        build_manifest = load_build_manifest()
+        titles_path = folder / build_manifest.TITLES_NAME
+        titles = build_manifest.load_cache(titles_path)
+        for img in downloaded:
+            if img['award'] and img['file'] not in titles:
+                titles[img['file']] = {"title": img['award'],
+                                       "photographer": img['photographer'] or ""}
+        if titles:
+            build_manifest.write_if_changed(titles_path, json.dumps(titles, indent=2) + "\n")
+        manifest = build_manifest.Manifest(args.year, folder, derivatives=not args.no_derivatives,
+                                           workers=args.workers)
+        manifest.scan()
+        entries = manifest.write()
+    print(f"\n{len(entries)} entries -> {manifest.path.relative_to(root)} "
+          f"({len(downloaded)} downloaded, {failed} failed)")
+    return 1 if failed else 0
+
 
-print("Found images:")
-for i, img in enumerate(parser.images, 1):
-    print(f"\n{i}. {img['src']}")
-    print(f"   Award: {img['award']}")
-    print(f"   Photographer: {img['photographer']}")
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,57 +2,45 @@
 """
 Fix absolute paths for GitHub Pages deployment.
 Adds /dncweb/ base path to all absolute URLs.
+
+This rewrites the sources in place; build-site.py --base-path /dncweb
+renders the same change into an output directory instead.
 """
 
-import os
-import re
+import argparse
+import sys
 from pathlib import Path
 
-# Base path for GitHub Pages
-BASE_PATH = "/dncweb"
-
-def fix_paths_in_file(file_path):
-    """Fix absolute paths in a single file."""
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
-
-    original_content = content
+from sitetools import instrument
+from sitetools.files import iter_files
+from sitetools.rewrite import rewrite_files
+from sitetools.rules import GITHUB_PAGES
 
-    # Fix paths in href and src attributes
-    # Match: href="/" or src="/" but not href="http" or href="https" or href="//"
-    patterns = [
-        (r'(href|src)="(/(?!/)(?!http))', rf'\1="{BASE_PATH}\2'),  # href="/path" -> href="/dncweb/path"
-        (r"(href|src)='(/(?!/)(?!http))", rf"\1='{BASE_PATH}\2"),  # href='/path' -> href='/dncweb/path'
-    ]
-
-    for pattern, replacement in patterns:
-        content = re.sub(pattern, replacement, content)
-
-    # Only write if content changed
-    if content != original_content:
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(content)
-        return True
-    return False
 
 def main():
     """Process all HTML files in the project."""
-    base_dir = Path('/Users/kriskumar/dnc')
-    html_files = list(base_dir.glob('**/*.html'))
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--root', default=str(Path(__file__).resolve().parent),
+                        help='site root (default: the directory this script is in)')
+    args = parser.parse_args()
+
+    instrument.start(__file__)
+    # Skips hidden directories and node_modules
+    with instrument.stage("walk"):
+        html_files = list(iter_files(args.root))
 
     updated_count = 0
-    for html_file in html_files:
-        # Skip hidden directories and node_modules
-        if any(part.startswith('.') for part in html_file.parts):
-            continue
-        if 'node_modules' in html_file.parts:
-            continue
-
-        if fix_paths_in_file(html_file):
-            print(f"Updated: {html_file}")
+    error_count = 0
+    for result in rewrite_files(html_files, GITHUB_PAGES):
+        if result.error:
+            print(f"Error processing {result.path}: {result.error}")
+            error_count += 1
+        elif result.changed:
+            print(f"Updated: {result.path}")
             updated_count += 1
 
     print(f"\nTotal files updated: {updated_count}")
+    return 1 if error_count else 0
 
 if __name__ == '__main__':
-    main()
+    sys.exit(main())
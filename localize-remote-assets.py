@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Copy assets still hot-linked from the old WordPress site into this repo.
+
+Scans every HTML/CSS/JS file once for demarestnaturecenter.org
+/wp-content/uploads/... references, downloads each unique asset once to
+assets/uploads/<same path> (so the local path is deterministic), and
+rewrites every reference with a single multi-pattern pass per file.
+References whose download fails are left pointing at the old site.
+
+    python3 localize-remote-assets.py --dry-run
+    python3 localize-remote-assets.py --origin http://127.0.0.1:8000   # local stand-in
+"""
+
+import argparse
+import re
+import sys
+from pathlib import Path
+from urllib.parse import unquote, urlsplit
+
+from sitetools import instrument
+from sitetools.fetch import Downloader
+from sitetools.files import iter_files
+from sitetools.rewrite import Rule, RuleSet, rewrite_files
+
+REMOTE_UPLOAD = re.compile(
+    r"(?:https?:)?//(?:www\.)?demarestnaturecenter\.org/wp-content/uploads/"
+    r"[^\"'\s()<>,?#]+(?:\?[^\"'\s()<>,#]*)?"
+)
+CANONICAL_ORIGIN = "https://www.demarestnaturecenter.org"
+LOCAL_PREFIX = "assets/uploads"
+SCAN_SUFFIXES = (".html", ".css", ".js")
+
+
+def local_url(url):
+    """Site-root URL for a remote upload, e.g. /assets/uploads/2024/08/x.png
+
+    Percent-escapes are kept so the result is valid wherever the original
+    URL was (srcset, CSS url(), ...).
+    """
+    path = urlsplit(url if not url.startswith("//") else "https:" + url).path
+    relative = path.split("/wp-content/uploads/", 1)[1]
+    return f"/{LOCAL_PREFIX}/{relative}"
+
+
+def local_file(root, url):
+    """Where on disk local_url(url) lives."""
+    return root / unquote(local_url(url)).lstrip("/")
+
+
+def scan(root):
+    """Return ({url: [files]}) for every remote upload reference under root."""
+    found = {}
+    for path in iter_files(root, SCAN_SUFFIXES):
+        try:
+            data = path.read_bytes()
+            text = data.decode("utf-8")
+        except (OSError, UnicodeDecodeError) as e:
+            print(f"Error reading {path}: {e}")
+            continue
+        instrument.count("scan.files")
+        instrument.count("scan.bytes", len(data))
+        for url in set(REMOTE_UPLOAD.findall(text)):
+            found.setdefault(url, []).append(path)
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Localize hot-linked WordPress uploads.")
+    parser.add_argument("--root", default=".", help="site root (default: current directory)")
+    parser.add_argument("--origin", default=None,
+                        help="fetch from this scheme://host instead, e.g. a local test server")
+    parser.add_argument("--workers", type=int, default=8, help="concurrent downloads (default: 8)")
+    parser.add_argument("--cache-dir", default=".cache/downloads",
+                        help="ETag/Last-Modified cache (default: .cache/downloads)")
+    parser.add_argument("--dry-run", action="store_true", help="list references without fetching")
+    args = parser.parse_args()
+    root = Path(args.root)
+
+    instrument.start(__file__)
+    with instrument.stage("scan"):
+        found = scan(root)
+    files = sorted({f for paths in found.values() for f in paths})
+    print(f"Found {len(found)} unique remote assets referenced from {len(files)} files")
+    for url in sorted(found):
+        print(f"  {url}\n    -> {local_url(url)}")
+    if args.dry_run or not found:
+        return 0
+
+    def fetch_url(url):
+        parts = urlsplit(url if not url.startswith("//") else "https:" + url)
+        origin = args.origin.rstrip("/") if args.origin else CANONICAL_ORIGIN
+        return origin + parts.path + (f"?{parts.query}" if parts.query else "")
+
+    # Several spellings (http/https, with/without www) name the same local
+    # file: fetch it once, from one canonical URL.
+    by_file = {}
+    for url in sorted(found):
+        by_file.setdefault(local_file(root, url), []).append(url)
+    by_fetch = {fetch_url(urls[0]): urls for urls in by_file.values()}
+    downloader = Downloader(cache_dir=args.cache_dir, workers=args.workers)
+    with instrument.stage("fetch"):
+        results = downloader.download_all(
+            (fetch, local_file(root, urls[0])) for fetch, urls in by_fetch.items())
+
+    rules = []
+    failed = 0
+    for result in results:
+        instrument.count(f"download.{result.status}")
+        instrument.count("download.bytes", result.bytes)
+        if not result.ok:
+            print(f"  ✗ {result.url}: {result.error}")
+            failed += 1
+            continue
+        for url in by_fetch[result.url]:
+            rules.append(Rule(url, local_url(url), literal=True))
+    # Longest first, so a URL never shadows a longer one sharing its prefix.
+    rules.sort(key=lambda rule: -len(rule.pattern))
+
+    updated_count = 0
+    for result in rewrite_files(files, RuleSet(rules)):
+        if result.error:
+            print(f"Error processing {result.path}: {result.error}")
+        elif result.changed:
+            print(f"✓ Updated {result.path}")
+            updated_count += 1
+
+    print(f"\nLocalized {len(results) - failed} assets ({failed} failed), "
+          f"updated {updated_count} files")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
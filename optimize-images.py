@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""
+Re-encode the site's PNG and JPEG images smaller, in place or into --out.
+
+Modes:
+
+- lossless (default): JPEGs lose their EXIF/XMP/comment segments (the
+  compressed image data is not touched) and are re-optimized by jpegtran if
+  it is installed; PNGs drop unneeded alpha channels, switch to a palette
+  when they use 256 colours or fewer, and are re-saved with full zlib
+  optimization. Pixels are identical afterwards.
+- lossy: JPEGs are re-encoded as progressive JPEG at --quality; PNGs are
+  quantized to a 256-colour palette.
+
+With --webp, PNGs of at least --webp-min-bytes (the ecoexplorer screenshots)
+are also tried as WebP - lossless WebP in lossless mode - at the same pixel
+size, and converted when that is smaller. In place, every HTML/CSS/JS/JSON
+reference to the .png - root-relative, relative to the referencing file or
+a bare file name, as in a slideshow manifest.json - is pointed at the .webp,
+and the .png is deleted unless its file name is still mentioned somewhere -
+a path a script builds, or a script that downloads or points at it - in
+which case it is kept and reported. A kept .png whose .webp is still
+current is not converted again.
+
+A result is only kept when it is at least 2% smaller. A ledger of content
+hashes in .cache/optimize-images.json lets re-runs skip files that have
+already been through the same settings. Needs Pillow (pip install Pillow).
+
+    python3 optimize-images.py                        # assets/images, lossless
+    python3 optimize-images.py --lossy --quality 80 --webp
+    python3 optimize-images.py assets/images/gallery --out dist
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import posixpath
+import re
+import shutil
+import subprocess
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from urllib.parse import quote
+
+from sitetools import instrument
+from sitetools.files import iter_files, write_if_changed
+from sitetools.html import is_external, resolve, site_path
+from sitetools.images import Image, have_pillow, sniff_type, strip_jpeg_metadata
+
+SUFFIXES = (".png", ".jpg", ".jpeg")
+REFERENCING = (".html", ".css", ".js", ".mjs", ".json")
+# Also searched before a converted .png is deleted: the download and
+# path-rewriting scripts name the files they write.
+MENTIONING = REFERENCING + (".py", ".md", ".txt", ".yml", ".yaml", ".sh")
+LEDGER = ".cache/optimize-images.json"
+# A URL ending in .png, between quotes, parentheses, "=", "," or whitespace.
+PNG_REFERENCE = re.compile(r"""(?<=[\s"'`(=,])[^\s"'`()<>,=]+\.png(?=[?#\s"'`),])""", re.I)
+MIN_GAIN = 0.02   # smaller wins are not worth a generation of re-encoding
+
+JPEGTRAN = shutil.which("jpegtran")
+
+
+def optimize_jpeg(data, lossy, quality):
+    if not lossy:
+        data = strip_jpeg_metadata(data)
+        if JPEGTRAN:
+            proc = subprocess.run([JPEGTRAN, "-copy", "all", "-optimize", "-progressive"],
+                                  input=data, capture_output=True)
+            if proc.returncode == 0 and proc.stdout:
+                data = proc.stdout
+        return data
+    with Image.open(io.BytesIO(data)) as im:
+        if im.mode not in ("RGB", "L"):
+            return data   # CMYK and friends: not worth the colour-shift risk
+        icc = im.info.get("icc_profile")
+        orientation = im.getexif().get(0x0112, 1)
+        exif = Image.Exif()
+        if orientation != 1:
+            exif[0x0112] = orientation   # keep only what makes the photo display upright
+        buf = io.BytesIO()
+        im.save(buf, "JPEG", quality=quality, optimize=True, progressive=True,
+                icc_profile=icc, exif=exif.tobytes() if orientation != 1 else b"")
+    return buf.getvalue()
+
+
+def _same_pixels(a, b):
+    from PIL import ImageChops
+    return ImageChops.difference(a, b).getbbox() is None
+
+
+def optimize_png(data, lossy):
+    with Image.open(io.BytesIO(data)) as im:
+        im.load()
+        icc = im.info.get("icc_profile")
+        if im.mode == "RGBA" and im.getextrema()[3] == (255, 255):
+            im = im.convert("RGB")
+        if im.mode in ("RGB", "RGBA"):
+            method = Image.Quantize.FASTOCTREE if im.mode == "RGBA" else Image.Quantize.MEDIANCUT
+            colors = im.getcolors(256)
+            if colors:
+                paletted = im.quantize(len(colors), method=method, dither=Image.Dither.NONE)
+                if _same_pixels(paletted.convert(im.mode), im):
+                    im = paletted
+            elif lossy:
+                im = im.quantize(256, method=method, dither=Image.Dither.FLOYDSTEINBERG)
+        options = {"optimize": True}
+        if icc:
+            options["icc_profile"] = icc
+        if im.mode == "P" and "transparency" in im.info:
+            options["transparency"] = im.info["transparency"]
+        buf = io.BytesIO()
+        im.save(buf, "PNG", **options)
+    return buf.getvalue()
+
+
+def png_to_webp(data, lossy, quality):
+    with Image.open(io.BytesIO(data)) as im:
+        im.load()
+        if im.mode not in ("RGB", "RGBA"):
+            im = im.convert("RGBA" if "A" in im.mode or "transparency" in im.info else "RGB")
+        buf = io.BytesIO()
+        if lossy:
+            im.save(buf, "WEBP", quality=quality, method=6)
+        else:
+            im.save(buf, "WEBP", lossless=True, quality=100, method=6)
+    return buf.getvalue()
+
+
+def settings_key(args):
+    key = "lossy-q%d" % args.quality if args.lossy else "lossless"
+    if args.webp:
+        key += "-webp%d" % args.webp_min_bytes
+    return key
+
+
+_done = set()     # result hashes already produced with these settings
+_expected = {}    # source hash -> result hash
+
+
+def _init_worker(done, expected):
+    global _done, _expected
+    _done, _expected = done, expected
+
+
+def optimize_file(job):
+    """Worker: optimize one image.
+
+    Returns a dict with src, dest, before/after bytes, source and result
+    hashes, and status: "skipped", "kept" (no worthwhile gain) or "written".
+    """
+    src, dest, lossy, quality, webp_min = job
+    data = Path(src).read_bytes()
+    digest = hashlib.sha256(data).hexdigest()
+    result = {"src": src, "dest": dest, "before": len(data), "after": len(data),
+              "source": digest, "result": digest, "status": "skipped"}
+
+    if src == dest and digest in _done:
+        return result
+    # A copy in --out, or the .webp next to a .png kept because it is still
+    # mentioned, that still matches the ledger.
+    if digest in _expected:
+        for candidate in (dest, os.path.splitext(dest)[0] + ".webp"):
+            try:
+                if hashlib.sha256(Path(candidate).read_bytes()).hexdigest() == _expected[digest]:
+                    result.update(dest=candidate, after=os.path.getsize(candidate),
+                                  result=_expected[digest])
+                    return result
+            except OSError:
+                continue
+
+    kind = sniff_type(data[:32])
+    best = data
+    try:
+        if kind == "jpeg":
+            best = optimize_jpeg(data, lossy, quality)
+        elif kind == "png":
+            best = optimize_png(data, lossy)
+            if webp_min and len(data) >= webp_min:
+                webp = png_to_webp(data, lossy, quality)
+                if len(webp) < len(best):
+                    best = webp
+                    dest = os.path.splitext(dest)[0] + ".webp"
+    except (OSError, ValueError) as e:
+        result["status"] = f"error: {e}"
+        return result
+
+    if len(best) > len(data) * (1 - MIN_GAIN):
+        best, dest = data, result["dest"]
+        result["status"] = "kept"
+    else:
+        result["status"] = "written"
+    result.update(dest=dest, after=len(best), result=hashlib.sha256(best).hexdigest())
+
+    if result["status"] == "written" or src != dest:
+        os.makedirs(os.path.dirname(dest) or ".", exist_ok=True)
+        tmp = dest + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(best)
+        os.replace(tmp, dest)
+    return result
+
+
+def load_ledger():
+    try:
+        with open(LEDGER, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_ledger(ledger):
+    os.makedirs(os.path.dirname(LEDGER), exist_ok=True)
+    with open(LEDGER + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(ledger, f, indent=1, sort_keys=True)
+    os.replace(LEDGER + ".tmp", LEDGER)
+
+
+def rewrite_references(root, renames):
+    """Point every reference to a converted .png at its .webp.
+
+    Each candidate URL is resolved against the file it appears in, the way
+    check-links.py does, so relative references and bare file names are
+    found as well as root-relative ones. Returns the files updated.
+    """
+    old = {src for src, _ in renames}
+    updated = 0
+    for path in iter_files(root, REFERENCING):
+        page = site_path(path, root)
+        try:
+            text = path.read_text(encoding="utf-8")
+        except (OSError, UnicodeDecodeError) as e:
+            print(f"Error processing {path}: {e}")
+            continue
+
+        def replace(m):
+            url = m.group(0)
+            if is_external(url) or resolve(url, page, old) is None:
+                return url
+            return url[:-len(".png")] + ".webp"
+
+        new_text = PNG_REFERENCE.sub(replace, text)
+        if new_text != text:
+            write_if_changed(path, new_text)
+            print(f"✓ Updated {path}")
+            updated += 1
+    return updated
+
+
+def read_texts(root):
+    texts = {}
+    for path in iter_files(root, MENTIONING):
+        try:
+            texts[str(path)] = path.read_text(encoding="utf-8")
+        except (OSError, UnicodeDecodeError):
+            continue
+    return texts
+
+
+def still_mentioned(texts, name):
+    """Files that still mention the file name `name`, e.g. in a built-up path."""
+    pattern = re.compile(r"(?<![\w.-])(?:%s|%s)(?![\w.-])" % (re.escape(name), re.escape(quote(name))))
+    return [file for file, text in texts.items() if pattern.search(text)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Losslessly or lossily shrink PNG/JPEG images.")
+    parser.add_argument("paths", nargs="*", default=["assets/images"],
+                        help="files or directories to optimize (default: assets/images)")
+    parser.add_argument("--root", default=".", help="site root (default: current directory)")
+    parser.add_argument("--lossy", action="store_true",
+                        help="re-encode JPEGs at --quality and quantize PNGs")
+    parser.add_argument("--quality", type=int, default=82, help="lossy JPEG/WebP quality (default: 82)")
+    parser.add_argument("--webp", action="store_true", help="convert large PNGs to WebP when smaller")
+    parser.add_argument("--webp-min-bytes", type=int, default=500_000,
+                        help="PNG size from which --webp applies (default: 500000)")
+    parser.add_argument("--out", default=None,
+                        help="write results under this directory instead of in place")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    if not have_pillow():
+        print("✗ Pillow is not installed (pip install Pillow)")
+        return 1
+
+    instrument.start(__file__)
+    root = Path(args.root).resolve()
+    outside = [path for path in args.paths if not Path(path).resolve().is_relative_to(root)]
+    if outside:
+        for path in outside:
+            print(f"✗ {path} is outside the site root {root}")
+        return 1
+    sources = []
+    with instrument.stage("walk"):
+        for path in args.paths:
+            path = Path(path)
+            sources.extend(iter_files(path, SUFFIXES) if path.is_dir() else [path])
+    if not sources:
+        print("No PNG or JPEG files found")
+        return 0
+
+    jobs = []
+    for src in sources:
+        rel = src.resolve().relative_to(root)
+        dest = Path(args.out) / rel if args.out else src
+        jobs.append((str(src), str(dest), args.lossy, args.quality,
+                     args.webp_min_bytes if args.webp else 0))
+
+    key = settings_key(args)
+    ledger = load_ledger()
+    seen = ledger.setdefault(key, {})
+    if JPEGTRAN is None and not args.lossy:
+        print("jpegtran not found; JPEGs only have their metadata stripped")
+
+    by_dir = {}
+    renames = []
+    counts = {"written": 0, "kept": 0, "skipped": 0}
+    errors = 0
+    with instrument.stage("optimize"), \
+            ProcessPoolExecutor(args.workers, initializer=_init_worker,
+                                initargs=(set(seen.values()), seen)) as pool:
+        for r in pool.map(optimize_file, jobs, chunksize=4):
+            if r["status"].startswith("error"):
+                print(f"✗ {r['src']}: {r['status'][7:]}")
+                instrument.count("files.errors")
+                errors += 1
+                continue
+            counts[r["status"]] += 1
+            instrument.count(f"files.{r['status']}")
+            instrument.count("bytes.read", r["before"])
+            if r["status"] == "written":
+                instrument.count("bytes.written", r["after"])
+            seen[r["source"]] = r["result"]
+            stats = by_dir.setdefault(os.path.dirname(r["src"]), [0, 0, 0])
+            stats[0] += r["before"]
+            stats[1] += r["after"]
+            stats[2] += 1
+            if r["status"] == "written":
+                saved = 1 - r["after"] / r["before"]
+                print(f"✓ {r['dest']}: {r['before']:,} -> {r['after']:,} bytes (-{saved:.0%})")
+            if not args.out and r["dest"] != r["src"]:
+                renames.append((Path(r["src"]).resolve().relative_to(root).as_posix(),
+                                Path(r["dest"]).resolve().relative_to(root).as_posix()))
+    save_ledger(ledger)
+
+    print(f"\n{counts['written']} optimized, {counts['kept']} already optimal, "
+          f"{counts['skipped']} unchanged since the last run, {errors} failed ({key})")
+    print(f"\n{'directory':<52} {'files':>5} {'before':>13} {'after':>13} {'saved':>6}")
+    total_before = total_after = 0
+    for directory, (before, after, files) in sorted(by_dir.items()):
+        total_before += before
+        total_after += after
+        print(f"{directory:<52} {files:>5} {before:>13,} {after:>13,} {1 - after / before:>6.1%}")
+    if total_before:
+        print(f"{'total':<52} {sum(s[2] for s in by_dir.values()):>5} "
+              f"{total_before:>13,} {total_after:>13,} {1 - total_after / total_before:>6.1%}")
+
+    if renames:
+        print(f"\nConverted {len(renames)} PNGs to WebP; updating references")
+        with instrument.stage("references"):
+            rewrite_references(root, renames)
+            texts = read_texts(root)
+            for src, _ in renames:
+                mentions = still_mentioned(texts, posixpath.basename(src))
+                if mentions:
+                    print(f"- Kept {src}: still mentioned in {', '.join(mentions[:3])}"
+                          f"{' ...' if len(mentions) > 3 else ''}")
+                else:
+                    os.unlink(root / src)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""Generate the photo contest gallery manifests for every contest year.
+
+Each year's folder (see YEARS) is scanned for image files, and each file
+name is parsed into {title, photographer} entries. The entries are written to:
+
+- `manifest.json` in the year's folder, as before
+- `gallery/<year>.<content hash>.json`, one shard per year, plus a small
+  `gallery/index.json` listing the shards (see sitetools/gallery.py). The
+  slideshow revalidates only the index and caches the shards forever.
+
+Naming convention:
+
+    title_words-photographer_name.ext
+
+That is: use `_` for spaces within the title or photographer, and a
+single `-` to separate title from photographer. Examples:
+
+    eastern_phoebe-joel.jpg                 -> "Eastern Phoebe" / "Joel"
+    what_is_left_of_deer-tyler_kim.jpg      -> "What Is Left Of Deer" / "Tyler Kim"
+
+For backwards compatibility with older filenames that use only `_`,
+the script falls back to splitting on the last underscore:
+
+    barred_owlet_anonymous.png              -> "Barred Owlet" / "Anonymous"
+
+CamelCase titles like `RubyCrownedKinglet-JOEL.jpg` are split on case.
+Photos whose names can't carry a good caption (camera names like
+`IMG_4984-scaled.jpg`) get it from `titles.json` in their folder:
+
+    {"IMG_4984-scaled.jpg": {"title": "2nd Place Adult", "photographer": "Jacob Casbar"}}
+
+When Pillow is installed, each photo also gets resized AVIF/WebP/JPEG
+copies in its folder's `derived/` (orientation applied, EXIF stripped) and
+its manifest entry lists them under `srcset` so the slideshow can load the
+smallest file that fits the screen. Derivatives are keyed by a hash of the
+original, so re-running only encodes new or changed photos. Pass
+--no-derivatives to skip this stage.
+
+Every entry also records `width`, `height` (as displayed, after EXIF
+orientation) and `bytes`, read from the image headers without decoding.
+With Pillow it adds the dominant `color` and a tiny base64 `placeholder`
+the slideshow paints while the full photo loads.
+
+    python3 photocontest/build-manifest.py
+    python3 photocontest/build-manifest.py --year 2026
+"""
+
+import argparse
+import hashlib
+import json
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+IMAGE_EXTS = {".jpg", ".jpeg", ".png", ".webp", ".gif", ".avif"}
+HERE = Path(__file__).resolve().parent
+ROOT = HERE.parent
+# Photo folders relative to the site root, newest first: the order the
+# gallery index lists them in.
+YEARS = [
+    ("2026", "photocontest/2026"),
+    ("2025", "assets/images/winners-2025"),
+]
+GALLERY_DIR = "photocontest/gallery"
+MANIFEST_NAME = "manifest.json"
+TITLES_NAME = "titles.json"
+DERIVED_NAME = "derived"
+
+sys.path.insert(0, str(ROOT))
+from sitetools.files import sha256_file, write_if_changed  # noqa: E402
+from sitetools import images, instrument  # noqa: E402
+from sitetools.gallery import dumps, parse, slug, write_gallery  # noqa: E402
+
+
+def load_cache(path):
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def save_cache(path, cache):
+    path.parent.mkdir(exist_ok=True)
+    path.write_text(json.dumps(cache, indent=2, sort_keys=True) + "\n")
+
+
+def run_jobs(fn, jobs, workers=None):
+    """[fn(*job) for job in jobs], on a process pool when there is more than one."""
+    if len(jobs) < 2:
+        return [fn(*job) for job in jobs]
+    with ProcessPoolExecutor(workers) as pool:
+        return list(pool.map(fn, *zip(*jobs)))
+
+
+def build_derivatives(paths, cache, derived_dir, workers=None):
+    """Bring `cache` ({filename: {key, width, height, srcset}}) up to date for `paths`.
+
+    Photos whose content hash and encoder settings match the cache are not
+    re-encoded; the rest are spread across a process pool.
+    """
+    formats = images.derivative_formats()
+    settings = json.dumps([formats, images.DERIVATIVE_WIDTHS,
+                           images.DERIVATIVE_QUALITY], sort_keys=True)
+    pending = {}
+    for path in paths:
+        key = hashlib.sha256((sha256_file(path) + settings).encode()).hexdigest()
+        cached = cache.get(path.name)
+        if not (cached and cached["key"] == key
+                and all((derived_dir / v["file"]).exists() for v in cached["srcset"])):
+            pending[path] = key
+
+    jobs = [(path, derived_dir, f"{slug(path.stem)}-{key[:8]}", formats)
+            for path, key in pending.items()]
+    for (path, key), (width, height, variants) in zip(
+            pending.items(), run_jobs(images.make_derivatives, jobs, workers)):
+        cache[path.name] = {
+            "key": key,
+            "width": width,
+            "height": height,
+            "srcset": variants,
+        }
+        print(f"  encoded {path.name}: {len(variants)} variants")
+    return cache
+
+
+def prune_derivatives(cache, names, derived_dir):
+    """Forget photos not in `names` and delete derivatives nothing uses."""
+    for name in set(cache) - set(names):
+        del cache[name]
+    keep = {v["file"] for r in cache.values() for v in r["srcset"]}
+    for old in derived_dir.iterdir() if derived_dir.exists() else ():
+        if old.suffix != ".json" and old.name not in keep:
+            old.unlink()
+
+
+def build_placeholders(paths, cache, workers=None):
+    """Bring `cache` ({filename: {stamp, color, placeholder}}) up to date for
+    `paths`, keyed by size and mtime."""
+
+    def stamp(path):
+        st = path.stat()
+        return f"{st.st_size}:{st.st_mtime_ns}"
+
+    pending = [path for path in paths
+               if cache.get(path.name, {}).get("stamp") != stamp(path)]
+    for path, (color, uri) in zip(pending, run_jobs(images.placeholder,
+                                                     [(p,) for p in pending], workers)):
+        cache[path.name] = {"stamp": stamp(path), "color": color, "placeholder": uri}
+    return cache
+
+
+def is_photo(path):
+    return path.suffix.lower() in IMAGE_EXTS
+
+
+class Manifest:
+    """One year's manifest and its caches, kept in memory.
+
+    `update()` and `remove()` touch only the photos given, so a long-running
+    caller (watch.py) pays for one photo per change rather than a rescan.
+    """
+
+    def __init__(self, year, folder, derivatives=True, workers=None):
+        self.year = year
+        self.folder = Path(folder)
+        self.path = self.folder / MANIFEST_NAME
+        self.derived_dir = self.folder / DERIVED_NAME
+        self.derived_cache = self.derived_dir / "cache.json"
+        self.placeholder_cache = self.derived_dir / "placeholders.json"
+        self.use_pillow = images.have_pillow()
+        self.derivatives = derivatives and self.use_pillow
+        self.workers = workers
+        self.derived = load_cache(self.derived_cache) if self.derivatives else {}
+        self.placeholders = load_cache(self.placeholder_cache) if self.use_pillow else {}
+        self.titles = load_cache(self.folder / TITLES_NAME)
+        self.entries = {}
+
+    def owns(self, path):
+        return path.parent == self.folder and is_photo(path)
+
+    def photos(self):
+        return [path for path in self.folder.iterdir() if path.is_file() and is_photo(path)]
+
+    def scan(self):
+        """Rebuild every entry from the photos in the folder."""
+        self.titles = load_cache(self.folder / TITLES_NAME)
+        paths = self.photos()
+        self.entries = {}
+        self.update(paths)
+        names = {path.name for path in paths}
+        for name in set(self.placeholders) - names:
+            del self.placeholders[name]
+        if self.derivatives:
+            prune_derivatives(self.derived, names, self.derived_dir)
+        self.save_caches()
+
+    def update(self, paths):
+        """Add or refresh the entries for `paths`."""
+        paths = sorted(paths, key=lambda p: p.name.lower())
+        if self.use_pillow:
+            build_placeholders(paths, self.placeholders, self.workers)
+        if self.derivatives:
+            build_derivatives(paths, self.derived, self.derived_dir, self.workers)
+        for path in paths:
+            self.entries[path.name] = self.entry(path)
+
+    def remove(self, names):
+        for name in names:
+            self.entries.pop(name, None)
+            self.placeholders.pop(name, None)
+        if self.derivatives:
+            prune_derivatives(self.derived, set(self.entries), self.derived_dir)
+
+    def save_caches(self):
+        if self.derivatives:
+            save_cache(self.derived_cache, self.derived)
+        if self.use_pillow:
+            save_cache(self.placeholder_cache, self.placeholders)
+
+    def entry(self, path):
+        title, photographer = parse(path.stem)
+        entry = {
+            "file": path.name,
+            "title": title,
+            "photographer": photographer,
+        }
+        entry.update(self.titles.get(path.name, {}))
+        size = images.image_size(path)
+        if size:
+            entry["width"], entry["height"] = size
+        entry["bytes"] = path.stat().st_size
+        if path.name in self.placeholders:
+            entry["color"] = self.placeholders[path.name]["color"]
+            entry["placeholder"] = self.placeholders[path.name]["placeholder"]
+        info = self.derived.get(path.name)
+        if info:
+            entry["srcset"] = [{**v, "file": f"{DERIVED_NAME}/{v['file']}"}
+                               for v in info["srcset"]]
+        return entry
+
+    def sorted_entries(self):
+        return [self.entries[name] for name in sorted(self.entries, key=str.lower)]
+
+    def write(self):
+        entries = self.sorted_entries()
+        write_if_changed(self.path, dumps(entries))
+        return entries
+
+
+class Gallery:
+    """Every year's Manifest, plus the sharded index built from them."""
+
+    def __init__(self, root=ROOT, years=YEARS, derivatives=True, workers=None):
+        self.root = Path(root).resolve()
+        self.out_dir = self.root / GALLERY_DIR
+        self.manifests = [Manifest(year, self.root / folder, derivatives, workers)
+                          for year, folder in years if (self.root / folder).is_dir()]
+
+    @property
+    def use_pillow(self):
+        return images.have_pillow()
+
+    def manifest_for(self, path):
+        """The Manifest whose folder `path` is directly in, or None."""
+        return next((m for m in self.manifests if m.folder == path.parent), None)
+
+    def scan(self):
+        for manifest in self.manifests:
+            manifest.scan()
+
+    def write(self):
+        """Write every manifest.json and the gallery shards; return the index."""
+        for manifest in self.manifests:
+            manifest.write()
+        return write_gallery(self.out_dir, [(m.year, m.folder, m.sorted_entries())
+                                            for m in self.manifests])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate the photo contest gallery manifests.")
+    parser.add_argument("--root", default=str(ROOT),
+                        help="site root (default: the directory above this script)")
+    parser.add_argument("--year", action="append", choices=[year for year, _ in YEARS],
+                        help="only rescan this year (default: all); the index still lists every year")
+    parser.add_argument("--no-derivatives", action="store_true",
+                        help="skip writing resized copies into derived/")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="encoder processes (default: CPU count)")
+    args = parser.parse_args()
+
+    instrument.start(__file__)
+    gallery = Gallery(args.root, derivatives=not args.no_derivatives, workers=args.workers)
+    if not gallery.use_pillow:
+        print("Pillow is not installed; skipping placeholders and derivatives (pip install Pillow)")
+    with instrument.stage("scan"):
+        for manifest in gallery.manifests:
+            if args.year and manifest.year not in args.year:
+                # Keep what was last written for the years not rescanned.
+                manifest.entries = {e["file"]: e for e in load_cache(manifest.path) or []}
+                continue
+            manifest.scan()
+            instrument.count("files.scanned", len(manifest.entries))
+    with instrument.stage("write"):
+        index = gallery.write()
+    for manifest, year in zip(gallery.manifests, index["years"]):
+        print(f"{manifest.year}: {year['count']} entries -> "
+              f"{manifest.path.relative_to(gallery.root)}, {GALLERY_DIR}/{year['shard']}")
+        if args.year and manifest.year not in args.year:
+            continue
+        for e in manifest.sorted_entries():
+            print(f"  {e['file']:40s} -> {e['title']!r} / {e['photographer']!r}")
+
+
+if __name__ == "__main__":
+    main()
@@ -25,7 +25,7 @@ module.exports = defineConfig({
   ],
 
   webServer: {
-    command: 'python3 -m http.server 8080',
+    command: 'python3 serve.py --port 8080 --quiet',
     url: 'http://localhost:8080',
     reuseExistingServer: !process.env.CI,
   },
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Write .gz (and, with the `brotli` module installed, .br) siblings for every
+text asset so serve.py or a CDN can send them without compressing per request.
+
+A sibling is only rewritten when its source is newer, compressed copies that
+would not be smaller are skipped, and siblings whose source was deleted are
+removed. Files that did not compress are recorded by size and mtime in
+.cache/precompress.json, so they are not encoded again until they change.
+
+    python3 precompress.py --root dist
+"""
+
+import argparse
+import gzip
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from sitetools import instrument
+from sitetools.files import iter_files
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE = (".html", ".css", ".js", ".mjs", ".json", ".svg", ".xml", ".txt", ".webmanifest")
+MIN_SIZE = 256   # below this the headers cost more than compression saves
+CACHE_VERSION = 1
+
+
+def encoders():
+    yield ".gz", lambda data: gzip.compress(data, compresslevel=9, mtime=0)
+    if brotli is not None:
+        yield ".br", lambda data: brotli.compress(data, quality=11)
+
+
+def up_to_date(source, target):
+    try:
+        return os.stat(target).st_mtime_ns >= os.stat(source).st_mtime_ns
+    except FileNotFoundError:
+        return False
+
+
+def compress_file(job):
+    """Return (path, [size, mtime_ns], {suffix: compressed bytes or None}).
+
+    `incompressible` maps suffixes to the [size, mtime_ns] the source had
+    when that encoding last failed to make it smaller.
+    """
+    path, incompressible = job
+    st = os.stat(path)
+    size, stamp = st.st_size, [st.st_size, st.st_mtime_ns]
+    results = {}
+    data = None
+    for suffix, encode in encoders():
+        target = path + suffix
+        if size < MIN_SIZE:
+            if os.path.exists(target):
+                os.unlink(target)
+            continue
+        if up_to_date(path, target) or incompressible.get(suffix) == stamp:
+            continue
+        if data is None:
+            with open(path, "rb") as f:
+                data = f.read()
+        packed = encode(data)
+        if len(packed) >= size:
+            if os.path.exists(target):
+                os.unlink(target)
+            results[suffix] = None
+            continue
+        tmp = target + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(packed)
+        os.replace(tmp, target)
+        results[suffix] = len(packed)
+    return path, stamp, results
+
+
+def load_cache(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            cache = json.load(f)
+        if cache.get("version") == CACHE_VERSION:
+            return cache["files"]
+    except (OSError, ValueError, KeyError):
+        pass
+    return {}
+
+
+def save_cache(path, entries):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"version": CACHE_VERSION, "files": entries}, f, separators=(",", ":"))
+    os.replace(tmp, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompress text assets.")
+    parser.add_argument("--root", default=".", help="site root (default: current directory)")
+    parser.add_argument("--cache", default=".cache/precompress.json",
+                        help="record of files that do not compress (default: .cache/precompress.json)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    if brotli is None:
+        print("brotli module not installed; writing .gz only (pip install brotli)")
+
+    instrument.start(__file__)
+    with instrument.stage("walk"):
+        sources = [str(p) for p in iter_files(args.root, COMPRESSIBLE)]
+    cache = load_cache(args.cache)
+    incompressible = {}
+    jobs = [(path, cache.get(os.path.abspath(path), {})) for path in sources]
+    written = 0
+    before = after = 0
+    with instrument.stage("compress"), ProcessPoolExecutor(args.workers) as pool:
+        for path, (size, mtime_ns), results in pool.map(compress_file, jobs, chunksize=16):
+            instrument.count("files.scanned")
+            if results:
+                instrument.count("bytes.read", size)
+            recorded = {suffix: stamp for suffix, stamp in cache.get(os.path.abspath(path), {}).items()
+                        if suffix not in results}
+            for suffix, packed in results.items():
+                if packed is None:
+                    recorded[suffix] = [size, mtime_ns]
+                else:
+                    written += 1
+                    instrument.count("files.written")
+                    instrument.count("bytes.written", packed)
+                    if suffix == ".gz":
+                        before += size
+                        after += packed
+            if recorded:
+                incompressible[os.path.abspath(path)] = recorded
+    # Entries for files outside this run's root are kept as they were.
+    inside = os.path.join(os.path.abspath(args.root), "")
+    incompressible.update((path, entry) for path, entry in cache.items() if not path.startswith(inside))
+    save_cache(args.cache, incompressible)
+
+    removed = 0
+    with instrument.stage("prune"):
+        for sibling in iter_files(args.root, (".gz", ".br")):
+            source = Path(str(sibling)[:-3])
+            if source.suffix.lower() in COMPRESSIBLE and not source.exists():
+                sibling.unlink()
+                removed += 1
+
+    print(f"Checked {len(sources)} files, wrote {written} compressed copies, removed {removed} stale")
+    if before:
+        print(f"gzip: {before:,} -> {after:,} bytes for the files rewritten this run")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
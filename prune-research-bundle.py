@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Find the files in the vendored research/ (marimo/Vite) export that no page
+can ever load.
+
+Starting from the research/*.html pages, follows:
+
+- <script src>, <link href> and other URLs in the pages, plus file paths
+  quoted in their inline scripts
+- static `import ... from "./x.js"` / `import "./x.js"` in chunks
+- dynamic `import("./x.js")`, `__vite__mapDeps` preload lists,
+  `new URL("x.wasm", import.meta.url)` and any other quoted string that
+  names a file in the bundle
+- quoted file names in JSON files, such as a web app manifest's icons
+- url() and @import in stylesheets; in an @font-face `src` list only the
+  first URL is fetched by browsers that support it (woff2), so later
+  entries (woff, ttf) are tracked as fallbacks
+
+Anything a quoted string could refer to counts as reachable, so the
+"unreachable" list errs on the side of keeping files. The report splits
+reachable files into eager (loaded by the page itself) and lazy (only via
+dynamic imports), lists the unreachable ones, and with --write-excludes
+writes their site paths for `build-site.py --exclude-list`.
+
+    python3 prune-research-bundle.py
+    python3 prune-research-bundle.py --drop-font-fallbacks --write-excludes .cache/research-excludes.txt
+"""
+
+import argparse
+import os
+import posixpath
+import re
+import sys
+from pathlib import Path
+
+from sitetools import instrument
+from sitetools.html import css_references, font_fallbacks, html_references, site_path
+
+STATIC_IMPORT = re.compile(r"""(?:\bfrom|\bimport)\s*["']([^"'\s]+)["']""")
+DYNAMIC_IMPORT = re.compile(r"""\bimport\s*\(\s*["'`]([^"'`\s]+)["'`]\s*\)""")
+QUOTED_FILE = re.compile(
+    r"""["'`]((?:\.{0,2}/)?[\w@~.\-/]+\.(?:m?js|css|woff2?|ttf|otf|wasm|png|svg|jpe?g|gif|webp|ico|json|webmanifest|md))["'`]""")
+
+# Edge kinds, strongest first.
+EAGER, LAZY, FALLBACK = "eager", "lazy", "fallback"
+
+
+class Bundle:
+    def __init__(self, root, top):
+        self.root = Path(root)
+        self.top = top                       # e.g. "research"
+        self.files = {site_path(os.path.join(d, n), root)
+                      for d, _, names in os.walk(self.root / top)
+                      for n in names if not n.startswith(".")}   # .nojekyll is not ours to judge
+        self.by_name = {}
+        for path in self.files:
+            self.by_name.setdefault(posixpath.basename(path), []).append(path)
+
+    def resolve(self, url, source):
+        """Site path of the bundle file `url` (found in `source`) names, or None."""
+        url = url.split("?", 1)[0].split("#", 1)[0]
+        if not url or re.match(r"[a-z][a-z0-9+.-]*:|//", url, re.I):
+            return None
+        if url.startswith("/"):
+            candidates = [url.lstrip("/")]
+        else:
+            candidates = [posixpath.join(posixpath.dirname(source), url),   # relative to the file
+                          posixpath.join(self.top, url)]                     # relative to the app base
+        for candidate in candidates:
+            candidate = posixpath.normpath(candidate)
+            if candidate in self.files:
+                return candidate
+        # Hashed chunk names are unique: a bare name is enough.
+        matches = self.by_name.get(posixpath.basename(url), [])
+        return matches[0] if len(matches) == 1 and "/" not in url.lstrip("./") else None
+
+    def edges(self, path):
+        """[(target, kind)] for everything `path` may load."""
+        suffix = posixpath.splitext(path)[1].lower()
+        if suffix not in (".html", ".js", ".mjs", ".css", ".json", ".webmanifest"):
+            return []
+        text = (self.root / path).read_text(encoding="utf-8", errors="replace")
+        found = []
+        if suffix == ".html":
+            for url, _line, tag in html_references(text):
+                found.append((url, LAZY if tag == "script-text" else EAGER))
+        elif suffix == ".css":
+            fallbacks = font_fallbacks(text)
+            found.extend((url, FALLBACK if url in fallbacks else EAGER)
+                         for url, _ in css_references(text))
+        elif suffix in (".json", ".webmanifest"):
+            # Web app manifests: icon "src"s and the like.
+            found.extend((url, LAZY) for url in QUOTED_FILE.findall(text))
+        else:
+            found.extend((url, EAGER) for url in STATIC_IMPORT.findall(text))
+            found.extend((url, LAZY) for url in DYNAMIC_IMPORT.findall(text))
+            found.extend((url, LAZY) for url in QUOTED_FILE.findall(text))
+        edges = []
+        for url, kind in found:
+            target = self.resolve(url, path)
+            if target and target != path:
+                edges.append((target, kind))
+        return edges
+
+    def walk(self, entries):
+        """{site path: strongest kind it is reachable by} from `entries`."""
+        rank = {EAGER: 0, LAZY: 1, FALLBACK: 2}
+        reached = {entry: EAGER for entry in entries}
+        queue = list(entries)
+        edges = {}
+        while queue:
+            path = queue.pop()
+            if path not in edges:
+                edges[path] = self.edges(path)
+            for target, kind in edges[path]:
+                # A file loaded lazily makes everything it loads lazy too.
+                if reached[path] != EAGER and kind == EAGER:
+                    kind = reached[path]
+                if target not in reached or rank[kind] < rank[reached[target]]:
+                    reached[target] = kind
+                    queue.append(target)
+        return reached
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report unreachable files in the research/ bundle.")
+    parser.add_argument("--root", default=".", help="site root (default: current directory)")
+    parser.add_argument("--dir", default="research", help="bundle directory (default: research)")
+    parser.add_argument("--entry", action="append", default=None,
+                        help="entry page, relative to --root (default: every .html in --dir)")
+    parser.add_argument("--drop-font-fallbacks", action="store_true",
+                        help="also exclude fonts only listed after the first @font-face src")
+    parser.add_argument("--write-excludes", metavar="FILE",
+                        help="write the unreachable site paths here, one per line")
+    parser.add_argument("--verbose", action="store_true", help="list every unreachable file")
+    args = parser.parse_args()
+
+    instrument.start(__file__)
+    with instrument.stage("scan"):
+        bundle = Bundle(args.root, args.dir.strip("/"))
+    entries = args.entry or sorted(p for p in bundle.files
+                                   if posixpath.dirname(p) == bundle.top and p.endswith(".html"))
+    missing = [e for e in entries if e not in bundle.files]
+    if missing:
+        print(f"✗ Entry pages not found: {', '.join(missing)}")
+        return 1
+    print(f"Entry pages: {', '.join(entries)}")
+    with instrument.stage("walk"):
+        reached = bundle.walk(entries)
+    instrument.count("files.scanned", len(bundle.files))
+    instrument.count("files.reached", len(reached))
+
+    def size(paths):
+        return sum((bundle.root / p).stat().st_size for p in paths)
+
+    groups = {kind: sorted(p for p, k in reached.items() if k == kind)
+              for kind in (EAGER, LAZY, FALLBACK)}
+    unreachable = sorted(bundle.files - set(reached))
+    total = size(bundle.files)
+    print(f"\n{len(bundle.files)} files, {total:,} bytes")
+    print(f"  {len(groups[EAGER]):5d} eager          {size(groups[EAGER]):>13,} bytes")
+    print(f"  {len(groups[LAZY]):5d} lazy only      {size(groups[LAZY]):>13,} bytes")
+    print(f"  {len(groups[FALLBACK]):5d} font fallback  {size(groups[FALLBACK]):>13,} bytes")
+    print(f"  {len(unreachable):5d} unreachable    {size(unreachable):>13,} bytes")
+
+    excluded = unreachable + (groups[FALLBACK] if args.drop_font_fallbacks else [])
+    if unreachable:
+        print("\nUnreachable:")
+        shown = unreachable if args.verbose else unreachable[:25]
+        for path in shown:
+            print(f"  {(bundle.root / path).stat().st_size:>10,}  {path}")
+        if len(shown) < len(unreachable):
+            print(f"  ... and {len(unreachable) - len(shown)} more (--verbose lists all)")
+
+    if args.write_excludes:
+        out = Path(args.write_excludes)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        out.write_text("".join(p + "\n" for p in excluded))
+        print(f"\nWrote {len(excluded)} paths ({size(excluded):,} bytes) to {out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
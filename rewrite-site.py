@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""Apply any combination of the page rewrite tables in one run.
+
+Replaces running update-navigation.py, update-mission-policies-links.py,
+add-favicon.py, fix-github-pages-paths.py and revert-to-root-paths.py one
+after another, with the same result: each file is read once, each table
+rewrites the previous one's output in memory, files are spread across a
+process pool and only changed files are written. The tables apply in the
+order given, except that github-pages and root-paths always go last, so
+the links the other tables write get the base path too.
+
+    python3 rewrite-site.py navigation mission-links favicon
+    python3 rewrite-site.py --root /path/to/mirror --dry-run github-pages
+"""
+
+import argparse
+import sys
+
+from sitetools import instrument
+from sitetools.files import iter_files
+from sitetools.rewrite import RuleSet, rewrite_files
+from sitetools.rules import RULE_SETS
+
+# Rewrite every root-relative link, so they run after the other tables.
+PATH_TABLES = {"github-pages", "root-paths"}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("rule_sets", nargs="+", choices=sorted(RULE_SETS),
+                        metavar="RULE_SET", help=f"one or more of: {', '.join(sorted(RULE_SETS))}")
+    parser.add_argument("--root", default=".", help="site root to rewrite (default: current directory)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--dry-run", action="store_true", help="report changes without writing")
+    args = parser.parse_args()
+
+    if {"github-pages", "root-paths"} <= set(args.rule_sets):
+        parser.error("github-pages and root-paths undo each other; pick one")
+
+    instrument.start(__file__)
+    with instrument.stage("compile"):
+        ruleset = RuleSet([])
+        for name in sorted(dict.fromkeys(args.rule_sets), key=lambda name: name in PATH_TABLES):
+            ruleset += RULE_SETS[name]
+
+    with instrument.stage("walk"):
+        html_files = list(iter_files(args.root))
+    results = rewrite_files(html_files, ruleset, workers=args.workers, dry_run=args.dry_run)
+
+    totals = {}
+    updated_count = 0
+    error_count = 0
+    for result in results:
+        if result.error:
+            print(f"Error processing {result.path}: {result.error}")
+            error_count += 1
+        elif result.changed:
+            print(f"Updated: {result.path}")
+            updated_count += 1
+        for label, n in result.counts.items():
+            totals[label] = totals.get(label, 0) + n
+
+    print(f"\nScanned {len(results)} files, {'would update' if args.dry_run else 'updated'} {updated_count}")
+    for label, n in sorted(totals.items(), key=lambda kv: -kv[1]):
+        print(f"  {n:6d}  {label}")
+    return 1 if error_count else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Local static server that behaves like the production host.
+
+A drop-in replacement for `python3 -m http.server`, used by
+playwright.config.js:
+
+- one thread per connection, HTTP/1.1 keep-alive
+- serves the .br/.gz siblings written by precompress.py when the client
+  accepts them (and they are not older than the original)
+- ETag / If-None-Match and Last-Modified / If-Modified-Since revalidation
+- single-range Range / If-Range requests
+- `Cache-Control: immutable` for content-hashed files, `no-cache` otherwise
+- bodies sent with sendfile(), so file bytes never pass through Python
+- missing paths get the site's 404.html, as on GitHub Pages
+
+    python3 serve.py --port 8080 --directory dist
+"""
+
+import argparse
+import email.utils
+import os
+import re
+import sys
+from functools import partial
+from http import HTTPStatus
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+# bundle-assets.py output, build-manifest.py derivatives and gallery shards
+# carry a hex content hash; Vite's research/ chunks use their own hash alphabet.
+HASHED_NAME = re.compile(r"[.-][0-9a-f]{8,}(?:-\d+)?\.\w+$")
+HASHED_DIRS = ("/assets/bundles/", "/research/assets/")
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+
+class StaticHandler(SimpleHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    extensions_map = {
+        **SimpleHTTPRequestHandler.extensions_map,
+        ".avif": "image/avif",
+        ".webp": "image/webp",
+        ".mjs": "text/javascript",
+        ".js": "text/javascript",
+        ".json": "application/json",
+        ".webmanifest": "application/manifest+json",
+        ".svg": "image/svg+xml",
+    }
+    quiet = False
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+    def do_GET(self):
+        self.serve(send_body=True)
+
+    def do_HEAD(self):
+        self.serve(send_body=False)
+
+    # -- request handling --------------------------------------------------
+
+    def serve(self, send_body):
+        path = self.translate_path(self.path)
+        if os.path.isdir(path):
+            if not self.path.split("?", 1)[0].endswith("/"):
+                self.redirect_to_directory()
+                return
+            index = os.path.join(path, "index.html")
+            if not os.path.isfile(index):
+                # No index: fall back to http.server's directory listing.
+                f = self.send_head()
+                if f:
+                    try:
+                        if send_body:
+                            self.copyfile(f, self.wfile)
+                    finally:
+                        f.close()
+                return
+            path = index
+        if not os.path.isfile(path):
+            self.send_not_found(send_body)
+            return
+
+        st = os.stat(path)
+        ctype = self.guess_type(path)
+        etag = f'"{st.st_size:x}-{st.st_mtime_ns:x}"'
+        last_modified = email.utils.formatdate(st.st_mtime, usegmt=True)
+
+        encoding, body_path = self.choose_encoding(path, st)
+        if encoding:
+            etag = f'{etag[:-1]}-{encoding}"'
+
+        if self.not_modified(etag, st):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_validators(path, etag, last_modified, encoding)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        size = os.path.getsize(body_path)
+        start, end = 0, size - 1
+        status = HTTPStatus.OK
+        byte_range = self.requested_range(etag, last_modified)
+        if byte_range is not None and not encoding:
+            parsed = parse_range(byte_range, size)
+            if parsed is None:
+                self.send_response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+                self.send_header("Content-Range", f"bytes */{size}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            if parsed != (0, size - 1):
+                start, end = parsed
+                status = HTTPStatus.PARTIAL_CONTENT
+
+        self.send_response(status)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(end - start + 1))
+        self.send_header("Accept-Ranges", "bytes")
+        if status == HTTPStatus.PARTIAL_CONTENT:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        self.send_validators(path, etag, last_modified, encoding)
+        self.end_headers()
+
+        if send_body and end >= start:
+            with open(body_path, "rb") as f:
+                self.wfile.flush()
+                self.connection.sendfile(f, start, end - start + 1)
+
+    def redirect_to_directory(self):
+        parts = self.path.split("?", 1)
+        location = parts[0] + "/" + ("?" + parts[1] if len(parts) > 1 else "")
+        self.send_response(HTTPStatus.MOVED_PERMANENTLY)
+        self.send_header("Location", location)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def send_not_found(self, send_body):
+        page = os.path.join(self.directory, "404.html")
+        if not os.path.isfile(page):
+            self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+            return
+        with open(page, "rb") as f:
+            body = f.read()
+        self.send_response(HTTPStatus.NOT_FOUND)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", REVALIDATE)
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def choose_encoding(self, path, st):
+        accepted = parse_accept_encoding(self.headers.get("Accept-Encoding", ""))
+        for name, suffix in ENCODINGS:
+            if accepted.get(name, 0) <= 0:
+                continue
+            candidate = path + suffix
+            try:
+                if os.stat(candidate).st_mtime_ns >= st.st_mtime_ns:
+                    return name, candidate
+            except FileNotFoundError:
+                continue
+        return None, path
+
+    def has_precompressed(self, path):
+        return any(os.path.exists(path + suffix) for _, suffix in ENCODINGS)
+
+    def send_validators(self, path, etag, last_modified, encoding):
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", last_modified)
+        self.send_header("Cache-Control", IMMUTABLE if is_hashed(self.path) else REVALIDATE)
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
+        if encoding or self.has_precompressed(path):
+            self.send_header("Vary", "Accept-Encoding")
+
+    def not_modified(self, etag, st):
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is not None:
+            tags = [t.strip() for t in if_none_match.split(",")]
+            return "*" in tags or etag in tags or f"W/{etag}" in tags
+        if_modified_since = self.headers.get("If-Modified-Since")
+        if if_modified_since:
+            try:
+                since = email.utils.parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+            return int(st.st_mtime) <= since
+        return False
+
+    def requested_range(self, etag, last_modified):
+        byte_range = self.headers.get("Range")
+        if byte_range is None:
+            return None
+        if_range = self.headers.get("If-Range")
+        if if_range and if_range not in (etag, last_modified):
+            return None   # the client's partial copy is stale: send everything
+        return byte_range
+
+
+def is_hashed(url):
+    """True for URLs whose name changes whenever their content does."""
+    path = url.split("?", 1)[0]
+    return path.startswith(HASHED_DIRS) or bool(HASHED_NAME.search(path))
+
+
+def parse_accept_encoding(header):
+    """{'gzip': 1.0, 'br': 0.0, ...} from an Accept-Encoding header."""
+    accepted = {}
+    for item in header.split(","):
+        name, _, params = item.strip().partition(";")
+        if not name:
+            continue
+        q = 1.0
+        m = re.search(r"q=([0-9.]+)", params)
+        if m:
+            try:
+                q = float(m.group(1))
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+    if "*" in accepted:
+        for name, _ in ENCODINGS:
+            accepted.setdefault(name, accepted["*"])
+    return accepted
+
+
+def parse_range(header, size):
+    """(start, end) for a single `bytes=` range, or None if unsatisfiable."""
+    m = re.fullmatch(r"\s*bytes=(\d*)-(\d*)\s*", header)
+    if not m or size == 0:
+        return None
+    first, last = m.groups()
+    if not first:
+        if not last:
+            return None
+        length = int(last)
+        return (max(0, size - length), size - 1) if length else None
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return None
+    return start, end
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the site like production does.")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--bind", default="127.0.0.1")
+    parser.add_argument("--directory", default=".", help="site root (default: current directory)")
+    parser.add_argument("--quiet", action="store_true", help="don't log each request")
+    args = parser.parse_args()
+
+    StaticHandler.quiet = args.quiet
+    handler = partial(StaticHandler, directory=os.path.abspath(args.directory))
+    ThreadingHTTPServer.daemon_threads = True
+    with ThreadingHTTPServer((args.bind, args.port), handler) as httpd:
+        print(f"Serving {args.directory} at http://{args.bind}:{args.port}/")
+        try:
+            httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,5 @@
+"""Shared helpers for the site maintenance scripts in the repository root.
+
+The scripts themselves stay as small `*.py` commands next to the pages they
+edit; anything two or more of them need lives here.
+"""
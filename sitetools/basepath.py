@@ -0,0 +1,79 @@
+"""Rendering root-relative URLs for a deploy base path.
+
+The sources use root-relative URLs (`/assets/css/main.css`). Deploying under
+a sub-path such as GitHub Pages' `/dncweb` needs every one of them prefixed;
+deploying at a domain root needs any prefix removed. Unlike the blind
+search/replace of fix-github-pages-paths.py and revert-to-root-paths.py,
+only URL positions are touched: URL attributes (including each srcset
+candidate) in HTML and in JS template strings, and url()/@import in CSS.
+"""
+
+import re
+
+from .rules import BASE_PATH
+
+URL_ATTR = re.compile(
+    r"""(\b(?:href|src|action|poster|data|formaction)\s*=\s*)(["'])(/(?!/)[^"']*)\2""", re.I)
+SRCSET_ATTR = re.compile(r"""(\b(?:srcset|imagesrcset)\s*=\s*)(["'])([^"']*)\2""", re.I)
+CSS_URL = re.compile(r"""(url\(\s*)(["']?)(/(?!/)[^"')]*)\2(\s*\))""")
+CSS_IMPORT = re.compile(r"""(@import\s+)(["'])(/(?!/)[^"']*)\2""")
+
+# Which URL positions are rewritten in each kind of file.
+KINDS = {
+    ".html": ("attrs", "css"),
+    ".htm": ("attrs", "css"),
+    ".css": ("css",),
+    ".js": ("attrs",),
+    ".mjs": ("attrs",),
+}
+
+
+class BasePath:
+    """Re-roots URLs from `strip` (the base path sources may already carry)
+    onto `base_path`. Either may be empty."""
+
+    def __init__(self, base_path, strip=BASE_PATH):
+        self.base_path = base_path.rstrip("/")
+        self.strip = strip.rstrip("/")
+
+    def url(self, url):
+        if self.strip and (url == self.strip or url.startswith(self.strip + "/")):
+            url = url[len(self.strip):] or "/"
+        return self.base_path + url
+
+    def apply(self, text, suffix):
+        """Return (new_text, number of URLs changed) for a file with `suffix`."""
+        changed = 0
+
+        def attr(m):
+            nonlocal changed
+            new = self.url(m.group(3))
+            changed += new != m.group(3)
+            return f"{m.group(1)}{m.group(2)}{new}{m.group(2)}"
+
+        def srcset(m):
+            nonlocal changed
+            candidates = []
+            for candidate in m.group(3).split(","):
+                stripped = candidate.lstrip()
+                if stripped.startswith("/") and not stripped.startswith("//"):
+                    new = self.url(stripped)
+                    changed += new != stripped
+                    candidate = candidate[:len(candidate) - len(stripped)] + new
+                candidates.append(candidate)
+            return f"{m.group(1)}{m.group(2)}{','.join(candidates)}{m.group(2)}"
+
+        def css_url(m):
+            nonlocal changed
+            new = self.url(m.group(3))
+            changed += new != m.group(3)
+            return f"{m.group(1)}{m.group(2)}{new}{m.group(2)}{m.group(4)}"
+
+        kinds = KINDS.get(suffix.lower(), ())
+        if "attrs" in kinds:
+            text = URL_ATTR.sub(attr, text)
+            text = SRCSET_ATTR.sub(srcset, text)
+        if "css" in kinds:
+            text = CSS_URL.sub(css_url, text)
+            text = CSS_IMPORT.sub(attr, text)
+        return text, changed
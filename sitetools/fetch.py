@@ -0,0 +1,375 @@
+"""In-process, concurrent asset downloader.
+
+    downloader = Downloader(cache_dir=".cache/downloads", workers=8)
+    results = downloader.download_all([(url, dest), ...])
+
+- Each unique URL is fetched once and copied to every destination that
+  wants it.
+- Worker threads keep one keep-alive connection per host, so a batch of
+  downloads from the same site reuses a handful of TCP/TLS sessions.
+- Responses are cached under `cache_dir` together with their ETag and
+  Last-Modified headers; the next run sends a conditional GET and a 304
+  costs no body transfer.
+- Bodies stream into a `.part` file that is resumed with a Range request if
+  a previous run was interrupted, and destinations are replaced atomically.
+  A `.part` the server will not resume (416, e.g. one that already holds
+  the whole body) is dropped and the URL fetched again in full.
+- With `expect={"png"}` (or any sniff_type() names) a body whose magic bytes
+  do not match is rejected instead of being written out.
+
+`stream_all([(url, feed)])` fetches pages through the same pool and cache
+but hands each body to `feed(chunk)` as it arrives, so a parser can work
+while the rest is still downloading; a 304 replays the cached copy.
+`expect` only applies to download_all().
+
+Only the standard library is used, and plain `http://` URLs work, so tests
+can point the downloader at a local `http.server`.
+"""
+
+import hashlib
+import http.client
+import json
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from urllib.parse import urljoin, urlsplit
+
+from .images import SNIFF_BYTES, sniff_type
+
+USER_AGENT = "dncweb-downloader/1.0"
+MAX_REDIRECTS = 5
+CHUNK_SIZE = 64 * 1024
+
+
+class DownloadError(Exception):
+    pass
+
+
+@dataclass
+class DownloadResult:
+    url: str
+    dests: list
+    status: str = ""          # "downloaded", "resumed", "not-modified", "failed"
+    bytes: int = 0            # body bytes transferred over the network
+    kind: str = ""            # sniffed image type, if any
+    error: str = ""
+
+    @property
+    def ok(self):
+        return self.status != "failed"
+
+
+def atomic_write_from(src, dest):
+    """Copy `src` to `dest` via a temp file in the destination directory."""
+    dest = os.fspath(dest)
+    directory = os.path.dirname(dest) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as out, open(src, "rb") as f:
+            shutil.copyfileobj(f, out, CHUNK_SIZE)
+        os.replace(tmp, dest)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def _same_file_contents(a, b):
+    try:
+        if os.path.getsize(a) != os.path.getsize(b):
+            return False
+    except OSError:
+        return False
+    with open(a, "rb") as fa, open(b, "rb") as fb:
+        while True:
+            ca, cb = fa.read(CHUNK_SIZE), fb.read(CHUNK_SIZE)
+            if ca != cb:
+                return False
+            if not ca:
+                return True
+
+
+class _ConnectionPool:
+    """Per-thread keep-alive connections, one per (scheme, host, port)."""
+
+    def __init__(self, timeout):
+        self.timeout = timeout
+        self._local = threading.local()
+        self._all = []
+        self._lock = threading.Lock()
+
+    def get(self, scheme, netloc):
+        conns = getattr(self._local, "conns", None)
+        if conns is None:
+            conns = self._local.conns = {}
+        key = (scheme, netloc)
+        conn = conns.get(key)
+        if conn is None:
+            cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+            conn = conns[key] = cls(netloc, timeout=self.timeout)
+            with self._lock:
+                self._all.append(conn)
+        return conn
+
+    def discard(self, scheme, netloc):
+        conns = getattr(self._local, "conns", {})
+        conn = conns.pop((scheme, netloc), None)
+        if conn is not None:
+            conn.close()
+
+    def reset(self):
+        """Drop this thread's connections, e.g. after a half-read response."""
+        for conn in getattr(self._local, "conns", {}).values():
+            conn.close()
+        self._local.conns = {}
+
+    def close(self):
+        with self._lock:
+            for conn in self._all:
+                conn.close()
+            self._all.clear()
+
+
+class Downloader:
+    def __init__(self, cache_dir=".cache/downloads", workers=8, timeout=30,
+                 expect=None, user_agent=USER_AGENT):
+        self.cache_dir = os.fspath(cache_dir)
+        self.workers = workers
+        self.expect = set(expect) if expect else None
+        self.user_agent = user_agent
+        self._pool = _ConnectionPool(timeout)
+        self._index_path = os.path.join(self.cache_dir, "index.json")
+        self._index_lock = threading.Lock()
+        self._index = self._load_index()
+
+    # -- cache bookkeeping -------------------------------------------------
+
+    def _load_index(self):
+        try:
+            with open(self._index_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp = self._index_path + ".tmp"
+        with self._index_lock:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self._index, f, indent=2, sort_keys=True)
+        os.replace(tmp, self._index_path)
+
+    def _object_path(self, url):
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, "objects", key)
+
+    # -- HTTP --------------------------------------------------------------
+
+    def _request(self, url, headers):
+        """GET `url`, following redirects. Returns (response, final_url).
+
+        The caller must read the response to the end (or close it) before
+        the thread issues another request on the same connection.
+        """
+        for _ in range(MAX_REDIRECTS + 1):
+            parts = urlsplit(url)
+            if parts.scheme not in ("http", "https"):
+                raise DownloadError(f"unsupported URL scheme: {url}")
+            path = parts.path or "/"
+            if parts.query:
+                path += "?" + parts.query
+            all_headers = {"User-Agent": self.user_agent, "Accept-Encoding": "identity"}
+            all_headers.update(headers)
+            for attempt in (0, 1):
+                conn = self._pool.get(parts.scheme, parts.netloc)
+                try:
+                    conn.request("GET", path, headers=all_headers)
+                    response = conn.getresponse()
+                    break
+                except (http.client.RemoteDisconnected, ConnectionError,
+                        http.client.CannotSendRequest, http.client.ResponseNotReady):
+                    # A pooled keep-alive connection went stale; retry once fresh.
+                    self._pool.discard(parts.scheme, parts.netloc)
+                    if attempt:
+                        raise
+            if response.status in (301, 302, 303, 307, 308):
+                location = response.getheader("Location")
+                response.read()
+                if not location:
+                    raise DownloadError(f"HTTP {response.status} without Location")
+                url = urljoin(url, location)
+                continue
+            return response, url
+        raise DownloadError(f"too many redirects for {url}")
+
+    def _replay(self, path, feed):
+        with open(path, "rb") as f:
+            while True:
+                chunk = f.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                feed(chunk)
+
+    def _discard_part(self, url, part):
+        if os.path.exists(part):
+            os.unlink(part)
+        with self._index_lock:
+            entry = self._index.get(url)
+            if entry:
+                entry.pop("partial_etag", None)
+                entry.pop("partial_last_modified", None)
+
+    def _fetch(self, url, feed=None):
+        """Bring the cached copy of `url` up to date. Returns (status, bytes).
+
+        With `feed`, the whole body is also passed to it in order, chunk by
+        chunk: the cached or resumed part from disk, then the network.
+        """
+        obj = self._object_path(url)
+        part = obj + ".part"
+        with self._index_lock:
+            meta = dict(self._index.get(url, {}))
+
+        headers = {}
+        if os.path.exists(obj):
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+        offset = os.path.getsize(part) if os.path.exists(part) else 0
+        validator = meta.get("partial_etag") or meta.get("partial_last_modified")
+        if offset and validator:
+            headers["Range"] = f"bytes={offset}-"
+            headers["If-Range"] = validator
+        else:
+            offset = 0
+
+        response, _ = self._request(url, headers)
+        try:
+            if response.status == 304:
+                response.read()
+                if feed:
+                    self._replay(obj, feed)
+                return "not-modified", 0
+            if response.status == 206 and offset:
+                mode, status = "ab", "resumed"
+            elif response.status == 200:
+                mode, status, offset = "wb", "downloaded", 0
+            elif offset:
+                # The server won't resume the .part: start over once without it.
+                response.read()
+                self._discard_part(url, part)
+                return self._fetch(url, feed)
+            else:
+                response.read()
+                raise DownloadError(f"HTTP {response.status} {response.reason}")
+
+            etag = response.getheader("ETag")
+            last_modified = response.getheader("Last-Modified")
+            with self._index_lock:
+                entry = self._index.setdefault(url, {})
+                entry["partial_etag"] = etag
+                entry["partial_last_modified"] = last_modified
+            os.makedirs(os.path.dirname(part), exist_ok=True)
+            if feed and mode == "ab":
+                self._replay(part, feed)
+            received = 0
+            with open(part, mode) as f:
+                while True:
+                    chunk = response.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    f.write(chunk)
+                    received += len(chunk)
+                    if feed:
+                        feed(chunk)
+            expected = response.getheader("Content-Length")
+            if expected is not None and received != int(expected):
+                raise DownloadError(f"short read: {received} of {expected} bytes")
+        finally:
+            response.close()
+
+        with open(part, "rb") as f:
+            kind = sniff_type(f.read(SNIFF_BYTES))
+        if self.expect and not feed and kind not in self.expect:
+            os.unlink(part)
+            with self._index_lock:
+                self._index.pop(url, None)
+            raise DownloadError(
+                f"not a {'/'.join(sorted(self.expect))} image (got {kind or 'unknown data'})")
+        os.replace(part, obj)
+        with self._index_lock:
+            self._index[url] = {
+                "etag": etag,
+                "last_modified": last_modified,
+                "size": os.path.getsize(obj),
+                "kind": kind,
+            }
+        return status, received
+
+    def _download(self, url, dests):
+        result = DownloadResult(url, list(dests))
+        try:
+            result.status, result.bytes = self._fetch(url)
+            with self._index_lock:
+                result.kind = self._index.get(url, {}).get("kind") or ""
+            obj = self._object_path(url)
+            for dest in dests:
+                if not _same_file_contents(obj, dest):
+                    atomic_write_from(obj, dest)
+        except (OSError, http.client.HTTPException, DownloadError) as e:
+            self._pool.reset()
+            result.status = "failed"
+            result.error = str(e) or e.__class__.__name__
+        return result
+
+    def _stream(self, url, feeds):
+        def feed(chunk):
+            for f in feeds:
+                f(chunk)
+
+        result = DownloadResult(url, [])
+        try:
+            result.status, result.bytes = self._fetch(url, feed)
+        except (OSError, http.client.HTTPException, DownloadError) as e:
+            self._pool.reset()
+            result.status = "failed"
+            result.error = str(e) or e.__class__.__name__
+        return result
+
+    def download_all(self, downloads):
+        """Fetch every (url, dest) pair; returns one DownloadResult per unique URL."""
+        targets = {}
+        for url, dest in downloads:
+            targets.setdefault(url, []).append(dest)
+        try:
+            with ThreadPoolExecutor(self.workers) as executor:
+                futures = [executor.submit(self._download, url, dests)
+                           for url, dests in targets.items()]
+                return [f.result() for f in futures]
+        finally:
+            self._pool.close()
+            self._save_index()
+
+    def stream_all(self, pages):
+        """Fetch every (url, feed) pair, calling feed(chunk) with the body as it
+        arrives; returns one DownloadResult per unique URL.
+
+        Each URL's feeds are called from one worker thread, in body order.
+        A failed result's feeds may have seen part of the body.
+        """
+        targets = {}
+        for url, feed in pages:
+            targets.setdefault(url, []).append(feed)
+        try:
+            with ThreadPoolExecutor(self.workers) as executor:
+                futures = [executor.submit(self._stream, url, feeds)
+                           for url, feeds in targets.items()]
+                return [f.result() for f in futures]
+        finally:
+            self._pool.close()
+            self._save_index()
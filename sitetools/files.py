@@ -0,0 +1,44 @@
+"""Walking and hashing files in the site tree."""
+
+import hashlib
+import os
+from pathlib import Path
+
+SKIP_DIRS = {"node_modules"}
+
+
+def iter_files(root, suffixes=(".html",)):
+    """Yield files under `root` whose suffix is in `suffixes`, sorted.
+
+    Hidden directories (`.git`, `.github`, ...) and node_modules are skipped,
+    matching what add-favicon.py always did.
+    """
+    suffixes = tuple(s.lower() for s in suffixes)
+    for dirpath, dirs, files in os.walk(root):
+        dirs[:] = sorted(d for d in dirs if not d.startswith(".") and d not in SKIP_DIRS)
+        for name in sorted(files):
+            if name.lower().endswith(suffixes):
+                yield Path(dirpath) / name
+
+
+def sha256_file(path, chunk_size=1 << 20):
+    """Hex SHA-256 of a file, read in chunks."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def write_if_changed(path, text):
+    """Write `text` to `path` unless it already holds exactly that."""
+    path = Path(path)
+    try:
+        if path.read_text(encoding="utf-8") == text:
+            return False
+    except OSError:
+        pass
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)
+    return True
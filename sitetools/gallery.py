@@ -0,0 +1,81 @@
+"""Photo gallery entries: file name parsing and the sharded multi-year index.
+
+Each contest year's entries are written to their own shard,
+`<year>.<content hash>.json`, next to a small `index.json` listing the
+shards. Shard names change whenever their contents do, so they can be
+cached forever (serve.py already marks hashed names immutable); only the
+index needs revalidating, and a page fetches just the shard it shows.
+"""
+
+import hashlib
+import json
+import posixpath
+import re
+from pathlib import Path
+
+from .files import write_if_changed
+
+INDEX_NAME = "index.json"
+SHARD_NAME = re.compile(r"^(?P<year>[^.]+)\.[0-9a-f]{12}\.json$")
+
+
+def split_camel(s: str) -> str:
+    s = re.sub(r"(?<=[a-z])(?=[A-Z])", " ", s)
+    s = re.sub(r"(?<=[A-Z])(?=[A-Z][a-z])", " ", s)
+    return s
+
+
+def pretty(s: str) -> str:
+    s = re.sub(r"[_\-]+", " ", s).strip()
+    s = split_camel(s)
+    s = re.sub(r"\s+", " ", s)
+    return s.title()
+
+
+def parse(stem: str):
+    """(title, photographer) from a `title_words-photographer_name` stem."""
+    # Prefer `-` as the explicit title/photographer boundary so that
+    # photographer names with spaces (encoded as `_`) work correctly.
+    # Fall back to splitting on the last `_` for older filenames.
+    if "-" in stem:
+        title_part, photog_part = stem.rsplit("-", 1)
+    elif "_" in stem:
+        title_part, photog_part = stem.rsplit("_", 1)
+    else:
+        title_part, photog_part = stem, ""
+    return pretty(title_part), pretty(photog_part)
+
+
+def slug(stem: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", stem.lower()).strip("-") or "photo"
+
+
+def dumps(data):
+    return json.dumps(data, indent=2) + "\n"
+
+
+def write_gallery(out_dir, years):
+    """Write one shard per year plus index.json into `out_dir`.
+
+    `years` is [(year, photo folder, entries)], newest first; entry `file`
+    paths stay relative to the photo folder, whose URL relative to the index
+    is recorded as `base`. Shards no longer listed are deleted. Returns the
+    index.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    index = {"years": []}
+    for year, folder, entries in years:
+        text = dumps(entries)
+        name = f"{year}.{hashlib.sha256(text.encode()).hexdigest()[:12]}.json"
+        write_if_changed(out_dir / name, text)
+        base = posixpath.relpath(Path(folder).resolve().as_posix(), out_dir.resolve().as_posix())
+        index["years"].append({"year": year, "shard": name, "base": base + "/",
+                               "count": len(entries)})
+    write_if_changed(out_dir / INDEX_NAME, dumps(index))
+
+    current = {y["shard"] for y in index["years"]}
+    for old in out_dir.iterdir():
+        if SHARD_NAME.match(old.name) and old.name not in current:
+            old.unlink()
+    return index
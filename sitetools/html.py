@@ -0,0 +1,188 @@
+"""Extracting and resolving the URLs a page or stylesheet refers to."""
+
+import os
+import posixpath
+import re
+from html.parser import HTMLParser
+from urllib.parse import unquote, urlsplit
+
+from .rules import BASE_PATH
+
+URL_ATTRS = {
+    "a": ("href",),
+    "link": ("href",),
+    "script": ("src",),
+    "img": ("src", "srcset"),
+    "source": ("src", "srcset"),
+    "audio": ("src",),
+    "video": ("src", "poster"),
+    "track": ("src",),
+    "iframe": ("src",),
+    "embed": ("src",),
+    "object": ("data",),
+    "image": ("href", "xlink:href"),
+    "use": ("href", "xlink:href"),
+}
+# <meta property="og:image" content="..."> and friends
+META_URL_NAMES = {"og:image", "og:audio", "og:video", "twitter:image"}
+
+CSS_URL = re.compile(r"""url\(\s*(['"]?)([^'")]+?)\1\s*\)""")
+CSS_IMPORT = re.compile(r"""@import\s+(['"])([^'"]+)\1""")
+FONT_FACE = re.compile(r"@font-face\s*\{[^}]*\}", re.I)
+FONT_SRC = re.compile(r"\bsrc\s*:\s*([^;}]*)", re.I)
+# Quoted strings in scripts/JSON that look like a path to a file.
+SCRIPT_PATH = re.compile(
+    r"""["'`]((?:\.{0,2}/)?[\w@%~.-][\w@%~. -]*(?:/[\w@%~. -]+)*\.(?:png|jpe?g|gif|webp|avif|svg|ico|mp3|mp4|mov|webm|pdf|css|js|mjs|json|woff2?|ttf|otf|html))["'`]""",
+    re.I,
+)
+
+
+def split_srcset(value):
+    """The URLs in a srcset attribute, without their width/density descriptors."""
+    urls = []
+    for candidate in value.split(","):
+        candidate = candidate.strip()
+        if candidate:
+            urls.append(candidate.split()[0])
+    return urls
+
+
+def css_references(text, line=1):
+    """[(url, line)] for every url() and @import in a stylesheet."""
+    refs = []
+    for pattern in (CSS_URL, CSS_IMPORT):
+        for m in pattern.finditer(text):
+            refs.append((m.group(2).strip(), line + text.count("\n", 0, m.start())))
+    return refs
+
+
+def font_fallbacks(text):
+    """URLs listed after the first in an @font-face `src`.
+
+    Browsers fetch the first format they support - woff2 everywhere that
+    matters - so the later entries (woff, ttf) are never downloaded.
+    """
+    fallbacks = set()
+    for block in FONT_FACE.findall(text):
+        for src in FONT_SRC.findall(block):
+            urls = [m.group(2).strip() for m in CSS_URL.finditer(src)]
+            fallbacks.update(urls[1:])
+    return fallbacks
+
+
+def script_references(text, line=1):
+    """[(path, line)] for quoted strings in a script that look like file paths."""
+    return [(m.group(1), line + text.count("\n", 0, m.start()))
+            for m in SCRIPT_PATH.finditer(text)]
+
+
+class ReferenceExtractor(HTMLParser):
+    """Collects every URL an HTML document loads or links to.
+
+    `refs` holds (url, line, tag) tuples. References found only by scanning
+    inline scripts get tag "script-text"; callers treat them as hints
+    rather than hard links.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.refs = []
+        self._raw = None          # "style" or "script" while inside one
+        self._raw_line = 0
+        self._raw_text = []
+
+    def add(self, url, tag):
+        if url:
+            self.refs.append((url.strip(), self.getpos()[0], tag))
+
+    def handle_starttag(self, tag, attrs):
+        attrs_dict = dict(attrs)
+        for attr in URL_ATTRS.get(tag, ()):
+            value = attrs_dict.get(attr)
+            if not value:
+                continue
+            if attr == "srcset":
+                for url in split_srcset(value):
+                    self.add(url, tag)
+            else:
+                self.add(value, tag)
+        if tag == "meta" and (attrs_dict.get("property") or attrs_dict.get("name")) in META_URL_NAMES:
+            self.add(attrs_dict.get("content"), tag)
+        style = attrs_dict.get("style")
+        if style:
+            for url, _ in css_references(style):
+                self.add(url, "style")
+        if tag in ("style", "script") and not attrs_dict.get("src"):
+            self._raw = tag
+            self._raw_line = self.getpos()[0]
+            self._raw_text = []
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag in ("style", "script"):
+            self._raw = None
+
+    def handle_data(self, data):
+        if self._raw:
+            self._raw_text.append(data)
+
+    def handle_endtag(self, tag):
+        if self._raw and tag == self._raw:
+            text = "".join(self._raw_text)
+            if tag == "style":
+                found = [(url, line, "style") for url, line in css_references(text, self._raw_line)]
+            else:
+                found = [(url, line, "script-text")
+                         for url, line in script_references(text, self._raw_line)]
+            self.refs.extend(found)
+            self._raw = None
+
+
+def html_references(text):
+    parser = ReferenceExtractor()
+    parser.feed(text)
+    parser.close()
+    return parser.refs
+
+
+def is_external(url):
+    """True for URLs that never resolve to a file in this tree."""
+    if not url or url.startswith(("#", "//", "data:", "mailto:", "tel:", "javascript:")):
+        return True
+    return bool(re.match(r"[a-zA-Z][a-zA-Z0-9+.-]*:", url))
+
+
+def resolve(url, page, files, base_path=BASE_PATH):
+    """Resolve `url`, found in site-relative `page`, against the set `files`.
+
+    Root-relative URLs are tried both as-is and with `base_path` stripped,
+    so a tree can be checked before or after fix-github-pages-paths.py.
+    Directory URLs resolve to their index.html. Returns the site-relative
+    path of the target, or None if nothing matches. External URLs must be
+    filtered out with is_external() first.
+    """
+    path = unquote(urlsplit(url).path)
+    if not path:
+        return page   # "?query" or "#fragment" on the page itself
+    if path.startswith("/"):
+        candidates = [path]
+        if base_path and (path == base_path or path.startswith(base_path + "/")):
+            candidates.append(path[len(base_path):] or "/")
+    else:
+        candidates = [posixpath.join("/" + posixpath.dirname(page), path)]
+    for candidate in candidates:
+        normalized = posixpath.normpath(candidate).lstrip("/")
+        if normalized == ".":
+            normalized = ""
+        for target in (normalized,
+                       posixpath.join(normalized, "index.html"),
+                       normalized + ".html"):
+            target = target.lstrip("/")
+            if target in files:
+                return target
+    return None
+
+
+def site_path(path, root):
+    """`path` relative to `root`, with forward slashes."""
+    return os.path.relpath(path, root).replace(os.sep, "/")
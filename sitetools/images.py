@@ -0,0 +1,332 @@
+"""Image file helpers: type sniffing, header parsing and responsive derivatives."""
+
+import base64
+import io
+import os
+import struct
+
+# Enough leading bytes for sniff_type() to recognise every supported format.
+SNIFF_BYTES = 32
+
+
+def sniff_type(head: bytes):
+    """Return 'png', 'jpeg', 'gif', 'webp' or 'avif' from a file's first bytes.
+
+    Returns None for anything else (HTML error pages, truncated files, ...).
+    """
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if head.startswith(b"\xff\xd8\xff"):
+        return "jpeg"
+    if head[:6] in (b"GIF87a", b"GIF89a"):
+        return "gif"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    if head[4:8] == b"ftyp" and (b"avif" in head[8:] or b"avis" in head[8:]):
+        return "avif"
+    return None
+
+
+def sniff_file(path):
+    with open(path, "rb") as f:
+        return sniff_type(f.read(SNIFF_BYTES))
+
+
+# -- Dimensions from headers --------------------------------------------------
+#
+# Only the bytes needed to find the size are read, so this stays fast on
+# multi-megabyte photos. Sizes are reported as displayed, i.e. after EXIF
+# orientation (JPEG) or irot (AVIF) has been applied.
+
+def image_size(path):
+    """Return (width, height) of an image file, or None if it can't be read."""
+    try:
+        with open(path, "rb") as f:
+            head = f.read(SNIFF_BYTES)
+            kind = sniff_type(head)
+            f.seek(0)
+            reader = _SIZE_READERS.get(kind)
+            return reader(f) if reader else None
+    except (OSError, ValueError, IndexError, struct.error):
+        return None
+
+
+def _png_size(f):
+    data = f.read(24)
+    if data[12:16] != b"IHDR":
+        return None
+    return struct.unpack(">II", data[16:24])
+
+
+def _gif_size(f):
+    return struct.unpack("<HH", f.read(10)[6:10])
+
+
+def _webp_size(f):
+    data = f.read(30)
+    chunk = data[12:16]
+    if chunk == b"VP8 ":
+        w, h = struct.unpack("<HH", data[26:30])
+        return w & 0x3FFF, h & 0x3FFF
+    if chunk == b"VP8L":
+        b = data[21:25]
+        w = 1 + (((b[1] & 0x3F) << 8) | b[0])
+        h = 1 + (((b[3] & 0x0F) << 10) | (b[2] << 2) | ((b[1] & 0xC0) >> 6))
+        return w, h
+    if chunk == b"VP8X":
+        w = 1 + int.from_bytes(data[24:27], "little")
+        h = 1 + int.from_bytes(data[27:30], "little")
+        return w, h
+    return None
+
+
+# SOFn markers carry the frame size; C4/C8/CC are DHT/JPG/DAC, not frames.
+_JPEG_SOF = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def _jpeg_size(f):
+    f.read(2)
+    orientation = 1
+    while True:
+        marker = f.read(2)
+        while marker[:1] == b"\xff" and marker[1:2] == b"\xff":
+            marker = marker[1:] + f.read(1)   # fill bytes
+        if len(marker) < 2 or marker[0] != 0xFF:
+            return None
+        code = marker[1]
+        if code in (0xD8, 0x01) or 0xD0 <= code <= 0xD7:
+            continue
+        length = struct.unpack(">H", f.read(2))[0]
+        if code in _JPEG_SOF:
+            h, w = struct.unpack(">xHH", f.read(5))
+            return (h, w) if orientation in (5, 6, 7, 8) else (w, h)
+        if code == 0xE1:
+            segment = f.read(length - 2)
+            orientation = _exif_orientation(segment) or orientation
+            continue
+        if code == 0xDA:
+            return None
+        f.seek(length - 2, 1)
+
+
+def _exif_orientation(segment):
+    if not segment.startswith(b"Exif\x00\x00"):
+        return None
+    tiff = segment[6:]
+    endian = "<" if tiff[:2] == b"II" else ">"
+    offset = struct.unpack(endian + "I", tiff[4:8])[0]
+    count = struct.unpack(endian + "H", tiff[offset:offset + 2])[0]
+    for i in range(count):
+        entry = tiff[offset + 2 + 12 * i:offset + 14 + 12 * i]
+        tag, _type, _n, value = struct.unpack(endian + "HHI4s", entry)
+        if tag == 0x0112:
+            return struct.unpack(endian + "H", value[:2])[0]
+    return None
+
+
+def _iter_boxes(data, start=0, end=None):
+    """Yield (type, payload_start, box_end) for ISO-BMFF boxes in data[start:end]."""
+    end = len(data) if end is None else end
+    pos = start
+    while pos + 8 <= end:
+        size, kind = struct.unpack(">I4s", data[pos:pos + 8])
+        header = 8
+        if size == 1:
+            size = struct.unpack(">Q", data[pos + 8:pos + 16])[0]
+            header = 16
+        elif size == 0:
+            size = end - pos
+        if size < header:
+            return
+        yield kind, pos + header, min(pos + size, end)
+        pos += size
+
+
+def _avif_size(f):
+    # The meta box sits near the start of the file; 64 KB covers it in practice.
+    data = f.read(64 * 1024)
+    for kind, start, end in _iter_boxes(data):
+        if kind != b"meta":
+            continue
+        for kind, start, end in _iter_boxes(data, start + 4, end):   # meta is a FullBox
+            if kind != b"iprp":
+                continue
+            for kind, start, end in _iter_boxes(data, start, end):
+                if kind != b"ipco":
+                    continue
+                size, rotated = None, False
+                for kind, start, end in _iter_boxes(data, start, end):
+                    if kind == b"ispe" and size is None:
+                        size = struct.unpack(">II", data[start + 4:start + 12])
+                    elif kind == b"irot":
+                        rotated = data[start] & 0x3 in (1, 3)
+                if size:
+                    return (size[1], size[0]) if rotated else size
+    return None
+
+
+_SIZE_READERS = {
+    "png": _png_size,
+    "gif": _gif_size,
+    "webp": _webp_size,
+    "jpeg": _jpeg_size,
+    "avif": _avif_size,
+}
+
+
+# -- Lossless JPEG cleanup ----------------------------------------------------
+
+def strip_jpeg_metadata(data):
+    """Return JPEG `data` without camera/editor metadata, bit-for-bit otherwise.
+
+    Drops comments, XMP and the APP segments editors leave behind. Keeps
+    JFIF, ICC profiles and Adobe colour-transform markers, which change how
+    the pixels decode, and EXIF when it carries a non-default orientation.
+    Entropy-coded data after the first SOS is copied untouched.
+    """
+    if not data.startswith(b"\xff\xd8"):
+        return data
+    out = [data[:2]]
+    pos = 2
+    while pos + 4 <= len(data):
+        if data[pos] != 0xFF:
+            return data   # not a marker where one should be: leave the file alone
+        code = data[pos + 1]
+        if code == 0xFF:
+            pos += 1      # fill byte
+            continue
+        if code == 0xDA:
+            out.append(data[pos:])
+            return b"".join(out)
+        length = struct.unpack(">H", data[pos + 2:pos + 4])[0]
+        segment = data[pos:pos + 2 + length]
+        payload = segment[4:]
+        keep = True
+        if code == 0xFE:
+            keep = False
+        elif code == 0xE1:
+            try:
+                keep = (_exif_orientation(payload) or 1) != 1
+            except (IndexError, struct.error):
+                keep = True   # can't tell the orientation: don't risk rotating the photo
+        elif 0xE0 <= code <= 0xEF:
+            keep = ((code == 0xE0 and payload.startswith(b"JFIF"))
+                    or (code == 0xE2 and payload.startswith(b"ICC_PROFILE"))
+                    or (code == 0xEE and payload.startswith(b"Adobe")))
+        if keep:
+            out.append(segment)
+        pos += 2 + length
+    return data
+
+
+# -- Responsive derivatives (needs Pillow) -----------------------------------
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # pragma: no cover - Pillow is optional
+    Image = None
+
+try:
+    import pillow_avif  # noqa: F401  (registers AVIF on Pillow < 11.3)
+except ImportError:
+    pass
+
+DERIVATIVE_WIDTHS = (480, 960, 1600, 2400)
+DERIVATIVE_QUALITY = {"avif": 50, "webp": 75, "jpeg": 78}
+MIME_TYPES = {
+    "avif": "image/avif",
+    "webp": "image/webp",
+    "jpeg": "image/jpeg",
+    "png": "image/png",
+    "gif": "image/gif",
+}
+EXTENSIONS = {"avif": ".avif", "webp": ".webp", "jpeg": ".jpg"}
+
+
+def have_pillow():
+    return Image is not None
+
+
+def derivative_formats():
+    """Output formats this Pillow build can encode, best compression first."""
+    if Image is None:
+        return ()
+    Image.init()
+    formats = [fmt for fmt in ("avif", "webp") if fmt.upper() in Image.SAVE]
+    formats.append("jpeg")
+    return tuple(formats)
+
+
+def derivative_widths(width, widths=DERIVATIVE_WIDTHS):
+    """Target widths for an image `width` px wide; never upscales."""
+    chosen = [w for w in widths if w < width]
+    if not chosen or width <= widths[-1]:
+        chosen.append(min(width, widths[-1]))
+    return sorted(set(chosen))
+
+
+def make_derivatives(src, out_dir, stem, formats, widths=DERIVATIVE_WIDTHS, quality=None):
+    """Write resized copies of `src` into `out_dir`.
+
+    EXIF orientation is applied to the pixels and all metadata is dropped.
+    Returns (width, height, variants): the oriented size of the original and
+    one dict per output with file (relative to out_dir), type, width, height
+    and bytes, ordered by format preference and then width.
+    """
+    quality = {**DERIVATIVE_QUALITY, **(quality or {})}
+    out_dir = os.fspath(out_dir)
+    os.makedirs(out_dir, exist_ok=True)
+    variants = []
+    with Image.open(src) as im:
+        im = ImageOps.exif_transpose(im)
+        has_alpha = im.mode in ("RGBA", "LA") or (im.mode == "P" and "transparency" in im.info)
+        base = im.convert("RGBA" if has_alpha else "RGB")
+        size = base.size
+        for width in derivative_widths(base.width, widths):
+            height = max(1, round(base.height * width / base.width))
+            resized = base if width == base.width else base.resize((width, height), Image.LANCZOS)
+            for fmt in formats:
+                frame = resized.convert("RGB") if fmt == "jpeg" and has_alpha else resized
+                name = f"{stem}-{width}{EXTENSIONS[fmt]}"
+                path = os.path.join(out_dir, name)
+                options = {"quality": quality[fmt]}
+                if fmt == "jpeg":
+                    options.update(optimize=True, progressive=True)
+                elif fmt == "webp":
+                    options.update(method=6)
+                frame.save(path, fmt.upper(), **options)
+                variants.append({
+                    "file": name,
+                    "type": MIME_TYPES[fmt],
+                    "width": width,
+                    "height": height,
+                    "bytes": os.path.getsize(path),
+                })
+    order = {fmt: i for i, fmt in enumerate(formats)}
+    variants.sort(key=lambda v: (order[v["type"].split("/")[1]], v["width"]))
+    return size[0], size[1], variants
+
+
+PLACEHOLDER_SIZE = 16
+
+
+def placeholder(path):
+    """Return (dominant_color, data_uri) for a tiny blurred stand-in of `path`.
+
+    JPEGs are decoded at reduced scale via draft mode, so this stays cheap
+    even for large photos. Needs Pillow.
+    """
+    with Image.open(path) as im:
+        im.draft("RGB", (PLACEHOLDER_SIZE * 8, PLACEHOLDER_SIZE * 8))
+        im = ImageOps.exif_transpose(im).convert("RGB")
+        im.thumbnail((PLACEHOLDER_SIZE, PLACEHOLDER_SIZE))
+        quantized = im.quantize(colors=4)
+        _count, index = max(quantized.getcolors())
+        r, g, b = quantized.getpalette()[index * 3:index * 3 + 3]
+        # A 16px WebP is ~120 bytes; JPEG's tables alone are several times that.
+        Image.init()
+        fmt = "webp" if "WEBP" in Image.SAVE else "jpeg"
+        buf = io.BytesIO()
+        im.save(buf, fmt.upper(), quality=40, optimize=True)
+    uri = f"data:{MIME_TYPES[fmt]};base64," + base64.b64encode(buf.getvalue()).decode("ascii")
+    return f"#{r:02x}{g:02x}{b:02x}", uri
@@ -0,0 +1,249 @@
+"""Per-stage timing, I/O counters and optional profiling for the scripts.
+
+A script calls `start()` once, then wraps its phases in `stage()`:
+
+    instrument.start(__file__)
+    with instrument.stage("walk"):
+        files = scan_tree(root)
+    with instrument.stage("parse"):
+        ...
+
+rewrite_files() records a "rewrite" stage and each file's time (split into
+read/match/write), bytes and rule matches by itself (see `record()`);
+other code can add `count()`s and `file()`s. Nothing
+is printed unless asked for with environment variables, so the scripts'
+normal output is unchanged:
+
+    DNC_METRICS=summary        summary table on stderr when the script exits
+    DNC_METRICS=ndjson         one JSON object per line on stderr
+    DNC_METRICS=ndjson:FILE    the same, appended to FILE
+    DNC_PROFILE=cprofile       cProfile the run; top functions on stderr and
+                               the stats in .cache/profile/<script>.prof
+    DNC_PROFILE=tracemalloc    top allocation sites and peak traced memory
+    DNC_PROFILE=cprofile,tracemalloc
+
+CPU time includes worker processes once they have exited, so a stage that
+runs a process pool reports the pool's CPU too. Stages timed inside
+workers (rewrite.read/match/write) are summed per file: with a pool their
+total can exceed the wall time of the stage around them.
+"""
+
+import atexit
+import heapq
+import io
+import json
+import os
+import resource
+import sys
+import time
+from contextlib import contextmanager
+
+SLOWEST = 10
+PROFILE_DIR = ".cache/profile"
+
+
+def _cpu():
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+
+class Recorder:
+    """Collects stages, counters, per-file timings and rule counts."""
+
+    def __init__(self, script=""):
+        self.script = script
+        self.started = time.perf_counter()
+        self.started_cpu = _cpu()
+        self.stages = {}      # name -> [calls, wall, cpu or None], in first-use order
+        self.counters = {}
+        self.rules = {}
+        self.slowest = []     # min-heap of (seconds, path, bytes read, bytes written)
+
+    @contextmanager
+    def stage(self, name):
+        wall, cpu = time.perf_counter(), _cpu()
+        try:
+            yield
+        finally:
+            entry = self.stages.setdefault(name, [0, 0.0, 0.0])
+            entry[0] += 1
+            entry[1] += time.perf_counter() - wall
+            entry[2] += _cpu() - cpu
+
+    def add_time(self, name, seconds, calls=1):
+        """Add time measured elsewhere (e.g. in a worker process) to a stage.
+
+        Such stages have no CPU figure of their own.
+        """
+        entry = self.stages.setdefault(name, [0, 0.0, None])
+        entry[0] += calls
+        entry[1] += seconds
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def file(self, path, seconds, read=0, written=0):
+        """Record one file's processing time and I/O."""
+        self.count("files.scanned")
+        self.count("files.written" if written else "files.skipped")
+        self.count("bytes.read", read)
+        self.count("bytes.written", written)
+        item = (seconds, str(path), read, written)
+        if len(self.slowest) < SLOWEST:
+            heapq.heappush(self.slowest, item)
+        elif item > self.slowest[0]:
+            heapq.heapreplace(self.slowest, item)
+
+    def rule_counts(self, counts):
+        for label, n in counts.items():
+            self.rules[label] = self.rules.get(label, 0) + n
+
+    def record(self, result):
+        """Record a sitetools.rewrite.FileResult."""
+        self.file(result.path, result.seconds, result.bytes_read, result.bytes_written)
+        for name, seconds in result.timings.items():
+            self.add_time(f"rewrite.{name}", seconds)
+        self.rule_counts(result.counts)
+        if result.error:
+            self.count("files.errors")
+
+    # -- Output ---------------------------------------------------------
+
+    def records(self):
+        """The run as a list of JSON-able dicts, one per line of NDJSON."""
+        script = self.script
+        out = [{"type": "run", "script": script,
+                "wall_s": round(time.perf_counter() - self.started, 4),
+                "cpu_s": round(_cpu() - self.started_cpu, 4),
+                "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}]
+        for name, (calls, wall, cpu) in self.stages.items():
+            out.append({"type": "stage", "script": script, "stage": name, "calls": calls,
+                        "wall_s": round(wall, 4),
+                        "cpu_s": None if cpu is None else round(cpu, 4)})
+        for name, value in sorted(self.counters.items()):
+            out.append({"type": "counter", "script": script, "name": name, "value": value})
+        for seconds, path, read, written in sorted(self.slowest, reverse=True):
+            out.append({"type": "file", "script": script, "path": path,
+                        "seconds": round(seconds, 6), "bytes_read": read, "bytes_written": written})
+        for label, n in sorted(self.rules.items(), key=lambda item: -item[1]):
+            out.append({"type": "rule", "script": script, "rule": label, "matches": n})
+        return out
+
+    def summary(self):
+        lines = []
+        records = self.records()
+        run = records[0]
+        lines.append(f"== {self.script or 'run'}: {run['wall_s']:.3f}s wall, "
+                     f"{run['cpu_s']:.3f}s CPU, peak RSS {run['peak_rss_kb'] / 1024:.1f} MB")
+        if self.stages:
+            lines.append(f"  {'stage':24s} {'calls':>6s} {'wall s':>9s} {'cpu s':>9s} {'%':>6s}")
+            for r in (r for r in records if r["type"] == "stage"):
+                share = r["wall_s"] / run["wall_s"] if run["wall_s"] else 0.0
+                cpu = "-" if r["cpu_s"] is None else f"{r['cpu_s']:.3f}"
+                lines.append(f"  {r['stage']:24s} {r['calls']:6d} {r['wall_s']:9.3f} "
+                             f"{cpu:>9s} {share:6.1%}")
+        if self.counters:
+            lines.append("  " + ", ".join(f"{name} {value:,}"
+                                          for name, value in sorted(self.counters.items())))
+        files = [r for r in records if r["type"] == "file"]
+        if files:
+            lines.append("  slowest files:")
+            lines += [f"    {r['seconds'] * 1000:9.2f} ms  {r['path']}" for r in files]
+        rules = [r for r in records if r["type"] == "rule"]
+        if rules:
+            lines.append("  rule matches:")
+            lines += [f"    {r['matches']:9,d}  {r['rule']}" for r in rules]
+        return "\n".join(lines)
+
+
+_recorder = Recorder()
+
+
+def start(script):
+    """Name this run after `script` (a name or the script's __file__) and
+    install the reporting/profiling requested in the environment. Call
+    once, early in the script."""
+    global _recorder
+    script = os.path.splitext(os.path.basename(script))[0]
+    _recorder = Recorder(script)
+    metrics = os.environ.get("DNC_METRICS", "")
+    profile = {p.strip() for p in os.environ.get("DNC_PROFILE", "").split(",") if p.strip()}
+
+    profiler = None
+    if "cprofile" in profile:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    if "tracemalloc" in profile:
+        import tracemalloc
+        tracemalloc.start(10)
+
+    def finish():
+        if profiler is not None:
+            profiler.disable()
+            _report_profile(profiler, script)
+        if "tracemalloc" in profile:
+            _report_tracemalloc()
+        if metrics:
+            _report_metrics(metrics)
+
+    atexit.register(finish)
+    return _recorder
+
+
+def recorder():
+    return _recorder
+
+
+def stage(name):
+    return _recorder.stage(name)
+
+
+def count(name, n=1):
+    _recorder.count(name, n)
+
+
+def file(path, seconds, read=0, written=0):
+    _recorder.file(path, seconds, read, written)
+
+
+def record(result):
+    _recorder.record(result)
+
+
+def _report_metrics(metrics):
+    mode, _, target = metrics.partition(":")
+    if mode == "summary":
+        print(_recorder.summary(), file=sys.stderr)
+    elif mode == "ndjson":
+        text = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in _recorder.records())
+        if target:
+            with open(target, "a", encoding="utf-8") as f:
+                f.write(text)
+        else:
+            sys.stderr.write(text)
+    else:
+        print(f"DNC_METRICS: unknown mode {mode!r} (use summary, ndjson or ndjson:FILE)",
+              file=sys.stderr)
+
+
+def _report_profile(profiler, script):
+    import pstats
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    path = os.path.join(PROFILE_DIR, f"{script or 'run'}.prof")
+    profiler.dump_stats(path)
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(20)
+    print(out.getvalue().rstrip(), file=sys.stderr)
+    print(f"cProfile stats written to {path} (python3 -m pstats {path})", file=sys.stderr)
+
+
+def _report_tracemalloc():
+    import tracemalloc
+    snapshot = tracemalloc.take_snapshot()
+    _current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"tracemalloc: peak {peak / 1e6:.1f} MB traced; top allocation sites:", file=sys.stderr)
+    for stat in snapshot.statistics("lineno")[:15]:
+        print(f"  {stat}", file=sys.stderr)
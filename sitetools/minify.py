@@ -0,0 +1,274 @@
+"""Conservative CSS, JavaScript and HTML minifiers.
+
+All three work on tokens (strings, comments, regex literals, tags) rather
+than with blind regexes, and only make changes that cannot alter behaviour:
+
+- CSS: comments removed, whitespace collapsed, spaces around `{ } ; , >`
+  dropped, and the last `;` in a block removed.
+- JS: comments removed and runs of whitespace collapsed, but a run that
+  contained a line break stays a line break, so automatic semicolon
+  insertion behaves exactly as before.
+- HTML: see minify_html().
+"""
+
+import re
+from html.parser import HTMLParser
+
+_CSS_TOKENS = re.compile(
+    r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\''     # strings
+    r"|/\*.*?\*/"                                  # comments
+    r"|\s+"                                        # whitespace
+    r"|[^\"'/\s]+|/",                              # everything else
+    re.S,
+)
+_CSS_PUNCT = set("{};,>")
+
+
+def minify_css(text):
+    out = []
+    space = False
+    for token in _CSS_TOKENS.findall(text):
+        if token.startswith("/*") or token.isspace():
+            space = True
+            continue
+        if token[0] not in "\"'":
+            token = re.sub(r"\s*([{};,>])\s*", r"\1", token)
+        if space and out and out[-1][-1] not in _CSS_PUNCT and token[0] not in _CSS_PUNCT:
+            out.append(" ")
+        if token[0] == "}" and out and out[-1].endswith(";"):
+            out[-1] = out[-1][:-1]
+        out.append(token)
+        space = False
+    return "".join(out)
+
+
+# After one of these (or at the start) a `/` begins a regex, not a division.
+_REGEX_PRECEDERS = set("(,=:[!&|?{};+-*%<>~^")
+_REGEX_KEYWORDS = {"return", "typeof", "instanceof", "in", "of", "new", "delete",
+                   "void", "throw", "case", "do", "else", "yield", "await"}
+_JS_WORD = re.compile(r"[A-Za-z0-9_$]+|[^\sA-Za-z0-9_$\"'`/]+")
+_JS_SPACE = re.compile(r"\s+")
+
+
+def minify_js(text):
+    out = []
+    pending = ""       # whitespace owed before the next token: "", " " or "\n"
+    last = ""          # last significant character emitted
+    word = ""          # last identifier/keyword emitted
+    i = 0
+    n = len(text)
+
+    def emit(token):
+        nonlocal pending
+        if pending and out:
+            out.append(pending)
+        pending = ""
+        out.append(token)
+
+    while i < n:
+        c = text[i]
+        if c.isspace():
+            m = _JS_SPACE.match(text, i)
+            pending = "\n" if "\n" in m.group(0) or pending == "\n" else " "
+            i = m.end()
+        elif c in "\"'`":
+            j = i + 1
+            while j < n and text[j] != c:
+                if text[j] == "\\":
+                    j += 1
+                j += 1
+            emit(text[i:j + 1])
+            i = j + 1
+            last, word = c, ""
+        elif text.startswith("//", i):
+            j = text.find("\n", i)
+            i = n if j < 0 else j
+        elif text.startswith("/*", i):
+            j = text.find("*/", i + 2)
+            end = n if j < 0 else j + 2
+            if "\n" in text[i:end] or pending == "\n":
+                pending = "\n"
+            elif not pending:
+                pending = " "
+            i = end
+        elif c == "/" and (not last or last in _REGEX_PRECEDERS or word in _REGEX_KEYWORDS):
+            j = i + 1
+            in_class = False
+            while j < n and text[j] != "\n":
+                if text[j] == "\\":
+                    j += 1
+                elif text[j] == "[":
+                    in_class = True
+                elif text[j] == "]":
+                    in_class = False
+                elif text[j] == "/" and not in_class:
+                    break
+                j += 1
+            j += 1
+            while j < n and (text[j].isalnum() or text[j] in "_$"):
+                j += 1   # flags
+            emit(text[i:j])
+            i = j
+            last, word = "/", ""
+        else:
+            m = _JS_WORD.match(text, i)
+            token = m.group(0) if m else c
+            if pending == " " and not (_is_word_char(last) and _is_word_char(token[0])):
+                # Spaces only matter between two identifier characters, and
+                # between `+ +` / `- -` which would otherwise fuse.
+                if not (last in "+-" and token[0] == last):
+                    pending = ""
+            emit(token)
+            last = token[-1]
+            word = token if _is_word_char(token[0]) and not token[0].isdigit() else ""
+            i += len(token)
+    return "".join(out)
+
+
+def _is_word_char(c):
+    return bool(c) and (c.isalnum() or c in "_$")
+
+
+# Kept byte for byte, with everything inside them.
+_VERBATIM = {"pre", "textarea"}
+_JS_TYPES = {"", "text/javascript", "application/javascript", "text/ecmascript",
+             "application/ecmascript", "module"}
+_TAG_NAME = re.compile(r"<([^\s/>]+)")
+_TAG_ATTR = re.compile(r"""([^\s"'>/=]+)(?:\s*=\s*("[^"]*"|'[^']*'|[^\s>]+))?""")
+_UNQUOTED = re.compile(r"""[^\s"'=<>`]+""")
+_HTML_SPACE = re.compile(r"[ \t\n\r\f]+")
+
+
+class _HTMLMinifier(HTMLParser):
+    def __init__(self, text):
+        super().__init__(convert_charrefs=True)
+        self.source = text
+        self.line_starts = [0] + [m.end() for m in re.finditer("\n", text)]
+        self.out = []
+        self.pending = []         # text since the last tag; dropped comments don't split it
+        self.verbatim = None      # [tag, depth, offset its content starts at]
+        self.raw = None           # [minifier or None, chunks] inside <script>/<style>
+        self.document = self.body = False   # inside a whole page / past its <body>
+
+    def position(self):
+        line, column = self.getpos()
+        return self.line_starts[line - 1] + column
+
+    def start_tag(self, self_closing):
+        raw = self.get_starttag_text()
+        name = _TAG_NAME.match(raw).group(1)
+        inner = raw[1 + len(name):-1]
+        if self_closing:
+            inner = inner.rstrip()[:-1]
+        parts = [f"<{name}"]
+        unquoted = False
+        for m in _TAG_ATTR.finditer(inner):
+            attr, value = m.groups()
+            unquoted = False
+            if value is None:
+                parts.append(f" {attr}")
+                continue
+            if value[0] in "\"'" and _UNQUOTED.fullmatch(value[1:-1]):
+                value = value[1:-1]
+            unquoted = value[0] not in "\"'"
+            parts.append(f" {attr}={value}")
+        # An unquoted value would swallow the slash.
+        parts.append((" />" if unquoted else "/>") if self_closing else ">")
+        return "".join(parts)
+
+    def flush(self):
+        data = "".join(self.pending)
+        self.pending = []
+        if data.strip(" \t\n\r\f"):
+            data = data.replace("&", "&amp;").replace("<", "&lt;")
+            self.out.append(_HTML_SPACE.sub(lambda m: "\n" if "\n" in m.group(0) else " ", data))
+        elif not data or (self.document or not self.out) and not self.body:
+            return   # whitespace before <body> is never rendered
+        else:
+            self.out.append("\n" if "\n" in data else " ")
+
+    def handle_starttag(self, tag, attrs, self_closing=False):
+        if self.verbatim:
+            self.verbatim[1] += tag == self.verbatim[0]
+            return
+        self.flush()
+        if tag in ("html", "head"):
+            self.document = True
+        elif tag == "body":
+            self.body = True
+        self.out.append(self.start_tag(self_closing))
+        if tag in _VERBATIM and not self_closing:
+            self.verbatim = [tag, 1, self.position() + len(self.get_starttag_text())]
+        elif tag in ("script", "style") and not self_closing:
+            kind = (dict(attrs).get("type") or "").strip().lower()
+            if tag == "style":
+                minifier = minify_css if kind in ("", "text/css") else None
+            else:
+                minifier = minify_js if kind in _JS_TYPES else None   # JSON is kept as is
+            self.raw = [minifier, []]
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs, self_closing=True)
+
+    def handle_endtag(self, tag):
+        if self.verbatim:
+            if tag == self.verbatim[0]:
+                self.verbatim[1] -= 1
+                if not self.verbatim[1]:
+                    self.out.append(self.source[self.verbatim[2]:self.position()])
+                    self.out.append(f"</{tag}>")
+                    self.verbatim = None
+            return
+        self.flush()
+        if self.raw and tag in ("script", "style"):
+            minifier, chunks = self.raw
+            text = "".join(chunks)
+            self.out.append(minifier(text).strip() if minifier else text)
+            self.raw = None
+        self.out.append(f"</{tag}>")
+
+    def handle_data(self, data):
+        if self.verbatim:
+            return
+        (self.raw[1] if self.raw else self.pending).append(data)
+
+    def handle_comment(self, data):
+        if not self.verbatim and data.startswith(("[if", "<![endif")):
+            self.flush()
+            self.out.append(f"<!--{data}-->")   # IE conditional comments
+
+    def handle_decl(self, decl):
+        if not self.verbatim:
+            self.flush()
+            self.document = True
+            self.out.append(f"<!{decl}>")
+
+    def handle_pi(self, data):
+        if not self.verbatim:
+            self.flush()
+            self.out.append(f"<?{data}>")
+
+    def unknown_decl(self, data):
+        if not self.verbatim:
+            self.flush()
+            self.out.append(f"<![{data}]>")
+
+
+def minify_html(text):
+    """Minify a UTF-8 HTML page.
+
+    Whitespace runs in text collapse to one space (or one line break if
+    they had one) and whitespace-only text before <body> is dropped;
+    comments other than IE conditionals are removed; attribute quotes are
+    dropped where the value cannot need them; inline <style> and
+    JavaScript <script> are minified with minify_css()/minify_js(). <pre>
+    and <textarea> are copied byte for byte, and scripts of other types
+    (JSON-LD, importmaps, templates) are kept as they are. Character
+    references in text are written out as characters, so the page must be
+    served as UTF-8.
+    """
+    parser = _HTMLMinifier(text)
+    parser.feed(text)
+    parser.close()
+    parser.flush()
+    return "".join(parser.out)
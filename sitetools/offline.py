@@ -0,0 +1,186 @@
+"""The service worker and per-page resource hints build-site.py adds.
+
+write_service_worker() fills sitetools/service-worker.js in with the core
+shell (SHELL, each with the content hash of its built file), the offline
+fallback page and the RUNTIME cache rules, and writes it to the root of
+the build as sw.js.
+
+add_hints() inserts, before </head>, a preconnect for each other origin
+the page loads from (up to MAX_PRECONNECT) and a high-priority preload
+for its hero image - the first <img> after the site header, the one
+add-image-hints.py gives fetchpriority="high" - unless it is lazy or in a
+<picture> (where the browser may choose another file). It also adds the
+script that registers the service worker before </body>. Hints already in
+a page are not repeated.
+"""
+
+import json
+import re
+from html import escape
+from html.parser import HTMLParser
+from pathlib import Path
+from urllib.parse import quote, urlsplit
+
+from .files import sha256_file, write_if_changed
+from .html import is_external
+
+SW_NAME = "sw.js"
+TEMPLATE = Path(__file__).with_name("service-worker.js")
+# What a visitor on the trail needs with no signal: the shared CSS/JS,
+# the logo and favicon, and the trail map page with its PDF.
+SHELL = [
+    "assets/css/main.css",
+    "assets/css/dropdown.css",
+    "assets/js/main.js",
+    "assets/js/dropdown.js",
+    "assets/js/newsletter.js",
+    "assets/images/logo.png",
+    "assets/images/favicon.png",
+    "visit/index.html",
+    "trail-map/index.html",
+    "assets/documents/trail-map.pdf",
+]
+OFFLINE_PAGE = "visit/index.html"
+# Large files worth keeping once seen: cache-first, oldest dropped first.
+RUNTIME = [
+    {"cache": "dnc-gallery", "max_entries": 60,
+     "prefixes": ["photocontest/", "assets/images/gallery/", "assets/images/winners-2025/"],
+     "extensions": [".jpg", ".jpeg", ".png", ".webp", ".avif", ".gif"]},
+    {"cache": "dnc-newsletters", "max_entries": 20,
+     "prefixes": ["assets/newsletters/"],
+     "extensions": [".pdf"]},
+]
+# Served immutable by serve.py whatever their names.
+HASHED_DIRS = ["assets/bundles/", "research/assets/"]
+MAX_PRECONNECT = 3
+
+HEAD_END = re.compile(r"</head\s*>", re.I)
+BODY_END = re.compile(r"</body\s*>", re.I)
+REGISTER = ("<script>if ('serviceWorker' in navigator) "
+            "navigator.serviceWorker.register('{url}', {{ scope: '{scope}' }});</script>")
+
+
+def site_url(rel, base_path=""):
+    """The URL `rel` is served at, with index.html pages as directories."""
+    if rel == "index.html" or rel.endswith("/index.html"):
+        rel = rel[:-len("index.html")]
+    return f"{base_path}/{quote(rel)}"
+
+
+def write_service_worker(out, base_path=""):
+    """Write sw.js into the build at `out`.
+
+    Returns (precached entries, SHELL files missing from the build, changed).
+    """
+    out = Path(out)
+    precache = []
+    missing = []
+    for rel in SHELL:
+        if (out / rel).is_file():
+            precache.append([site_url(rel, base_path), sha256_file(out / rel)[:12]])
+        else:
+            missing.append(rel)
+    config = {
+        "precache": precache,
+        "offline": site_url(OFFLINE_PAGE, base_path),
+        "hashedDirs": [f"{base_path}/{d}" for d in HASHED_DIRS],
+        "runtime": [{"cache": rule["cache"], "maxEntries": rule["max_entries"],
+                     "prefixes": [f"{base_path}/{p}" for p in rule["prefixes"]],
+                     "extensions": rule["extensions"]} for rule in RUNTIME],
+    }
+    text = TEMPLATE.read_text(encoding="utf-8").replace(
+        "__CONFIG__", json.dumps(config, ensure_ascii=False))
+    changed = write_if_changed(out / SW_NAME, text)
+    return len(precache), missing, changed
+
+
+class PageHints(HTMLParser):
+    """Finds a page's hero image, the origins it loads from and the hints it has."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.hero = None          # attrs of the hero <img>, or {} if it can't be preloaded
+        self.first = None         # ... of the first <img>, the hero on pages without a header
+        self.header = False
+        self.origins = []
+        self.hinted = set()       # hrefs of existing preload/preconnect links
+        self._after_header = False
+        self._picture = 0
+        self._skip = 0            # depth inside <template>/<noscript>
+
+    def origin(self, url):
+        if url and is_external(url) and url.startswith(("http:", "https:", "//")):
+            parts = urlsplit(url)
+            origin = f"{parts.scheme or 'https'}://{parts.netloc}"
+            if origin not in self.origins:
+                self.origins.append(origin)
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ("template", "noscript"):
+            self._skip += 1
+        if self._skip:
+            return
+        attrs = dict(attrs)
+        if tag == "link":
+            rels = set((attrs.get("rel") or "").lower().split())
+            if rels & {"preload", "preconnect", "dns-prefetch"}:
+                self.hinted.add((attrs.get("href") or "").rstrip("/"))
+            elif "stylesheet" in rels:
+                self.origin(attrs.get("href"))
+        elif tag in ("script", "iframe") and (attrs.get("loading") or "").lower() != "lazy":
+            self.origin(attrs.get("src"))
+        elif tag == "picture":
+            self._picture += 1
+        elif tag == "img":
+            self.origin(attrs.get("src"))
+            eager = (attrs.get("loading") or "").lower() != "lazy" and not self._picture
+            if self.first is None:
+                self.first = attrs if eager else {}
+            if self._after_header and self.hero is None:
+                self.hero = attrs if eager else {}
+        elif tag == "header":
+            self.header = True
+
+    def handle_endtag(self, tag):
+        if tag in ("template", "noscript") and self._skip:
+            self._skip -= 1
+        elif tag == "picture" and self._picture:
+            self._picture -= 1
+        elif tag == "header":
+            self._after_header = True
+
+
+def add_hints(text, base_path="", register=True):
+    """Return (new_text, hints added) for one page's source text.
+
+    Local URLs stay root-relative: BasePath re-roots them afterwards like
+    every other URL in the page.
+    """
+    head = HEAD_END.search(text)
+    if not head:
+        return text, 0
+    parser = PageHints()
+    parser.feed(text)
+    parser.close()
+
+    links = [f'<link rel="preconnect" href="{origin}">'
+             for origin in parser.origins[:MAX_PRECONNECT] if origin not in parser.hinted]
+    hero = parser.hero if parser.header else parser.first
+    if hero and hero.get("src") and not is_external(hero["src"]) and hero["src"] not in parser.hinted:
+        link = f'<link rel="preload" as="image" href="{escape(hero["src"])}" fetchpriority="high"'
+        if hero.get("srcset"):
+            link += f' imagesrcset="{escape(hero["srcset"])}"'
+            if hero.get("sizes"):
+                link += f' imagesizes="{escape(hero["sizes"])}"'
+        links.append(link + ">")
+    if links:
+        text = text[:head.start()] + "".join(f"    {link}\n" for link in links) + text[head.start():]
+
+    if register and "serviceWorker.register" not in text:
+        body = None
+        for body in BODY_END.finditer(text):
+            pass                  # the last </body>, in case one is quoted earlier
+        if body:
+            script = REGISTER.format(url=f"{base_path}/{SW_NAME}", scope=f"{base_path}/")
+            text = text[:body.start()] + f"    {script}\n" + text[body.start():]
+    return text, len(links)
@@ -0,0 +1,281 @@
+"""Page count, size and linearization of a PDF, read from its edges.
+
+info() reads only the first HEAD_BYTES (the linearization dictionary, if
+any), the tail (`startxref`), the cross-reference sections that chain
+from it and the two or three objects between the trailer and the page
+tree's /Count - never the page content, so a multi-megabyte newsletter
+costs a few tens of kilobytes of I/O. Classic `xref` tables, cross-reference
+streams (PDF 1.5, including PNG predictors), hybrid files (/XRefStm),
+incremental updates (/Prev) and objects inside object streams are
+followed. When the cross-reference chain is damaged, a linearized file's
+/N (its page count) is used instead.
+
+A file is linearized ("fast web view") when it starts with a
+linearization dictionary whose /L is the file's actual length: an
+incremental update appended later (a typical "save" in an editor) breaks
+it, and the browser has to download everything before page one again.
+"""
+
+import os
+import re
+import zlib
+from dataclasses import dataclass
+
+HEAD_BYTES = 1024
+TAIL_BYTES = 2048
+READ_CHUNK = 4096
+MAX_OBJECT_BYTES = 1 << 20
+MAX_SECTIONS = 64
+
+HEADER = re.compile(rb"%PDF-(\d\.\d)")
+STARTXREF = re.compile(rb"startxref\s+(\d+)")
+OBJ = re.compile(rb"\s*(\d+)\s+(\d+)\s+obj\b")
+XREF_SUBSECTION = re.compile(rb"\s*(\d+)\s+(\d+)[ \t]*[\r\n]")
+XREF_ENTRY = re.compile(rb"\s*(\d{10})\s+\d{5}\s+([nf])")
+TRAILER = re.compile(rb"\s*trailer\s*<<")
+TABLE_END = re.compile(rb"trailer\s*<<.*?startxref", re.S)
+
+
+class PdfError(Exception):
+    pass
+
+
+@dataclass
+class PdfInfo:
+    pages: int = 0
+    bytes: int = 0
+    version: str = ""
+    linearized: bool = False
+    # How `pages` was found: "page tree" or "linearization".
+    source: str = ""
+    bytes_read: int = 0
+
+
+def _ref(data, key):
+    m = re.search(rb"/" + key + rb"\s+(\d+)\s+(\d+)\s+R", data)
+    return int(m.group(1)) if m else None
+
+
+def _int(data, key):
+    m = re.search(rb"/" + key + rb"\s+(\d+)(?!\s+\d+\s+R)", data)
+    return int(m.group(1)) if m else None
+
+
+def _ints(data, key):
+    m = re.search(rb"/" + key + rb"\s*\[([\d\s]*)\]", data)
+    return [int(n) for n in m.group(1).split()] if m else None
+
+
+def _unpredict(data, columns, predictor):
+    """Undo a PNG predictor (/Predictor 10-15) row by row."""
+    if predictor < 10:
+        if predictor != 1:
+            raise PdfError(f"unsupported predictor {predictor}")
+        return data
+    out = bytearray()
+    prev = bytearray(columns)
+    for start in range(0, len(data), columns + 1):
+        kind, row = data[start], bytearray(data[start + 1:start + 1 + columns])
+        for i in range(len(row)):
+            left = row[i - 1] if i else 0
+            up = prev[i]
+            if kind == 1:
+                row[i] = (row[i] + left) & 0xFF
+            elif kind == 2:
+                row[i] = (row[i] + up) & 0xFF
+            elif kind == 3:
+                row[i] = (row[i] + (left + up) // 2) & 0xFF
+            elif kind == 4:
+                upleft = prev[i - 1] if i else 0
+                p = left + up - upleft
+                pa, pb, pc = abs(p - left), abs(p - up), abs(p - upleft)
+                row[i] = (row[i] + (left if pa <= pb and pa <= pc else up if pb <= pc else upleft)) & 0xFF
+            elif kind:
+                raise PdfError(f"bad PNG filter type {kind}")
+        out += row
+        prev = row
+    return bytes(out)
+
+
+class _Reader:
+    def __init__(self, f, size):
+        self.f = f
+        self.size = size
+        self.xref = {}        # object number -> (offset,) or (stream object, index)
+        self.trailer = b""    # the newest trailer dictionary
+        self.read = 0         # bytes read
+
+    def chunk(self, offset, n):
+        self.f.seek(offset)
+        data = self.f.read(n)
+        self.read += len(data)
+        return data
+
+    # -- objects -------------------------------------------------------
+
+    def object_at(self, offset):
+        """(dictionary/value bytes, stream bytes or None) of the object at `offset`."""
+        data = self.chunk(offset, READ_CHUNK)
+        m = OBJ.match(data)
+        if not m:
+            raise PdfError(f"no object at offset {offset}")
+        while b"endobj" not in data and b"stream" not in data and len(data) < MAX_OBJECT_BYTES:
+            more = self.chunk(offset + len(data), READ_CHUNK)
+            if not more:
+                break
+            data += more
+        body = data[m.end():]
+        s = re.search(rb"\bstream(?:\r\n|\n|\r)", body)
+        end = body.find(b"endobj")
+        if s and (end < 0 or s.start() < end):
+            head = body[:s.start()]
+            length = _int(head, b"Length")
+            if length is None:
+                ref = _ref(head, b"Length")
+                if ref is None:
+                    raise PdfError("stream without /Length")
+                length = int(self.resolve(ref)[0].strip())
+            start = offset + m.end() + s.end()
+            return head, self.chunk(start, length)
+        return (body[:end] if end >= 0 else body), None
+
+    def decode(self, head, stream):
+        filters = re.findall(rb"/(\w+)", (re.search(rb"/Filter\s*(\[[^\]]*\]|/\w+)", head) or [b"", b""])[1])
+        for name in filters:
+            if name != b"FlateDecode":
+                raise PdfError(f"unsupported filter {name.decode()}")
+            stream = zlib.decompress(stream)
+        parms = re.search(rb"/DecodeParms\s*<<(.*?)>>", head, re.S)
+        if parms:
+            predictor = _int(parms.group(1), b"Predictor") or 1
+            if predictor > 1:
+                stream = _unpredict(stream, _int(parms.group(1), b"Columns") or 1, predictor)
+        return stream
+
+    def resolve(self, num):
+        entry = self.xref.get(num)
+        if entry is None:
+            raise PdfError(f"object {num} is not in the cross-reference table")
+        if len(entry) == 1:
+            return self.object_at(entry[0])
+        container, _ = entry
+        head, stream = self.resolve(container)
+        data = self.decode(head, stream)
+        first = _int(head, b"First")
+        numbers = [int(x) for x in data[:first].split()]
+        offsets = sorted(numbers[1::2])
+        start = dict(zip(numbers[0::2], numbers[1::2]))[num]
+        later = [o for o in offsets if o > start]
+        return data[first + start:first + later[0] if later else len(data)], None
+
+    # -- cross-reference sections ---------------------------------------
+
+    def add(self, num, entry):
+        # Newer sections are read first and win.
+        self.xref.setdefault(num, entry)
+
+    def read_table(self, offset):
+        """A classic `xref` table at `offset`. Returns its trailer dictionary."""
+        data = self.chunk(offset, READ_CHUNK)
+        while not TABLE_END.search(data) and offset + len(data) < self.size:
+            data += self.chunk(offset + len(data), READ_CHUNK)
+        pos = data.index(b"xref") + 4
+        while m := XREF_SUBSECTION.match(data, pos):
+            first, count = int(m.group(1)), int(m.group(2))
+            pos = m.end()
+            for num in range(first, first + count):
+                entry = XREF_ENTRY.match(data, pos)
+                if not entry:
+                    raise PdfError("truncated xref table")
+                pos = entry.end()
+                self.add(num, (int(entry.group(1)),) if entry.group(2) == b"n" else None)
+        t = TRAILER.match(data, pos)
+        if not t:
+            raise PdfError("xref table without trailer")
+        end = data.find(b"startxref", t.end())
+        return data[t.end():end if end >= 0 else None]
+
+    def read_stream(self, offset):
+        """A cross-reference stream at `offset`. Returns its dictionary."""
+        head, stream = self.object_at(offset)
+        if b"/XRef" not in head:
+            raise PdfError(f"no cross-reference at offset {offset}")
+        data = self.decode(head, stream)
+        widths = _ints(head, b"W")
+        index = _ints(head, b"Index") or [0, _int(head, b"Size")]
+        row = sum(widths)
+        pos = 0
+        for first, count in zip(index[0::2], index[1::2]):
+            for num in range(first, first + count):
+                fields = []
+                for w in widths:
+                    fields.append(int.from_bytes(data[pos:pos + w], "big") if w else None)
+                    pos += w
+                kind = 1 if fields[0] is None else fields[0]
+                if kind == 1:
+                    self.add(num, (fields[1],))
+                elif kind == 2:
+                    self.add(num, (fields[1], fields[2]))
+                else:
+                    self.add(num, None)
+        if pos > len(data) or not row:
+            raise PdfError("truncated cross-reference stream")
+        return head
+
+    def read_xref(self):
+        tail_start = max(0, self.size - TAIL_BYTES)
+        found = STARTXREF.findall(self.chunk(tail_start, TAIL_BYTES))
+        if not found:
+            raise PdfError("no startxref")
+        offset, seen = int(found[-1]), set()
+        while offset and offset not in seen and len(seen) < MAX_SECTIONS:
+            seen.add(offset)
+            if self.chunk(offset, 64).lstrip().startswith(b"xref"):
+                trailer = self.read_table(offset)
+                hybrid = _int(trailer, b"XRefStm")
+                if hybrid:
+                    self.read_stream(hybrid)
+            else:
+                trailer = self.read_stream(offset)
+            if not self.trailer:
+                self.trailer = trailer
+            offset = _int(trailer, b"Prev")
+
+    def page_count(self):
+        root = _ref(self.trailer, b"Root")
+        if root is None:
+            raise PdfError("trailer without /Root")
+        pages = _ref(self.resolve(root)[0], b"Pages")
+        if pages is None:
+            raise PdfError("catalog without /Pages")
+        count = _int(self.resolve(pages)[0], b"Count")
+        if count is None:
+            raise PdfError("page tree without /Count")
+        return count
+
+
+def info(path):
+    """PdfInfo for the PDF at `path`; raises PdfError if it can't be read."""
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        reader = _Reader(f, size)
+        head = reader.chunk(0, HEAD_BYTES)
+        m = HEADER.search(head)
+        if not m:
+            raise PdfError("not a PDF")
+        result = PdfInfo(bytes=size, version=m.group(1).decode())
+        first = OBJ.search(head, m.end())
+        lin = head[first.end():] if first else b""
+        lin = lin[:lin.find(b">>")] if b">>" in lin else b""
+        if b"/Linearized" in lin:
+            result.linearized = _int(lin, b"L") == size
+        try:
+            reader.read_xref()
+            result.pages, result.source = reader.page_count(), "page tree"
+        except (PdfError, ValueError, TypeError, IndexError, KeyError, zlib.error) as e:
+            n = _int(lin, b"N") if b"/Linearized" in lin else None
+            if n is None:
+                raise PdfError(str(e)) from e
+            result.pages, result.source = n, "linearization"
+        result.bytes_read = reader.read
+    return result
@@ -0,0 +1,214 @@
+"""Single-pass rewrite engine for the HTML maintenance scripts.
+
+Every rule of a rule set is compiled into one alternation regex, so each
+file is read once, scanned once per rule set and written only if its bytes
+actually changed.  Files are spread across a process pool.
+
+Within a rule set, rules apply to the original text of the file rather than
+to the output of the previous rule, and where two rules could match at the
+same position the one listed first wins.  Rule sets joined with `+` apply
+one after another, each to the previous one's output, so a combined run
+gives the same result as running the tables separately.  Rule patterns may use their own groups (the replacement
+template's `\\1`, `\\g<2>` refer to the rule's groups, as with `re.sub`), but
+must not use numbered backreferences inside the pattern or global inline
+flags such as `(?i)`.
+"""
+
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+from . import instrument
+
+# Below this many files the pool costs more than it saves.
+MIN_FILES_FOR_POOL = 64
+
+_GROUP_REF = re.compile(r"\\(?:g<(\d+)>|(\d+))")
+
+
+@dataclass(frozen=True)
+class Rule:
+    """One search/replace pair.
+
+    pattern      regex, or plain text when `literal` is set
+    replacement  `re.sub`-style template (plain text when `literal` is set)
+    count        maximum replacements per file, 0 for unlimited
+    unless       skip this rule for files that contain this text (any case)
+    name         label used in match counts; defaults to the pattern
+    """
+    pattern: str
+    replacement: str
+    literal: bool = False
+    count: int = 0
+    unless: str = ""
+    name: str = ""
+
+    @property
+    def label(self):
+        return self.name or self.pattern
+
+
+class _Pass:
+    """One rule set's rules, compiled into a single alternation."""
+
+    def __init__(self, rules):
+        self.rules = tuple(rules)
+        parts = []
+        self._templates = []
+        group = 1
+        for i, rule in enumerate(self.rules):
+            source = re.escape(rule.pattern) if rule.literal else rule.pattern
+            inner = re.compile(source).groups
+            parts.append(f"(?P<_r{i}>{source})")
+            self._templates.append(self._offset_template(rule, group))
+            group += 1 + inner
+        self._pattern = re.compile("|".join(parts))
+        self._rule_for_group = {}
+        for name, index in self._pattern.groupindex.items():
+            if name.startswith("_r"):
+                self._rule_for_group[index] = int(name[2:])
+        self._guarded = any(rule.unless for rule in self.rules)
+
+    @staticmethod
+    def _offset_template(rule, outer):
+        """Renumber a replacement template's group refs into the combined regex."""
+        if rule.literal or "\\" not in rule.replacement:
+            return None
+
+        def shift(m):
+            n = int(m.group(1) or m.group(2))
+            return f"\\g<{outer + n}>" if n else f"\\g<{outer}>"
+
+        return _GROUP_REF.sub(shift, rule.replacement)
+
+    def apply(self, text, counts):
+        disabled = set()
+        if self._guarded:
+            lowered = text.lower()
+            disabled = {i for i, rule in enumerate(self.rules)
+                        if rule.unless and rule.unless.lower() in lowered}
+        hits = [0] * len(self.rules)
+
+        def replace(m):
+            i = self._rule_for_group[m.lastindex]
+            rule = self.rules[i]
+            if i in disabled or (rule.count and hits[i] >= rule.count):
+                return m.group(0)
+            hits[i] += 1
+            template = self._templates[i]
+            return m.expand(template) if template is not None else rule.replacement
+
+        new_text = self._pattern.sub(replace, text)
+        for i, n in enumerate(hits):
+            if n:
+                label = self.rules[i].label
+                counts[label] = counts.get(label, 0) + n
+        return new_text
+
+
+class RuleSet:
+    """A compiled, ordered collection of rules.
+
+    `a + b` applies `b` to the output of `a`, as running them one after
+    another would.
+    """
+
+    def __init__(self, rules):
+        self.rules = tuple(rules)
+        self._passes = (_Pass(self.rules),) if self.rules else ()
+
+    def __add__(self, other):
+        combined = RuleSet(())
+        combined.rules = self.rules + other.rules
+        combined._passes = self._passes + other._passes
+        return combined
+
+    def apply(self, text):
+        """Return (new_text, counts) where counts maps rule label -> matches."""
+        counts = {}
+        for rule_pass in self._passes:
+            text = rule_pass.apply(text, counts)
+        return text, counts
+
+
+@dataclass
+class FileResult:
+    path: str
+    changed: bool = False
+    counts: dict = field(default_factory=dict)
+    error: str = ""
+    bytes_read: int = 0
+    bytes_written: int = 0
+    seconds: float = 0.0
+    timings: dict = field(default_factory=dict)   # "read"/"match"/"write" -> seconds
+
+
+def rewrite_file(path, ruleset, dry_run=False):
+    """Apply `ruleset` to one file, writing it back only if the bytes differ."""
+    result = FileResult(str(path))
+    started = mark = time.perf_counter()
+
+    def lap(name):
+        nonlocal mark
+        now = time.perf_counter()
+        result.timings[name] = now - mark
+        mark = now
+
+    try:
+        with open(path, "rb") as f:
+            original = f.read()
+        result.bytes_read = len(original)
+        lap("read")
+        text = original.decode("utf-8")
+        new_text, result.counts = ruleset.apply(text)
+        lap("match")
+        if new_text is not text:
+            data = new_text.encode("utf-8")
+            if data != original:
+                result.changed = True
+                if not dry_run:
+                    with open(path, "wb") as f:
+                        f.write(data)
+                    result.bytes_written = len(data)
+                    lap("write")
+    except (OSError, UnicodeDecodeError) as e:
+        result.error = str(e)
+    result.seconds = time.perf_counter() - started
+    return result
+
+
+_worker_ruleset = None
+
+
+def _init_worker(ruleset):
+    global _worker_ruleset
+    _worker_ruleset = ruleset
+
+
+def _rewrite_in_worker(args):
+    path, dry_run = args
+    return rewrite_file(path, _worker_ruleset, dry_run)
+
+
+def rewrite_files(paths, ruleset, workers=None, dry_run=False):
+    """Apply `ruleset` to every path, in parallel for large trees.
+
+    Returns one FileResult per path, in input order. Each result is also
+    recorded with sitetools.instrument.
+    """
+    paths = [str(p) for p in paths]
+    workers = workers or os.cpu_count() or 1
+    with instrument.stage("rewrite"):
+        if workers == 1 or len(paths) < MIN_FILES_FOR_POOL:
+            results = [rewrite_file(p, ruleset, dry_run) for p in paths]
+        else:
+            chunksize = max(1, len(paths) // (workers * 8))
+            with ProcessPoolExecutor(workers, initializer=_init_worker,
+                                     initargs=(ruleset,)) as pool:
+                results = list(pool.map(_rewrite_in_worker,
+                                        ((p, dry_run) for p in paths), chunksize=chunksize))
+    for result in results:
+        instrument.record(result)
+    return results
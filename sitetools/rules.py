@@ -0,0 +1,72 @@
+"""Rewrite tables shared by the page maintenance scripts.
+
+Each table is a RuleSet; rewrite-site.py can apply any combination of them
+in a single run over the tree.
+"""
+
+from .rewrite import Rule, RuleSet
+
+# Base path for GitHub Pages
+BASE_PATH = "/dncweb"
+
+FAVICON_LINK = '  <link rel="icon" type="image/png" href="/assets/images/favicon.png">\n'
+
+NAVIGATION = RuleSet([
+    # Fix EcoExplorer link
+    Rule(r'<li><a href="/visit/#eco-explorer">EcoExplorer Guides</a></li>',
+         '<li><a href="/ecoexplorer/">EcoExplorer Guides</a></li>'),
+    Rule(r'<li><a href="/eco0/">EcoExplorer Guides</a></li>',
+         '<li><a href="/ecoexplorer/">EcoExplorer Guides</a></li>'),
+    # Fix Shop link to point to WordPress shop
+    Rule(r'<li><a href="/shop/">Shop</a></li>',
+         '<li><a href="https://www.demarestnaturecenter.org/shop/">Shop</a></li>'),
+    # Fix Oktoberfest/Fall Festival link
+    Rule(r'<li><a href="/events/#oktoberfest">Oktoberfest/Fall Festival</a></li>',
+         '<li><a href="/fall-festival/">Oktoberfest/Fall Festival</a></li>'),
+    # Fix Scholarship link
+    Rule(r'<li><a href="/support/#scholarship">Scholarship</a></li>',
+         '<li><a href="/scholarship/">Scholarship</a></li>'),
+    # Fix Photo Contest link
+    Rule(r'<li><a href="/gallery/#photo-contest">Photo Contest</a></li>',
+         '<li><a href="/photocontest/">Photo Contest</a></li>'),
+    # Remove Newsletters from News and Events menu
+    Rule(r'\s*<li><a href="/events/#newsletters">Newsletters</a></li>\n', ''),
+    # Remove Nature News from News and Events menu
+    Rule(r'\s*<li><a href="/events/#nature-news">Nature News</a></li>\n', ''),
+    # Remove Camp SOAR from News and Events menu
+    Rule(r'\s*<li><a href="/programs/#camp-soar">Camp SOAR</a></li>\n', ''),
+])
+
+MISSION_LINKS = RuleSet([
+    # Update mission link
+    Rule('href="/about/#mission"', 'href="/about/mission.html"', literal=True),
+    # Update policies link
+    Rule('href="/about/#policies"', 'href="/about/policies.html"', literal=True),
+    # Update meetings link
+    Rule('href="/about/#meetings"', 'href="/about/policies.html#meetings"', literal=True),
+])
+
+FAVICON = RuleSet([
+    # Insert the favicon before </head>, keeping the indentation of </head>
+    Rule(r'(\s*)</head>', f'{FAVICON_LINK}\\1</head>',
+         count=1, unless="favicon", name="favicon"),
+])
+
+GITHUB_PAGES = RuleSet([
+    # href="/path" -> href="/dncweb/path", but not href="//host" or href="http..."
+    Rule(r'(href|src)="(/(?!/)(?!http))', rf'\1="{BASE_PATH}\2', name="base-path (double quotes)"),
+    Rule(r"(href|src)='(/(?!/)(?!http))", rf"\1='{BASE_PATH}\2", name="base-path (single quotes)"),
+])
+
+ROOT_PATHS = RuleSet([
+    # Replace /dncweb/ with /
+    Rule(f'{BASE_PATH}/', '/', literal=True),
+])
+
+RULE_SETS = {
+    "navigation": NAVIGATION,
+    "mission-links": MISSION_LINKS,
+    "favicon": FAVICON,
+    "github-pages": GITHUB_PAGES,
+    "root-paths": ROOT_PATHS,
+}
@@ -0,0 +1,130 @@
+/**
+ * Service Worker
+ * Written to the site root by build-site.py, which fills in CONFIG (see
+ * sitetools/offline.py). Do not register this template directly.
+ *
+ * - The core shell (CONFIG.precache) is cached on install. Each entry
+ *   carries the content hash of the built file and is stored under
+ *   "url?__rev=hash", so a new build only refetches what changed: the
+ *   update check is the browser's byte comparison of this one script.
+ * - Pages are network-first, falling back to the cached copy and then to
+ *   CONFIG.offline (the trail map) when there is no connection.
+ * - Gallery photos and newsletters (CONFIG.runtime) are cache-first in
+ *   their own size-capped caches; content-hashed files are cache-first.
+ * - Any other same-origin GET is network-first with a cached fallback.
+ *   Range requests (audio/video seeking) and other origins are left alone.
+ */
+const CONFIG = __CONFIG__;
+
+const PRECACHE = 'dnc-precache';
+const RUNTIME = 'dnc-runtime';
+const RUNTIME_MAX_ENTRIES = 100;
+// Same test as serve.py's is_hashed().
+const HASHED = /[.-][0-9a-f]{8,}(?:-\d+)?\.\w+$/;
+
+function isHashed(pathname) {
+    return HASHED.test(pathname) || CONFIG.hashedDirs.some(dir => pathname.startsWith(dir));
+}
+
+function normalize(pathname) {
+    return pathname.endsWith('/index.html') ? pathname.slice(0, -'index.html'.length) : pathname;
+}
+
+const revisions = new Map(CONFIG.precache.map(([url, rev]) => [normalize(url), rev]));
+
+function precacheKey(pathname) {
+    const rev = revisions.get(normalize(pathname));
+    return rev ? `${normalize(pathname)}?__rev=${rev}` : null;
+}
+
+self.addEventListener('install', event => {
+    event.waitUntil((async () => {
+        const cache = await caches.open(PRECACHE);
+        await Promise.all(CONFIG.precache.map(async ([url]) => {
+            const key = precacheKey(url);
+            if (await cache.match(key)) return;   // unchanged since the last build
+            const response = await fetch(url, { cache: 'reload' });
+            if (!response.ok) throw new Error(`${url}: ${response.status}`);
+            await cache.put(key, response);
+        }));
+        await self.skipWaiting();
+    })());
+});
+
+self.addEventListener('activate', event => {
+    event.waitUntil((async () => {
+        const wanted = new Set(CONFIG.precache.map(([url]) => new URL(precacheKey(url), location).href));
+        const cache = await caches.open(PRECACHE);
+        for (const request of await cache.keys()) {
+            if (!wanted.has(request.url)) await cache.delete(request);
+        }
+        const names = new Set([PRECACHE, RUNTIME, ...CONFIG.runtime.map(rule => rule.cache)]);
+        for (const name of await caches.keys()) {
+            if (name.startsWith('dnc-') && !names.has(name)) await caches.delete(name);
+        }
+        await self.clients.claim();
+    })());
+});
+
+async function trim(cacheName, maxEntries) {
+    const cache = await caches.open(cacheName);
+    const keys = await cache.keys();
+    // Keys come back in insertion order: drop the oldest.
+    for (const request of keys.slice(0, Math.max(0, keys.length - maxEntries))) {
+        await cache.delete(request);
+    }
+}
+
+async function cacheFirst(request, cacheName, maxEntries) {
+    const cache = await caches.open(cacheName);
+    const cached = await cache.match(request);
+    if (cached) return cached;
+    const response = await fetch(request);
+    if (response.ok) {
+        await cache.put(request, response.clone());
+        trim(cacheName, maxEntries);
+    }
+    return response;
+}
+
+async function networkFirst(request, fallback) {
+    const cache = await caches.open(RUNTIME);
+    try {
+        const response = await fetch(request);
+        if (response.ok) {
+            await cache.put(request, response.clone());
+            trim(RUNTIME, RUNTIME_MAX_ENTRIES);
+        }
+        return response;
+    } catch (err) {
+        const cached = await cache.match(request) || (fallback && await caches.match(fallback));
+        if (cached) return cached;
+        throw err;
+    }
+}
+
+self.addEventListener('fetch', event => {
+    const request = event.request;
+    const url = new URL(request.url);
+    if (request.method !== 'GET' || url.origin !== location.origin || request.headers.has('range')) return;
+
+    const key = precacheKey(url.pathname);
+    if (key) {
+        event.respondWith(caches.match(key).then(cached => cached || fetch(request)));
+        return;
+    }
+    if (request.mode === 'navigate') {
+        event.respondWith(networkFirst(request, precacheKey(CONFIG.offline)));
+        return;
+    }
+    const rule = CONFIG.runtime.find(r =>
+        r.prefixes.some(p => url.pathname.startsWith(p)) &&
+        r.extensions.some(ext => url.pathname.toLowerCase().endsWith(ext)));
+    if (rule) {
+        event.respondWith(cacheFirst(request, rule.cache, rule.maxEntries));
+    } else if (isHashed(url.pathname)) {
+        event.respondWith(cacheFirst(request, RUNTIME, RUNTIME_MAX_ENTRIES));
+    } else {
+        event.respondWith(networkFirst(request));
+    }
+});
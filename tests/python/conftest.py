@@ -0,0 +1,87 @@
+"""Tests for the Python maintenance scripts and sitetools.
+
+    python3 -m pytest tests/python
+
+The scripts are run as subprocesses against temporary trees; nothing here
+touches the site itself.
+"""
+
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT))
+
+
+import hashlib  # noqa: E402
+import threading  # noqa: E402
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer  # noqa: E402
+
+import pytest  # noqa: E402
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Serves `server.files` with ETags, conditional GETs and Range requests."""
+
+    protocol_version = "HTTP/1.1"      # keep-alive, like the real site
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append((self.path, dict(self.headers)))
+        body = server.files.get(self.path)
+        if body is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        etag = f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        start = 0
+        byte_range = self.headers.get("Range", "")
+        if byte_range.startswith("bytes=") and self.headers.get("If-Range") in (None, etag):
+            start = int(byte_range[len("bytes="):].split("-")[0])
+            if start >= len(body):
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{len(body)}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+        self.send_response(206 if start else 200)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body) - start))
+        if start:
+            self.send_header("Content-Range", f"bytes {start}-{len(body) - 1}/{len(body)}")
+        self.end_headers()
+        cut = server.cut.pop(self.path, None)
+        if cut is not None:
+            # Drop the connection part-way, as a flaky network would.
+            self.wfile.write(body[start:cut])
+            self.close_connection = True
+            return
+        self.wfile.write(body[start:])
+
+
+@pytest.fixture
+def stand_in():
+    """A local stand-in for the WordPress site on an ephemeral port.
+
+    Put bodies in `server.files` by path; `server.cut[path] = n` sends only
+    the first n bytes of the next response. `server.origin` is its URL and
+    `server.requests` lists (path, headers) of every GET.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    server.daemon_threads = True
+    server.files, server.cut, server.requests = {}, {}, []
+    server.origin = f"http://127.0.0.1:{server.server_address[1]}"
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,71 @@
+import io
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+from PIL import Image
+
+from sitetools.fetch import Downloader
+
+ROOT = Path(__file__).resolve().parents[2]
+UPLOADS = "/wp-content/uploads/2025/05"
+PAGE = f"""<html><body>
+<img src="{UPLOADS}/dnc-logo.png">
+<h2>Grand Prize Winner</h2><p>Jane Doe</p>
+<img src="https://www.demarestnaturecenter.org{UPLOADS}/Eagle-scaled.jpg" alt="Eagle">
+{"<p>filler</p>" * 20000}
+<h2>Honorable Mention</h2><p>John Roe</p>
+<img src="{UPLOADS}/IMG_1234.jpeg">
+</body></html>"""
+
+
+def jpeg_bytes(color):
+    out = io.BytesIO()
+    Image.new("RGB", (40, 30), color).save(out, "JPEG")
+    return out.getvalue()
+
+
+def test_stream_all_feeds_the_body_and_replays_it_from_the_cache(stand_in, tmp_path):
+    stand_in.files["/page/"] = body = b"<p>" + b"x" * 200_000 + b"</p>"
+    url = stand_in.origin + "/page/"
+
+    for status in ("downloaded", "not-modified"):
+        chunks = []
+        [result] = Downloader(cache_dir=tmp_path / "cache").stream_all([(url, chunks.append)])
+        assert result.status == status
+        assert len(chunks) > 1 and b"".join(chunks) == body
+
+
+def test_scrapes_pages_into_titles_and_manifest(stand_in, tmp_path):
+    stand_in.files["/winners/"] = PAGE.encode()
+    stand_in.files[f"{UPLOADS}/Eagle-scaled.jpg"] = jpeg_bytes("red")
+    stand_in.files[f"{UPLOADS}/IMG_1234.jpeg"] = jpeg_bytes("blue")
+
+    def run():
+        return subprocess.run(
+            [sys.executable, str(ROOT / "extract-winner-images.py"),
+             "https://www.demarestnaturecenter.org/winners/", "https://www.demarestnaturecenter.org/gone/",
+             "--origin", stand_in.origin, "--root", str(tmp_path), "--out", "winners",
+             "--year", "2099", "--cache-dir", str(tmp_path / "cache"), "--no-derivatives"],
+            capture_output=True, text=True)
+
+    result = run()
+    assert result.returncode == 1, result.stdout + result.stderr   # /gone/ is a 404
+    folder = tmp_path / "winners"
+    assert json.loads((folder / "titles.json").read_text()) == {
+        "Eagle-scaled.jpg": {"title": "Grand Prize Winner", "photographer": "Jane Doe"},
+        "IMG_1234.jpeg": {"title": "Honorable Mention", "photographer": "John Roe"},
+    }
+    manifest = json.loads((folder / "manifest.json").read_text())
+    assert [(e["file"], e["title"], e["photographer"], e["width"], e["height"]) for e in manifest] == [
+        ("Eagle-scaled.jpg", "Grand Prize Winner", "Jane Doe", 40, 30),
+        ("IMG_1234.jpeg", "Honorable Mention", "John Roe", 40, 30),
+    ]
+    assert not (folder / "dnc-logo.png").exists()
+
+    # A re-run revalidates the page and photos instead of downloading them.
+    del stand_in.requests[:]
+    run()
+    fetched = [path for path, headers in stand_in.requests if "If-None-Match" not in headers]
+    assert fetched == ["/gone/"]
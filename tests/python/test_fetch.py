@@ -0,0 +1,78 @@
+import io
+
+from PIL import Image
+
+from sitetools.fetch import Downloader
+
+PNG_PATH = "/wp-content/uploads/2024/08/photo.png"
+
+
+def png_bytes(size=(64, 64)):
+    out = io.BytesIO()
+    Image.effect_noise(size, 50).convert("RGB").save(out, "PNG")
+    return out.getvalue()
+
+
+def test_conditional_get_returns_not_modified(stand_in, tmp_path):
+    stand_in.files[PNG_PATH] = body = png_bytes()
+    dest = tmp_path / "out" / "photo.png"
+
+    def run():
+        downloader = Downloader(cache_dir=tmp_path / "cache", workers=2, expect={"png"})
+        [result] = downloader.download_all([(stand_in.origin + PNG_PATH, dest)])
+        return result
+
+    first = run()
+    assert (first.status, first.bytes, first.kind) == ("downloaded", len(body), "png")
+    assert dest.read_bytes() == body
+
+    second = run()
+    assert (second.status, second.bytes) == ("not-modified", 0)
+    assert "If-None-Match" in stand_in.requests[-1][1]
+    assert dest.read_bytes() == body
+
+
+def test_interrupted_download_resumes_with_range(stand_in, tmp_path):
+    stand_in.files[PNG_PATH] = body = png_bytes((256, 256))
+    stand_in.cut[PNG_PATH] = len(body) // 3
+    dest = tmp_path / "photo.png"
+    url = stand_in.origin + PNG_PATH
+
+    [failed] = Downloader(cache_dir=tmp_path / "cache").download_all([(url, dest)])
+    assert failed.status == "failed" and not dest.exists()
+
+    [resumed] = Downloader(cache_dir=tmp_path / "cache").download_all([(url, dest)])
+    assert resumed.status == "resumed"
+    assert resumed.bytes == len(body) - len(body) // 3
+    assert stand_in.requests[-1][1]["Range"] == f"bytes={len(body) // 3}-"
+    assert dest.read_bytes() == body
+
+
+def test_complete_part_file_is_fetched_again(stand_in, tmp_path):
+    # A crash after the last write but before the .part was moved into place.
+    stand_in.files[PNG_PATH] = body = png_bytes((256, 256))
+    stand_in.cut[PNG_PATH] = len(body) // 2
+    dest = tmp_path / "photo.png"
+    url = stand_in.origin + PNG_PATH
+    Downloader(cache_dir=tmp_path / "cache").download_all([(url, dest)])
+    [part] = (tmp_path / "cache").rglob("*.part")
+    part.write_bytes(body)
+
+    for _ in range(2):
+        [result] = Downloader(cache_dir=tmp_path / "cache").download_all([(url, dest)])
+        assert result.ok
+        assert dest.read_bytes() == body
+    assert [headers.get("Range") for _, headers in stand_in.requests[1:3]] == [f"bytes={len(body)}-", None]
+    assert not part.exists()
+
+
+def test_body_that_is_not_an_image_is_rejected(stand_in, tmp_path):
+    stand_in.files[PNG_PATH] = b"<!DOCTYPE html><title>Not found</title>"
+    dest = tmp_path / "photo.png"
+
+    downloader = Downloader(cache_dir=tmp_path / "cache", expect={"png"})
+    [result] = downloader.download_all([(stand_in.origin + PNG_PATH, dest)])
+    assert result.status == "failed"
+    assert "not a png image" in result.error
+    assert not dest.exists()
+
@@ -0,0 +1,132 @@
+import zlib
+
+import pytest
+
+from sitetools import pdf
+
+HEADER = b"%PDF-1.5\n%\xe2\xe3\xcf\xd3\n"
+
+
+def catalog(pages):
+    return b"<< /Type /Catalog /Pages %d 0 R >>" % pages
+
+
+def page_tree(count):
+    return b"<< /Type /Pages /Kids [] /Count %d >>" % count
+
+
+def stream_object(head, data):
+    return b"<< %s /Length %d >>\nstream\n%s\nendstream" % (head, len(data), data)
+
+
+def write_objects(out, objects):
+    """Append `n 0 obj ... endobj` for each (n, body); returns {n: offset}."""
+    offsets = {}
+    for num, body in objects:
+        offsets[num] = len(out)
+        out += b"%d 0 obj\n%s\nendobj\n" % (num, body)
+    return offsets
+
+
+def xref_table(offsets, trailer):
+    """A classic xref table with one subsection per object."""
+    table = b"xref\n"
+    if 0 not in offsets:
+        table += b"0 1\n0000000000 65535 f \n"
+    for num, offset in sorted(offsets.items()):
+        table += b"%d 1\n%010d 00000 n \n" % (num, offset)
+    return table + b"trailer\n<< %s >>\n" % trailer
+
+
+def classic(objects, root, linearized_pages=None):
+    """A PDF with one classic xref table; with `linearized_pages`, it starts
+    with a linearization dictionary whose /L is the file's length."""
+    out = bytearray(HEADER)
+    if linearized_pages is not None:
+        objects = [(99, b"<< /Linearized 1 /L 0000000000 /N %d >>" % linearized_pages)] + objects
+    offsets = write_objects(out, objects)
+    start = len(out)
+    size = max(offsets) + 1
+    out += xref_table(offsets, b"/Size %d /Root %d 0 R" % (size, root))
+    out += b"startxref\n%d\n%%%%EOF\n" % start
+    if linearized_pages is not None:
+        out[:] = out.replace(b"/L 0000000000", b"/L %010d" % len(out))
+    return bytes(out), start
+
+
+def test_classic_xref(tmp_path):
+    data, _ = classic([(1, catalog(2)), (2, page_tree(3))], root=1)
+    path = tmp_path / "classic.pdf"
+    path.write_bytes(data)
+
+    info = pdf.info(path)
+    assert (info.pages, info.source, info.version) == (3, "page tree", "1.5")
+    assert not info.linearized
+    assert info.bytes == len(data)
+
+
+def test_xref_stream_with_predictor_and_object_stream(tmp_path):
+    # The page tree (3) lives in an object stream (2); the cross-reference
+    # stream (4) is Flate-compressed with PNG "Up" prediction.
+    contained = b"3 0 " + page_tree(7)
+    out = bytearray(HEADER)
+    offsets = write_objects(out, [
+        (1, catalog(3)),
+        (2, stream_object(b"/Type /ObjStm /N 1 /First 4 /Filter /FlateDecode",
+                          zlib.compress(contained))),
+    ])
+    offsets[4] = len(out)
+    rows = [(0, 0, 0), (1, offsets[1], 0), (1, offsets[2], 0), (2, 2, 0), (1, offsets[4], 0)]
+    encoded, previous = b"", bytes(4)
+    for kind, field, index in rows:
+        row = bytes([kind]) + field.to_bytes(2, "big") + bytes([index])
+        encoded += b"\x02" + bytes((a - b) & 0xFF for a, b in zip(row, previous))
+        previous = row
+    write_objects(out, [(4, stream_object(
+        b"/Type /XRef /Size 5 /W [1 2 1] /Root 1 0 R /Filter /FlateDecode "
+        b"/DecodeParms << /Predictor 12 /Columns 4 >>", zlib.compress(encoded)))])
+    out += b"startxref\n%d\n%%%%EOF\n" % offsets[4]
+    path = tmp_path / "xref-stream.pdf"
+    path.write_bytes(out)
+
+    info = pdf.info(path)
+    assert (info.pages, info.source) == (7, "page tree")
+
+
+def test_incremental_update_breaks_linearization(tmp_path):
+    data, start = classic([(1, catalog(2)), (2, page_tree(3))], root=1, linearized_pages=3)
+    path = tmp_path / "linearized.pdf"
+    path.write_bytes(data)
+    info = pdf.info(path)
+    assert info.linearized and (info.pages, info.source) == (3, "page tree")
+
+    # An editor's "save": a new page tree and an xref section chained by /Prev.
+    out = bytearray(data)
+    offsets = write_objects(out, [(2, page_tree(4))])
+    update = len(out)
+    out += xref_table(offsets, b"/Size 100 /Root 1 0 R /Prev %d" % start)
+    out += b"startxref\n%d\n%%%%EOF\n" % update
+    path.write_bytes(out)
+
+    info = pdf.info(path)
+    assert not info.linearized
+    assert (info.pages, info.source) == (4, "page tree")
+
+
+def test_damaged_xref_falls_back_to_linearization(tmp_path):
+    data, start = classic([(1, catalog(2)), (2, page_tree(3))], root=1, linearized_pages=5)
+    # Point startxref into the header, keeping the length (and so /L) intact.
+    tail = b"startxref\n%d\n" % start
+    damaged = data.replace(tail, b"startxref\n%s\n" % b"5".rjust(len(str(start)), b"0"))
+    path = tmp_path / "damaged.pdf"
+    path.write_bytes(damaged)
+
+    info = pdf.info(path)
+    assert info.linearized
+    assert (info.pages, info.source) == (5, "linearization")
+
+    plain, start = classic([(1, catalog(2)), (2, page_tree(3))], root=1)
+    path.write_bytes(plain.replace(b"startxref\n%d\n" % start,
+                                   b"startxref\n%s\n" % b"5".rjust(len(str(start)), b"0")))
+    with pytest.raises(pdf.PdfError):
+        pdf.info(path)
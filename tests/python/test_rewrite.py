@@ -0,0 +1,53 @@
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+from sitetools.files import iter_files
+from sitetools.rewrite import Rule, RuleSet, rewrite_files
+from sitetools.rules import FAVICON, GITHUB_PAGES, MISSION_LINKS, NAVIGATION
+
+ROOT = Path(__file__).resolve().parents[2]
+PAGES = ["index.html", "about/index.html", "visit/index.html", "privacy.html"]
+
+
+def copy_pages(dest):
+    for rel in PAGES:
+        (dest / rel).parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy(ROOT / rel, dest / rel)
+
+
+def tree_text(root):
+    return {p.relative_to(root).as_posix(): p.read_text(encoding="utf-8")
+            for p in sorted(root.rglob("*.html"))}
+
+
+def test_added_rule_sets_apply_in_sequence():
+    first = RuleSet([Rule("a", "b", literal=True)])
+    second = RuleSet([Rule("b", "c", literal=True)])
+    text, counts = (first + second).apply("a b")
+    assert text == "c c"
+    assert counts == {"a": 1, "b": 2}
+
+
+def test_combined_run_matches_sequential_runs(tmp_path):
+    combined, sequential = tmp_path / "combined", tmp_path / "sequential"
+    copy_pages(combined)
+    copy_pages(sequential)
+    # Strip the favicons so the favicon table has work to do.
+    for root in (combined, sequential):
+        for path in root.rglob("*.html"):
+            text = path.read_text(encoding="utf-8")
+            path.write_text("\n".join(line for line in text.split("\n") if "favicon" not in line.lower()),
+                            encoding="utf-8")
+
+    # github-pages is listed first but still applies last.
+    subprocess.run([sys.executable, str(ROOT / "rewrite-site.py"), "--root", str(combined),
+                    "github-pages", "mission-links", "navigation", "favicon"],
+                   check=True, capture_output=True)
+    for table in (MISSION_LINKS, NAVIGATION, FAVICON, GITHUB_PAGES):
+        for result in rewrite_files(list(iter_files(sequential)), table):
+            assert not result.error
+
+    assert tree_text(combined) == tree_text(sequential)
+    assert 'href="/dncweb/assets/images/favicon.png"' in (combined / "index.html").read_text()
@@ -1,6 +1,12 @@
 #!/usr/bin/env python3
-import os
-import re
+# For references this table doesn't cover, localize-remote-assets.py finds
+# and downloads every remaining wp-content/uploads URL in the tree.
+import sys
+
+from sitetools import instrument
+from sitetools.rewrite import Rule, RuleSet, rewrite_files
+
+instrument.start(__file__)
 
 # Mapping of old image URLs to new local paths
 replacements = [
@@ -68,22 +74,21 @@ files_to_update = [
     'ecoexplorer/meadow.html',
 ]
 
-updated_count = 0
+# Every URL is matched in one pass per file
+rules = RuleSet(Rule(old_url, new_path, literal=True) for old_url, new_path in replacements)
 
-for filepath in files_to_update:
-    with open(filepath, 'r', encoding='utf-8') as f:
-        content = f.read()
-
-    original_content = content
-    for old_url, new_path in replacements:
-        content = content.replace(old_url, new_path)
+updated_count = 0
+error_count = 0
 
-    if content != original_content:
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(content)
-        print(f"✓ Updated {filepath}")
+for result in rewrite_files(files_to_update, rules):
+    if result.error:
+        print(f"✗ Error processing {result.path}: {result.error}")
+        error_count += 1
+    elif result.changed:
+        print(f"✓ Updated {result.path}")
         updated_count += 1
     else:
-        print(f"- No changes needed in {filepath}")
+        print(f"- No changes needed in {result.path}")
 
 print(f"\nTotal files updated: {updated_count}")
+sys.exit(1 if error_count else 0)
@@ -1,40 +1,30 @@
 #!/usr/bin/env python3
 """Update mission and policies links in all HTML files"""
 
-import re
+import sys
 from pathlib import Path
 
-# Find all HTML files
-html_files = list(Path('.').rglob('*.html'))
-
-# Replacement patterns
-replacements = [
-    # Update mission link
-    (r'href="/about/#mission"', 'href="/about/mission.html"'),
-    # Update policies link
-    (r'href="/about/#policies"', 'href="/about/policies.html"'),
-    # Update meetings link
-    (r'href="/about/#meetings"', 'href="/about/policies.html#meetings"'),
-]
-
-updated_count = 0
+from sitetools import instrument
+from sitetools.rewrite import rewrite_files
+from sitetools.rules import MISSION_LINKS
 
-for html_file in html_files:
-    try:
-        content = html_file.read_text()
-        original_content = content
+instrument.start(__file__)
 
-        # Apply all replacements
-        for pattern, replacement in replacements:
-            content = re.sub(pattern, replacement, content)
+# Find all HTML files
+with instrument.stage("walk"):
+    html_files = list(Path('.').rglob('*.html'))
 
-        # Only write if something changed
-        if content != original_content:
-            html_file.write_text(content)
-            updated_count += 1
-            print(f"Updated: {html_file}")
+updated_count = 0
+error_count = 0
 
-    except Exception as e:
-        print(f"Error processing {html_file}: {e}")
+for result in rewrite_files(html_files, MISSION_LINKS):
+    if result.error:
+        print(f"Error processing {result.path}: {result.error}")
+        error_count += 1
+    elif result.changed:
+        updated_count += 1
+        print(f"Updated: {result.path}")
 
 print(f"\nTotal files updated: {updated_count}")
+if error_count:
+    sys.exit(1)
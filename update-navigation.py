@@ -1,61 +1,35 @@
 #!/usr/bin/env python3
 """Script to update navigation links across all HTML files"""
 
-import os
-import re
+import argparse
+import sys
 from pathlib import Path
 
-# Define the replacements
-replacements = [
-    # Fix EcoExplorer link
-    (r'<li><a href="/visit/#eco-explorer">EcoExplorer Guides</a></li>',
-     '<li><a href="/ecoexplorer/">EcoExplorer Guides</a></li>'),
-    (r'<li><a href="/eco0/">EcoExplorer Guides</a></li>',
-     '<li><a href="/ecoexplorer/">EcoExplorer Guides</a></li>'),
-    # Fix Shop link to point to WordPress shop
-    (r'<li><a href="/shop/">Shop</a></li>',
-     '<li><a href="https://www.demarestnaturecenter.org/shop/">Shop</a></li>'),
-    # Fix Oktoberfest/Fall Festival link
-    (r'<li><a href="/events/#oktoberfest">Oktoberfest/Fall Festival</a></li>',
-     '<li><a href="/fall-festival/">Oktoberfest/Fall Festival</a></li>'),
-    # Fix Scholarship link
-    (r'<li><a href="/support/#scholarship">Scholarship</a></li>',
-     '<li><a href="/scholarship/">Scholarship</a></li>'),
-    # Fix Photo Contest link
-    (r'<li><a href="/gallery/#photo-contest">Photo Contest</a></li>',
-     '<li><a href="/photocontest/">Photo Contest</a></li>'),
-    # Remove Newsletters from News and Events menu
-    (r'\s*<li><a href="/events/#newsletters">Newsletters</a></li>\n',
-     ''),
-    # Remove Nature News from News and Events menu
-    (r'\s*<li><a href="/events/#nature-news">Nature News</a></li>\n',
-     ''),
-    # Remove Camp SOAR from News and Events menu
-    (r'\s*<li><a href="/programs/#camp-soar">Camp SOAR</a></li>\n',
-     ''),
-]
+from sitetools import instrument
+from sitetools.rewrite import rewrite_files
+from sitetools.rules import NAVIGATION
 
-def update_file(filepath):
-    with open(filepath, 'r', encoding='utf-8') as f:
-        content = f.read()
-    original_content = content
-    for pattern, replacement in replacements:
-        content = re.sub(pattern, replacement, content)
-    if content != original_content:
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(content)
-        return True
-    return False
 
 def main():
-    project_root = Path('/Users/kriskumar/dnc')
-    html_files = list(project_root.rglob('*.html'))
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--root', default=str(Path(__file__).resolve().parent),
+                        help='site root (default: the directory this script is in)')
+    args = parser.parse_args()
+
+    instrument.start(__file__)
+    with instrument.stage("walk"):
+        html_files = list(Path(args.root).rglob('*.html'))
     updated_count = 0
-    for html_file in html_files:
-        if update_file(html_file):
-            print(f"Updated: {html_file}")
+    error_count = 0
+    for result in rewrite_files(html_files, NAVIGATION):
+        if result.error:
+            print(f"Error processing {result.path}: {result.error}")
+            error_count += 1
+        elif result.changed:
+            print(f"Updated: {result.path}")
             updated_count += 1
     print(f"\nTotal files updated: {updated_count}")
+    return 1 if error_count else 0
 
 if __name__ == '__main__':
-    main()
+    sys.exit(main())
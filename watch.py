@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Keep the generated files up to date while you edit the site.
+
+Watches the tree (inotify on Linux, polling elsewhere or with --poll) and,
+once changes have settled for --debounce seconds:
+
+- photos added, replaced or deleted in a contest year's folder (see
+  photocontest/build-manifest.py's YEARS) update just their manifest
+  entries, placeholders and derivatives, using build-manifest.py's Gallery
+  kept in memory, so each change costs one photo's work instead of a full
+  rescan; the gallery shards and index are rewritten to match
+- saving a year's titles.json re-captions that year's photos
+- HTML files that were saved get the navigation and favicon rules
+  re-applied, and only those files
+
+Files this script writes itself are ignored, as are derived/, .cache/,
+build output and editor temp files.
+
+    python3 watch.py
+    python3 watch.py --poll --interval 2
+"""
+
+import argparse
+import ctypes
+import ctypes.util
+import importlib.util
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+
+from sitetools.files import SKIP_DIRS
+from sitetools.rewrite import rewrite_file
+from sitetools.rules import FAVICON, NAVIGATION
+
+ROOT = Path(__file__).resolve().parent
+HTML_RULES = NAVIGATION + FAVICON
+IGNORED_DIRS = {"__pycache__", "derived", "dist"}
+IGNORED_SUFFIXES = (".tmp", ".part", ".swp", ".swx", "~", ".gz", ".br")
+
+
+def load_build_manifest():
+    spec = importlib.util.spec_from_file_location(
+        "build_manifest", ROOT / "photocontest" / "build-manifest.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def watched_dir(path):
+    name = os.path.basename(path)
+    return not name.startswith(".") and name not in SKIP_DIRS and name not in IGNORED_DIRS
+
+
+def relevant(path):
+    name = os.path.basename(path)
+    return not name.startswith((".", "#")) and not name.endswith(IGNORED_SUFFIXES)
+
+
+# -- Watchers -----------------------------------------------------------------
+#
+# Both yield batches of changed paths; a path that no longer exists was
+# deleted (or renamed away).
+
+class InotifyWatcher:
+    IN_CLOSE_WRITE = 0x008
+    IN_MOVED_FROM = 0x040
+    IN_MOVED_TO = 0x080
+    IN_CREATE = 0x100
+    IN_DELETE = 0x200
+    IN_DELETE_SELF = 0x400
+    IN_Q_OVERFLOW = 0x4000
+    IN_IGNORED = 0x8000
+    IN_ISDIR = 0x40000000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+    MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+    EVENT = struct.Struct("iIII")
+
+    def __init__(self, root):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        self._add = libc.inotify_add_watch
+        self._add.argtypes = (ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32)
+        self.fd = libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.dirs = {}
+        self.add_tree(str(root))
+
+    def add_tree(self, top):
+        for dirpath, dirs, _files in os.walk(top):
+            dirs[:] = [d for d in dirs if watched_dir(d)]
+            wd = self._add(self.fd, os.fsencode(dirpath), self.MASK)
+            if wd < 0:
+                err = ctypes.get_errno()
+                raise OSError(err, f"inotify_add_watch({dirpath}): {os.strerror(err)}")
+            self.dirs[wd] = dirpath
+
+    def wait(self, timeout):
+        """Return changed paths, or [] after `timeout` seconds of quiet."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        changed = []
+        pos = 0
+        while pos + self.EVENT.size <= len(data):
+            wd, mask, _cookie, length = self.EVENT.unpack_from(data, pos)
+            name = data[pos + self.EVENT.size:pos + self.EVENT.size + length].rstrip(b"\0")
+            pos += self.EVENT.size + length
+            if mask & self.IN_Q_OVERFLOW:
+                raise OverflowError("inotify queue overflowed")
+            if mask & self.IN_IGNORED:
+                self.dirs.pop(wd, None)
+                continue
+            directory = self.dirs.get(wd)
+            if directory is None or not name:
+                continue
+            path = os.path.join(directory, os.fsdecode(name))
+            if mask & self.IN_ISDIR:
+                if mask & (self.IN_CREATE | self.IN_MOVED_TO) and watched_dir(path):
+                    self.add_tree(path)
+                    changed.extend(os.path.join(d, f) for d, _, files in os.walk(path) for f in files)
+                continue
+            if mask & self.IN_CREATE:
+                continue   # wait for the IN_CLOSE_WRITE that follows
+            changed.append(path)
+        return changed
+
+
+class PollingWatcher:
+    def __init__(self, root, interval=1.0):
+        self.root = str(root)
+        self.interval = interval
+        self.snapshot = self.scan()
+
+    def scan(self):
+        snapshot = {}
+        for dirpath, dirs, files in os.walk(self.root):
+            dirs[:] = [d for d in dirs if watched_dir(d)]
+            for name in files:
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                snapshot[path] = (st.st_size, st.st_mtime_ns)
+        return snapshot
+
+    def wait(self, timeout):
+        time.sleep(min(timeout, self.interval) if timeout is not None else self.interval)
+        current = self.scan()
+        changed = [p for p, stat in current.items() if self.snapshot.get(p) != stat]
+        changed += [p for p in self.snapshot if p not in current]
+        self.snapshot = current
+        return changed
+
+
+# -- Handlers -----------------------------------------------------------------
+
+class Site:
+    def __init__(self, derivatives=True):
+        self.build_manifest = load_build_manifest()
+        self.gallery = self.build_manifest.Gallery(derivatives=derivatives)
+        started = time.perf_counter()
+        self.gallery.scan()
+        print(f"Loaded {sum(len(m.entries) for m in self.gallery.manifests)} photos "
+              f"in {time.perf_counter() - started:.2f}s")
+        self.written = {}   # path -> (size, mtime_ns) of files written here
+
+    def ours(self, path):
+        """True if `path` is unchanged since this process wrote it."""
+        stamp = self.written.get(path)
+        if stamp is None:
+            return False
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return False
+        return (st.st_size, st.st_mtime_ns) == stamp
+
+    def remember(self, path):
+        st = os.stat(path)
+        self.written[str(path)] = (st.st_size, st.st_mtime_ns)
+
+    def write_gallery(self):
+        self.gallery.write()
+        for manifest in self.gallery.manifests:
+            self.remember(manifest.path)
+        for path in self.gallery.out_dir.iterdir():
+            self.remember(path)
+
+    def handle(self, paths):
+        photos_changed, photos_removed, pages = {}, {}, []
+        retitled = set()
+        for path in sorted(set(paths)):
+            if not relevant(path) or self.ours(path):
+                continue
+            p = Path(path)
+            manifest = self.gallery.manifest_for(p)
+            if manifest and p.name == self.build_manifest.TITLES_NAME:
+                retitled.add(manifest)
+            elif manifest and manifest.owns(p):
+                (photos_changed if p.is_file() else photos_removed).setdefault(manifest, []).append(p)
+            elif p.suffix.lower() == ".html" and p.is_file():
+                pages.append(p)
+
+        stamp = time.strftime("%H:%M:%S")
+        if photos_changed or photos_removed or retitled:
+            started = time.perf_counter()
+            changes = []
+            for manifest in self.gallery.manifests:
+                changed = photos_changed.get(manifest, [])
+                removed = photos_removed.get(manifest, [])
+                if manifest in retitled:
+                    manifest.scan()   # reloads titles.json; photos come from the caches
+                    changes.append(f"{manifest.year}:titles")
+                if not (changed or removed):
+                    continue
+                manifest.update(changed)
+                # Also prunes derivatives of the replaced versions of changed photos.
+                manifest.remove(p.name for p in removed)
+                manifest.save_caches()
+                changes += [f"+{p.name}" for p in changed] + [f"-{p.name}" for p in removed]
+            self.write_gallery()
+            print(f"[{stamp}] gallery: {' '.join(changes)} "
+                  f"({(time.perf_counter() - started) * 1000:.0f} ms)")
+        for page in pages:
+            result = rewrite_file(page, HTML_RULES)
+            if result.error:
+                print(f"[{stamp}] Error processing {page}: {result.error}")
+            elif result.changed:
+                self.remember(page)
+                print(f"[{stamp}] Updated: {page.relative_to(ROOT)} "
+                      f"({', '.join(sorted(result.counts))})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild generated files as sources change.")
+    parser.add_argument("--poll", action="store_true", help="poll instead of using inotify")
+    parser.add_argument("--interval", type=float, default=1.0, help="polling interval in seconds")
+    parser.add_argument("--debounce", type=float, default=0.3,
+                        help="wait this long after the last change before acting (default: 0.3)")
+    parser.add_argument("--no-derivatives", action="store_true",
+                        help="don't write resized photo copies into derived/")
+    args = parser.parse_args()
+
+    site = Site(derivatives=not args.no_derivatives)
+    watcher = None
+    if not args.poll and sys.platform.startswith("linux"):
+        try:
+            watcher = InotifyWatcher(ROOT)
+            print(f"Watching {ROOT} with inotify ({len(watcher.dirs)} directories)")
+        except OSError as e:
+            print(f"inotify unavailable ({e}); polling instead")
+    if watcher is None:
+        watcher = PollingWatcher(ROOT, args.interval)
+        print(f"Watching {ROOT} every {args.interval:g}s")
+
+    pending = []
+    try:
+        while True:
+            try:
+                changed = watcher.wait(args.debounce if pending else None)
+            except OverflowError:
+                print("Too many changes at once; rescanning")
+                site.gallery.scan()
+                site.write_gallery()
+                pending = []
+                continue
+            if changed:
+                pending.extend(changed)
+            elif pending:
+                site.handle(pending)
+                pending = []
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())